@@ -0,0 +1,211 @@
+import argparse
+import glob
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import datetime, timedelta
+from CONTAINER_SOLVER import BALANCE_SHIP_ANYTIME, BUDGET_STOPS
+from COST_MODEL import GET_COST_MODEL
+from SEARCH_STATS import SearchStats
+from SOLUTION_CACHE import SolutionCache
+from MANIFEST_CACHE import DEFAULT_SIDECAR_DIR, LOAD_SIZED_MANIFEST, SIDECAR_FILE
+from OUTPUT_WRITER import DEFAULT_OUTPUT_DIR, DESCRIBE_OUTPUT_DIR, WRITE_ATOMICALLY, AsyncWriter
+from HELPER_FUNCTIONS import PARSE_MANIFEST_FILE, MANIFEST_GEOMETRY, MANIFEST_TEXT, CREATE_MANIFEST_LOG_ENTRY, LOG_FILE_NAME, LOG_TEXT, FORMAT_POSITION, ManifestError
+
+# Seconds each ship may spend searching before its best plan so far is used
+DEFAULT_TIME_BUDGET = 30
+
+# Expands a directory or glob pattern into the list of inbound manifest files to solve
+def FIND_MANIFESTS(PATTERN):
+    if os.path.isdir(PATTERN):
+        PATTERN = os.path.join(PATTERN, '*.txt')
+
+    return sorted(FILE for FILE in glob.glob(PATTERN) if 'OUTBOUND' not in os.path.basename(FILE))
+
+# Checks whether the ship (a bay of GEOMETRY) is one MAIN treats as already balanced without searching
+def NEEDS_NO_MOVES(GRID, CONTAINER_COUNT, GEOMETRY):
+    if CONTAINER_COUNT <= 1:
+        return True
+
+    if CONTAINER_COUNT == 2:
+        COLUMNS = [POSITION[1] for POSITION, CELL in GRID.items() if CELL['weight'] > 0]
+        return GEOMETRY.IS_PORT(COLUMNS[0]) != GEOMETRY.IS_PORT(COLUMNS[1])
+
+    return False
+
+# Writes the files of one ship, each atomically, or with DEFER_WRITES returns them as (path, text) pairs for the
+# caller to write
+def SAVE_OUTPUTS(OUTPUTS, DEFER_WRITES):
+    if DEFER_WRITES:
+        return OUTPUTS
+
+    for PATH, TEXT in OUTPUTS:
+        WRITE_ATOMICALLY(PATH, TEXT)
+    return []
+
+# Solves one manifest non-interactively and writes its OUTBOUND manifest and log file (runs inside a worker process)
+# (CACHE_FILE, when given, is a solution cache shared by all workers; SIDECAR_DIR, when given, loads the manifest
+# through its binary sidecar kept in that directory, see MANIFEST_CACHE; DEFER_WRITES leaves the files in the result's 'outputs' instead of writing them, so
+# the worker never waits for the disk). The bay's size is read from the manifest, see MANIFEST_GEOMETRY (or from a
+# current sidecar's header, see LOAD_SIZED_MANIFEST).
+def SOLVE_MANIFEST(MANIFEST_FILE, OUTPUT_DIR=None, TIME_BUDGET=DEFAULT_TIME_BUDGET, CACHE_FILE=None, SIDECAR_DIR=None, DEFER_WRITES=False):
+    OUTPUT_DIR = OUTPUT_DIR or DEFAULT_OUTPUT_DIR()
+    START_TIME = datetime.now()
+    SIMULATED_TIME = START_TIME
+    LOG_ENTRIES = [CREATE_MANIFEST_LOG_ENTRY("Program was started.", SIMULATED_TIME)]
+
+    try:
+        if SIDECAR_DIR:
+            GRID, CONTAINER_COUNT, GEOMETRY = LOAD_SIZED_MANIFEST(MANIFEST_FILE, SIDECAR_PATH=SIDECAR_FILE(MANIFEST_FILE, SIDECAR_DIR))
+        else:
+            GEOMETRY = MANIFEST_GEOMETRY(MANIFEST_FILE)
+            GRID, CONTAINER_COUNT = PARSE_MANIFEST_FILE(MANIFEST_FILE, GEOMETRY)
+    except ManifestError as ERROR:
+        LOG_ENTRIES.append(CREATE_MANIFEST_LOG_ENTRY(f"ERROR: Manifest {ERROR}. Ship skipped.", SIMULATED_TIME))
+        LOG_ENTRIES.append(CREATE_MANIFEST_LOG_ENTRY("Program was shut down.", SIMULATED_TIME))
+        LOG_FILENAME = LOG_FILE_NAME(START_TIME, MANIFEST_FILE)
+        OUTPUTS = SAVE_OUTPUTS([(os.path.join(OUTPUT_DIR, LOG_FILENAME), LOG_TEXT(LOG_ENTRIES))], DEFER_WRITES)
+        return {'manifest': MANIFEST_FILE, 'status': 'rejected', 'error': str(ERROR), 'solve_time': None,
+                'nodes_expanded': None, 'plan_cost': None, 'moves': None, 'outbound_file': None, 'log_file': LOG_FILENAME,
+                'outputs': OUTPUTS}
+
+    OUTBOUND_FILE = os.path.basename(MANIFEST_FILE).replace(".txt", "OUTBOUND.txt")
+    LOG_ENTRIES.append(CREATE_MANIFEST_LOG_ENTRY(f"Manifest {os.path.basename(MANIFEST_FILE)} is opened, there are {CONTAINER_COUNT} containers on the ship.", SIMULATED_TIME))
+
+    SOLUTION = []
+    FINAL_GRID = GRID
+    PLAN_COST = 0
+    IS_OPTIMAL = True
+    CACHED = False
+    STATS = SearchStats()
+
+    SOLVE_START = time.perf_counter()
+    if not NEEDS_NO_MOVES(GRID, CONTAINER_COUNT, GEOMETRY):
+        SOLUTION = None
+        CACHE = SolutionCache(CACHE_FILE) if CACHE_FILE else None
+        for SOLUTION, FINAL_GRID, PLAN_COST, IS_OPTIMAL in BALANCE_SHIP_ANYTIME(GRID, GEOMETRY, TIME_BUDGET=TIME_BUDGET, STATS=STATS, CACHE=CACHE):
+            pass
+        if CACHE is not None:
+            CACHED = CACHE.HITS > 0
+            CACHE.CLOSE()
+    SOLVE_TIME = time.perf_counter() - SOLVE_START
+
+    # A search that ran out of time before any plan turned up proves nothing, so that ship gets no OUTBOUND manifest
+    STOPPED = SOLUTION is None and STATS.TERMINATION in BUDGET_STOPS
+    if STOPPED:
+        LOG_ENTRIES.append(CREATE_MANIFEST_LOG_ENTRY(f"No balance solution found, search stopped: {STATS.TERMINATION}. No OUTBOUND manifest was written.", SIMULATED_TIME))
+    elif SOLUTION is None:
+        LOG_ENTRIES.append(CREATE_MANIFEST_LOG_ENTRY("Ship cannot be balanced.", SIMULATED_TIME))
+        FINAL_GRID = GRID
+    elif SOLUTION:
+        TOTAL_STEPS = len(SOLUTION) * 2 + 1
+        SIMULATED_TIME += timedelta(minutes=1)
+        LOG_ENTRIES.append(CREATE_MANIFEST_LOG_ENTRY(f"Balance solution found, it will require {TOTAL_STEPS} moves/{PLAN_COST} minutes.", SIMULATED_TIME))
+
+        STEP_TIMES, TIME_TO_PARK = GET_COST_MODEL(GEOMETRY).STEP_TIMES(SOLUTION, GRID)
+        for i, (FROM_POS, TO_POS) in enumerate(SOLUTION, 1):
+            PREV_POS = GEOMETRY.PARK_POSITION if i == 1 else SOLUTION[i-2][1]
+            MOVE_TIME = STEP_TIMES[i - 1]
+
+            SIMULATED_TIME += timedelta(minutes=MOVE_TIME[0])
+            LOG_ENTRIES.append(CREATE_MANIFEST_LOG_ENTRY(f"Move from {'PARK' if i == 1 else FORMAT_POSITION(PREV_POS)} to {FORMAT_POSITION(FROM_POS)}, {MOVE_TIME[0]} minutes", SIMULATED_TIME))
+
+            SIMULATED_TIME += timedelta(minutes=MOVE_TIME[1])
+            LOG_ENTRIES.append(CREATE_MANIFEST_LOG_ENTRY(f"{FORMAT_POSITION(FROM_POS)} was moved to {FORMAT_POSITION(TO_POS)}, {MOVE_TIME[1]} minutes", SIMULATED_TIME))
+
+        LAST_DEST = SOLUTION[-1][1]
+        SIMULATED_TIME += timedelta(minutes=TIME_TO_PARK)
+        LOG_ENTRIES.append(CREATE_MANIFEST_LOG_ENTRY(f"Move from {FORMAT_POSITION(LAST_DEST)} to PARK, {TIME_TO_PARK} minutes", SIMULATED_TIME))
+
+    if not STOPPED:
+        SIMULATED_TIME += timedelta(minutes=1)
+        LOG_ENTRIES.append(CREATE_MANIFEST_LOG_ENTRY(f"Finished a Cycle. Manifest {OUTBOUND_FILE} was written to {DESCRIBE_OUTPUT_DIR(OUTPUT_DIR)}.", SIMULATED_TIME))
+    LOG_ENTRIES.append(CREATE_MANIFEST_LOG_ENTRY("Program was shut down.", SIMULATED_TIME))
+    LOG_FILENAME = LOG_FILE_NAME(START_TIME, MANIFEST_FILE)
+
+    # The manifest goes first, so a log never reports an OUTBOUND manifest that is not there
+    OUTPUTS = [] if STOPPED else [(os.path.join(OUTPUT_DIR, OUTBOUND_FILE), MANIFEST_TEXT(FINAL_GRID, GEOMETRY))]
+    OUTPUTS = SAVE_OUTPUTS(OUTPUTS + [(os.path.join(OUTPUT_DIR, LOG_FILENAME), LOG_TEXT(LOG_ENTRIES))], DEFER_WRITES)
+
+    if STOPPED:
+        STATUS = 'stopped'
+    elif SOLUTION is None:
+        STATUS = 'unsolvable'
+    else:
+        STATUS = 'cached' if CACHED else ('optimal' if IS_OPTIMAL else 'best found')
+
+    return {
+        'manifest': MANIFEST_FILE,
+        'status': STATUS,
+        'solve_time': SOLVE_TIME,
+        'nodes_expanded': STATS.NODES_EXPANDED,
+        'plan_cost': None if SOLUTION is None else PLAN_COST,
+        'moves': None if SOLUTION is None else len(SOLUTION),
+        'outbound_file': None if STOPPED else OUTBOUND_FILE,
+        'log_file': LOG_FILENAME,
+        'outputs': OUTPUTS,
+    }
+
+# Solves every manifest matching PATTERN across a pool of worker processes, reporting each ship as it finishes. The
+# workers hand their files back and a writer thread here writes them (ASYNC_WRITES=False makes every worker write its
+# own).
+def BATCH_SOLVE(PATTERN, OUTPUT_DIR=None, WORKERS=None, TIME_BUDGET=DEFAULT_TIME_BUDGET, CACHE_FILE=None, SIDECAR_DIR=None, ASYNC_WRITES=True):
+    MANIFESTS = FIND_MANIFESTS(PATTERN)
+    if OUTPUT_DIR is not None:
+        os.makedirs(OUTPUT_DIR, exist_ok=True)
+
+    RESULTS = []
+    WRITER = AsyncWriter() if ASYNC_WRITES else None
+    with ProcessPoolExecutor(max_workers=WORKERS) as EXECUTOR:
+        FUTURES = {EXECUTOR.submit(SOLVE_MANIFEST, MANIFEST_FILE, OUTPUT_DIR, TIME_BUDGET, CACHE_FILE, SIDECAR_DIR, ASYNC_WRITES): MANIFEST_FILE for MANIFEST_FILE in MANIFESTS}
+
+        # Ships are reported in completion order, so a slow manifest never holds back the others
+        for FUTURE in as_completed(FUTURES):
+            try:
+                RESULT = FUTURE.result()
+            except Exception as ERROR:
+                RESULT = {'manifest': FUTURES[FUTURE], 'status': f'error: {ERROR}', 'solve_time': None,
+                          'nodes_expanded': None, 'plan_cost': None, 'moves': None}
+
+            for PATH, TEXT in RESULT.pop('outputs', []):
+                WRITER.WRITE(PATH, TEXT)
+
+            RESULTS.append(RESULT)
+            PRINT_RESULT(RESULT)
+
+    if WRITER is not None:
+        for PATH, ERROR in WRITER.CLOSE():
+            print(f"ERROR: could not write {PATH}: {ERROR}")
+
+    return RESULTS
+
+# Prints one line of the batch report
+def PRINT_RESULT(RESULT):
+    SOLVE_TIME = '-' if RESULT['solve_time'] is None else f"{RESULT['solve_time']:.3f}s"
+    NODES = '-' if RESULT['nodes_expanded'] is None else RESULT['nodes_expanded']
+    COST = '-' if RESULT['plan_cost'] is None else f"{RESULT['plan_cost']} min"
+    print(f"{os.path.basename(RESULT['manifest']):<30} {RESULT['status']:<12} {SOLVE_TIME:>10} {NODES:>10} nodes {COST:>10}")
+    if 'error' in RESULT:
+        print(f"    {RESULT['error']}")
+
+# Command line entry point for batch runs
+def main():
+    PARSER = argparse.ArgumentParser(description="Balance many ship manifests at once.")
+    PARSER.add_argument('manifests', help="directory or glob pattern of manifest files, e.g. 'ShipCase*.txt'")
+    PARSER.add_argument('--output-dir', default=None, help="where OUTBOUND manifests and logs are written (default: desktop)")
+    PARSER.add_argument('--workers', type=int, default=None, help="worker processes (default: one per core)")
+    PARSER.add_argument('--time-budget', type=float, default=DEFAULT_TIME_BUDGET, help="seconds of search per ship")
+    PARSER.add_argument('--cache', default=None, help="solution cache file to reuse plans of ships solved before")
+    PARSER.add_argument('--sidecars', action='store_true', help="keep a binary .grid sidecar of each manifest to skip re-parsing it")
+    PARSER.add_argument('--cache-dir', default=None, help="where sidecars are kept, implies --sidecars (default: $KEOGHS_CACHE_DIR or ~/.cache/keoghs/sidecars)")
+    PARSER.add_argument('--sync-writes', action='store_true', help="let each worker write its own files instead of a background writer")
+    ARGS = PARSER.parse_args()
+
+    SIDECAR_DIR = ARGS.cache_dir or (DEFAULT_SIDECAR_DIR() if ARGS.sidecars else None)
+
+    BATCH_START = time.perf_counter()
+    RESULTS = BATCH_SOLVE(ARGS.manifests, ARGS.output_dir, ARGS.workers, ARGS.time_budget, ARGS.cache, SIDECAR_DIR, not ARGS.sync_writes)
+    print(f"\n{len(RESULTS)} manifests solved in {time.perf_counter() - BATCH_START:.2f}s")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,135 @@
+import argparse
+import os
+import random
+import tempfile
+import time
+from HELPER_FUNCTIONS import PARSE_MANIFEST_FILE, MANIFEST_GEOMETRY
+from MANIFEST_CACHE import LOAD_SIZED_MANIFEST, SIDECAR_FILE
+from SHIP_STATE import ShipGeometry
+
+# The manifest parser as it was before PARSE_MANIFEST (readlines, then several split/strip rounds per line, skipping
+# whatever it cannot read and back-filling missing 8x12 slots), kept only as the benchmark baseline
+def LEGACY_PARSE_MANIFEST_FILE(FILENAME):
+    GRID = {}
+    CONTAINER_COUNT = 0
+
+    with open(FILENAME, 'r') as FHANDLE:
+        LINES = FHANDLE.readlines()
+
+    for LINE in LINES:
+        LINE = LINE.strip()
+        if not LINE or not LINE.startswith('['):
+            continue
+
+        PARTS_OF_FILE = LINE.split(',', 1)
+        if len(PARTS_OF_FILE) < 2:
+            continue
+
+        ROW_PART = PARTS_OF_FILE[0].strip('[')
+        REST = PARTS_OF_FILE[1]
+
+        COL_PART = REST.split(']')[0]
+        REMAINDER = REST.split(']', 1)[1].strip().lstrip(',').strip()
+
+        try:
+            ROW = int(ROW_PART)
+            COL = int(COL_PART)
+        except ValueError:
+            continue
+
+        if REMAINDER.startswith('{') and '}' in REMAINDER:
+            WEIGHT_STR = REMAINDER.split('{')[1].split('}')[0]
+            DESC_PART = REMAINDER.split('}', 1)[1].strip()
+
+            if DESC_PART.startswith(','):
+                DESC_PART = DESC_PART[1:].strip()
+
+            try:
+                WEIGHT = int(WEIGHT_STR)
+            except ValueError:
+                WEIGHT = 0
+
+            if DESC_PART == 'NAN':
+                GRID[(ROW, COL)] = {'weight': 0, 'type': 'NAN', 'description': 'NAN'}
+            elif DESC_PART == 'UNUSED':
+                GRID[(ROW, COL)] = {'weight': 0, 'type': 'UNUSED', 'description': 'UNUSED'}
+            else:
+                GRID[(ROW, COL)] = {'weight': WEIGHT, 'type': 'CONTAINER', 'description': DESC_PART}
+                if WEIGHT > 0:
+                    CONTAINER_COUNT += 1
+
+    for ROW in range(1, 9):
+        for COL in range(1, 13):
+            if (ROW, COL) not in GRID:
+                GRID[(ROW, COL)] = {'weight': 0, 'type': 'UNUSED', 'description': 'UNUSED'}
+
+    return GRID, CONTAINER_COUNT
+
+# Writes a synthetic manifest of BAYS standard 8x12 bays side by side (an 8 x 12*BAYS grid) to PATH: NAN slots along
+# the bottom corners of every bay, then columns stacked with random containers; returns the geometry to read it as
+def WRITE_SYNTHETIC_MANIFEST(PATH, BAYS, SEED=0):
+    RANDOM = random.Random(SEED)
+    COLS = 12 * BAYS
+    HEIGHTS = [RANDOM.randint(0, 6) for _ in range(COLS)]
+
+    with open(PATH, 'w') as FILE:
+        for ROW in range(1, 9):
+            for COL in range(1, COLS + 1):
+                if ROW == 1 and (COL - 1) % 12 in (0, 11):
+                    WEIGHT, DESCRIPTION = 0, 'NAN'
+                elif ROW <= HEIGHTS[COL - 1]:
+                    WEIGHT, DESCRIPTION = RANDOM.randint(1, 99999), f"Container {RANDOM.randint(1, 10 ** 6)} of bay {(COL - 1) // 12 + 1}"
+                else:
+                    WEIGHT, DESCRIPTION = 0, 'UNUSED'
+                FILE.write(f"[{ROW:02d},{COL:02d}], {{{WEIGHT:05d}}}, {DESCRIPTION}\n")
+
+    return ShipGeometry(8, COLS)
+
+# Loads a manifest the way the solvers do without a sidecar: a scan for the bay's size, then the streaming parser
+def LOAD_STREAMING(PATH):
+    return PARSE_MANIFEST_FILE(PATH, MANIFEST_GEOMETRY(PATH))
+
+# Times PARSER on PATH, best of REPEATS runs, in seconds
+def TIME_PARSER(PARSER, PATH, REPEATS):
+    BEST = float('inf')
+
+    for _ in range(REPEATS):
+        START = time.perf_counter()
+        PARSER(PATH)
+        BEST = min(BEST, time.perf_counter() - START)
+
+    return BEST
+
+# Benchmarks the streaming parser against the legacy one, and loading through a binary sidecar, on synthetic manifests
+# of every size in BAY_COUNTS
+def BENCHMARK(BAY_COUNTS, REPEATS=5):
+    with tempfile.TemporaryDirectory() as DIRECTORY:
+        print(f"{'bays':>6} {'lines':>8} {'legacy':>12} {'streaming':>12} {'speedup':>8} {'sidecar':>12} {'speedup':>8}")
+
+        for BAYS in BAY_COUNTS:
+            PATH = os.path.join(DIRECTORY, f"Synthetic{BAYS}.txt")
+            GEOMETRY = WRITE_SYNTHETIC_MANIFEST(PATH, BAYS)
+
+            LEGACY_TIME    = TIME_PARSER(LEGACY_PARSE_MANIFEST_FILE, PATH, REPEATS)
+            STREAMING_TIME = TIME_PARSER(LOAD_STREAMING, PATH, REPEATS)
+            LINES          = GEOMETRY.SLOTS
+
+            # The first load writes the sidecar, every timed one after it reads it (the bay's size included)
+            SIDECAR_PATH = SIDECAR_FILE(PATH, DIRECTORY)
+            LOAD_SIZED_MANIFEST(PATH, SIDECAR_PATH=SIDECAR_PATH)
+            SIDECAR_TIME = TIME_PARSER(lambda PATH: LOAD_SIZED_MANIFEST(PATH, SIDECAR_PATH=SIDECAR_PATH), PATH, REPEATS)
+
+            print(f"{BAYS:>6} {LINES:>8} {LINES / LEGACY_TIME:>8.0f} l/s {LINES / STREAMING_TIME:>8.0f} l/s {LEGACY_TIME / STREAMING_TIME:>7.2f}x "
+                  f"{LINES / SIDECAR_TIME:>8.0f} l/s {LEGACY_TIME / SIDECAR_TIME:>7.2f}x")
+
+# Command line entry point
+def main():
+    PARSER = argparse.ArgumentParser(description="Benchmark manifest parsing throughput on synthetic multi-bay manifests.")
+    PARSER.add_argument('--bays', type=int, nargs='+', default=[1, 10, 100, 1000], help="bays per synthetic manifest")
+    PARSER.add_argument('--repeats', type=int, default=5, help="runs per parser and size (the best one counts)")
+    ARGS = PARSER.parse_args()
+
+    BENCHMARK(ARGS.bays, ARGS.repeats)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,190 @@
+import argparse
+import json
+import os
+import sys
+import time
+import tracemalloc
+from CONTAINER_SOLVER import BALANCE_SHIP, CALCULATE_BALANCE_COST
+from MANIFEST_GENERATOR import GENERATE_MANIFEST
+from SEARCH_STATS import SearchStats
+from SHIP_STATE import DEFAULT_GEOMETRY, ShipGeometry
+
+# Generator settings of every size tier, from a lightly loaded bay to production density and a wide three-bay ship;
+# every tier is lopsided enough that the solver has real work to do
+SIZE_TIERS = {
+    'small':      {'CONTAINERS': 8,  'WEIGHTS': 'uniform', 'NAN_LAYOUT': 'corners', 'PORT_SHARE': 0.75},
+    'medium':     {'CONTAINERS': 16, 'WEIGHTS': 'normal',  'NAN_LAYOUT': 'corners', 'PORT_SHARE': 0.7},
+    'large':      {'CONTAINERS': 28, 'WEIGHTS': 'heavy',   'NAN_LAYOUT': 'hull',    'PORT_SHARE': 0.7, 'MAX_DEPTH': 5},
+    'production': {'CONTAINERS': 48, 'WEIGHTS': 'bimodal', 'NAN_LAYOUT': 'random',  'PORT_SHARE': 0.65},
+    'wide':       {'CONTAINERS': 36, 'WEIGHTS': 'heavy',   'NAN_LAYOUT': 'hull',    'PORT_SHARE': 0.7, 'GEOMETRY': ShipGeometry(8, 36)},
+}
+
+# Search engines of BALANCE_SHIP the suite runs on every manifest
+ENGINES = ('ASTAR', 'BEAM', 'TWO_PHASE')
+
+# Baseline the runs are compared with unless told otherwise
+DEFAULT_BASELINE_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'SOLVER_BASELINE.json')
+
+# Slowdown (or growth in nodes or memory) of a tier and engine over the baseline that counts as a regression
+DEFAULT_TOLERANCE = 0.25
+
+# Tiers and engines that take less time than this in total (seconds) are too quick for their timings to be compared
+MIN_TIMED_SECONDS = 0.25
+
+# Runs one engine on a fresh copy of GRID, a bay of GEOMETRY: returns the plan, the nodes expanded and the wall time,
+# plus the peak memory allocated by the search when TRACE_MEMORY is on (tracing slows the search down, so those runs
+# are not timed)
+def RUN_SOLVER(GRID, ENGINE, NODE_BUDGET, TIME_BUDGET, TRACE_MEMORY=False, GEOMETRY=DEFAULT_GEOMETRY):
+    GRID = {POSITION: dict(CELL) for POSITION, CELL in GRID.items()}
+    STATS = SearchStats()
+
+    if TRACE_MEMORY:
+        tracemalloc.start()
+    try:
+        START = time.perf_counter()
+        SOLUTION, _ = BALANCE_SHIP(GRID, GEOMETRY, ENGINE=ENGINE, NODE_BUDGET=NODE_BUDGET, TIME_BUDGET=TIME_BUDGET, STATS=STATS)
+        WALL_TIME = time.perf_counter() - START
+        PEAK_MEMORY = tracemalloc.get_traced_memory()[1] if TRACE_MEMORY else None
+    finally:
+        if TRACE_MEMORY:
+            tracemalloc.stop()
+
+    return SOLUTION, STATS.NODES_EXPANDED, WALL_TIME, PEAK_MEMORY
+
+# Runs every engine on SEEDS generated manifests of every tier in TIERS and returns the results keyed
+# "tier/seed/engine". The traced run goes first, so the timed run after it finds the cost tables already built.
+def RUN_SUITE(TIERS, SEEDS, ENGINE_NAMES=ENGINES, NODE_BUDGET=2000, TIME_BUDGET=60, TRACE_MEMORY=True):
+    RESULTS = {}
+    print(f"{'case':<24} {'time':>9} {'nodes':>7} {'memory':>10} {'cost':>6} {'moves':>6}")
+
+    for TIER in TIERS:
+        for SEED in range(SEEDS):
+            GEOMETRY = SIZE_TIERS[TIER].get('GEOMETRY', DEFAULT_GEOMETRY)
+            GRID = GENERATE_MANIFEST(SEED=SEED, **SIZE_TIERS[TIER])
+
+            for ENGINE in ENGINE_NAMES:
+                PEAK_MEMORY = RUN_SOLVER(GRID, ENGINE, NODE_BUDGET, TIME_BUDGET, True, GEOMETRY)[3] if TRACE_MEMORY else None
+                SOLUTION, NODES, WALL_TIME, _ = RUN_SOLVER(GRID, ENGINE, NODE_BUDGET, TIME_BUDGET, False, GEOMETRY)
+
+                KEY = f"{TIER}/{SEED}/{ENGINE}"
+                RESULTS[KEY] = {
+                    'tier': TIER,
+                    'engine': ENGINE,
+                    'wall_time': WALL_TIME,
+                    'nodes_expanded': NODES,
+                    'peak_memory': PEAK_MEMORY,
+                    'plan_cost': None if SOLUTION is None else CALCULATE_BALANCE_COST(SOLUTION, GEOMETRY, GRID=GRID),
+                    'moves': None if SOLUTION is None else len(SOLUTION),
+                }
+                PRINT_RESULT(KEY, RESULTS[KEY])
+
+    return RESULTS
+
+# Prints one line of the results table
+def PRINT_RESULT(KEY, RESULT):
+    MEMORY = '-' if RESULT['peak_memory'] is None else f"{RESULT['peak_memory'] / 1024:.0f} KiB"
+    COST   = '-' if RESULT['plan_cost'] is None else RESULT['plan_cost']
+    MOVES  = '-' if RESULT['moves'] is None else RESULT['moves']
+    print(f"{KEY:<24} {RESULT['wall_time']:>8.3f}s {RESULT['nodes_expanded']:>7} {MEMORY:>10} {COST:>6} {MOVES:>6}")
+
+# Adds up the results of every tier and engine: total wall time, nodes and plan cost, the largest peak memory and the
+# number of manifests left without a plan (cases missing from ONLY are skipped, so two runs can be compared on the cases
+# they share)
+def SUMMARIZE(RESULTS, ONLY=None):
+    SUMMARY = {}
+
+    for KEY, RESULT in RESULTS.items():
+        if ONLY is not None and KEY not in ONLY:
+            continue
+
+        TOTALS = SUMMARY.setdefault((RESULT['tier'], RESULT['engine']), {'wall_time': 0.0, 'nodes_expanded': 0, 'peak_memory': None, 'plan_cost': 0, 'unsolved': 0})
+        TOTALS['wall_time'] += RESULT['wall_time']
+        TOTALS['nodes_expanded'] += RESULT['nodes_expanded']
+        if RESULT['peak_memory'] is not None:
+            TOTALS['peak_memory'] = max(TOTALS['peak_memory'] or 0, RESULT['peak_memory'])
+        if RESULT['plan_cost'] is None:
+            TOTALS['unsolved'] += 1
+        else:
+            TOTALS['plan_cost'] += RESULT['plan_cost']
+
+    return SUMMARY
+
+# Compares RESULTS with a stored baseline tier by tier and engine by engine, printing the ratios; returns the
+# regressions found: any costlier plan or manifest left unsolved, or time, nodes or memory grown by more than TOLERANCE
+# (times only where they are long enough to measure, see MIN_TIMED_SECONDS)
+def COMPARE_WITH_BASELINE(RESULTS, SETTINGS, BASELINE, TOLERANCE=DEFAULT_TOLERANCE):
+    if BASELINE['settings'] != SETTINGS:
+        print(f"\nWARNING: the baseline was run with {BASELINE['settings']}, this run with {SETTINGS}")
+
+    SHARED = set(RESULTS) & set(BASELINE['results'])
+    CURRENT = SUMMARIZE(RESULTS, SHARED)
+    PREVIOUS = SUMMARIZE(BASELINE['results'], SHARED)
+    REGRESSIONS = []
+
+    # Plan costs are compared case by case: a cheaper plan on one ship does not make up for a costlier one on another
+    for KEY in sorted(SHARED):
+        NEW_COST, OLD_COST = RESULTS[KEY]['plan_cost'], BASELINE['results'][KEY]['plan_cost']
+        if OLD_COST is not None and (NEW_COST is None or NEW_COST > OLD_COST):
+            REGRESSIONS.append(f"{KEY}: plan cost {OLD_COST} -> {'no plan' if NEW_COST is None else NEW_COST}")
+
+    print(f"\n{'tier/engine':<24} {'time':>8} {'nodes':>8} {'memory':>8} {'cost':>12}")
+    for (TIER, ENGINE), NEW in sorted(CURRENT.items()):
+        OLD = PREVIOUS[TIER, ENGINE]
+        RATIOS = {}
+        for MEASURE in ('wall_time', 'nodes_expanded', 'peak_memory'):
+            if MEASURE == 'wall_time' and max(NEW[MEASURE], OLD[MEASURE]) < MIN_TIMED_SECONDS:
+                continue
+            if NEW[MEASURE] is not None and OLD[MEASURE]:
+                RATIOS[MEASURE] = NEW[MEASURE] / OLD[MEASURE]
+                if RATIOS[MEASURE] > 1 + TOLERANCE:
+                    REGRESSIONS.append(f"{TIER}/{ENGINE}: {MEASURE} x{RATIOS[MEASURE]:.2f}")
+
+        COLUMNS = [f"x{RATIOS[MEASURE]:.2f}" if MEASURE in RATIOS else '-' for MEASURE in ('wall_time', 'nodes_expanded', 'peak_memory')]
+        UNSOLVED = f" ({NEW['unsolved']} unsolved)" if NEW['unsolved'] else ''
+        print(f"{TIER + '/' + ENGINE:<24} {COLUMNS[0]:>8} {COLUMNS[1]:>8} {COLUMNS[2]:>8} {OLD['plan_cost']:>5} -> {NEW['plan_cost']}{UNSOLVED}")
+
+    return REGRESSIONS
+
+# Command line entry point: runs the suite, then compares it with the baseline or stores it as the new one (exits with
+# status 1 when the comparison finds a regression)
+def main():
+    PARSER = argparse.ArgumentParser(description="Benchmark BALANCE_SHIP on seeded synthetic manifests and compare with a stored baseline.")
+    PARSER.add_argument('--tiers', nargs='+', choices=list(SIZE_TIERS), default=list(SIZE_TIERS), help="size tiers to run")
+    PARSER.add_argument('--engines', nargs='+', choices=ENGINES, default=list(ENGINES), help="search engines to run")
+    PARSER.add_argument('--seeds', type=int, default=3, help="generated manifests per tier")
+    PARSER.add_argument('--node-budget', type=int, default=2000, help="nodes each search may expand")
+    PARSER.add_argument('--time-budget', type=float, default=60, help="seconds each search may take")
+    PARSER.add_argument('--no-memory', action='store_true', help="skip the traced runs that measure peak memory")
+    PARSER.add_argument('--baseline', default=DEFAULT_BASELINE_FILE, help="baseline file to compare with or update")
+    PARSER.add_argument('--update-baseline', action='store_true', help="store this run as the baseline instead of comparing")
+    PARSER.add_argument('--tolerance', type=float, default=DEFAULT_TOLERANCE, help="growth in time, nodes or memory allowed before it counts as a regression")
+    ARGS = PARSER.parse_args()
+
+    SETTINGS = {'seeds': ARGS.seeds, 'node_budget': ARGS.node_budget, 'time_budget': ARGS.time_budget}
+    RESULTS = RUN_SUITE(ARGS.tiers, ARGS.seeds, ARGS.engines, ARGS.node_budget, ARGS.time_budget, not ARGS.no_memory)
+
+    if ARGS.update_baseline:
+        with open(ARGS.baseline, 'w') as FILE:
+            json.dump({'settings': SETTINGS, 'results': RESULTS}, FILE, indent=1, sort_keys=True)
+            FILE.write('\n')
+        print(f"\nBaseline written to {ARGS.baseline}")
+        return
+
+    if not os.path.exists(ARGS.baseline):
+        print(f"\nNo baseline at {ARGS.baseline}; run with --update-baseline to store one")
+        return
+
+    with open(ARGS.baseline) as FILE:
+        BASELINE = json.load(FILE)
+
+    REGRESSIONS = COMPARE_WITH_BASELINE(RESULTS, SETTINGS, BASELINE, ARGS.tolerance)
+    if REGRESSIONS:
+        print(f"\n{len(REGRESSIONS)} regression(s):")
+        for REGRESSION in REGRESSIONS:
+            print(f"  {REGRESSION}")
+        sys.exit(1)
+
+    print("\nNo regressions against the baseline")
+
+if __name__ == "__main__":
+    main()
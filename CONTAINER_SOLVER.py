@@ -1,15 +1,39 @@
-from collections import deque
+import bisect
+import copy
+import heapq
+import multiprocessing
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from COST_MODEL import BUILD_CLEARANCE_TABLE, CLEARANCE_BETWEEN, GET_COST_MODEL, HEIGHT_AWARE_CRANE
+from MOVE_SCORER import VECTOR_MIN_PAIRS, VECTORIZED_MOVES, VectorMoveScorer
+from SEARCH_STATS import PHASE_TIMER, SearchStats
+from SHIP_STATE import DEFAULT_BUFFER, DEFAULT_GEOMETRY, IS_BUFFER_POSITION, ShipLayout
+from SOLUTION_CACHE import MANIFEST_KEY
+
+# Names the moves the search may make, so cached plans found under a different move set are not reused
+MOVE_MODEL = 'cross-divider+unstack'
+
+# Describes the moves, the buffer, the crane costs and any off-centre divider a plan is searched with, for the solution
+# cache key (the cache key covers the slots and park position already)
+def SEARCH_SETTINGS(BUFFER, HEIGHT_AWARE=HEIGHT_AWARE_CRANE, GEOMETRY=DEFAULT_GEOMETRY):
+    SETTINGS = MOVE_MODEL if BUFFER is None else f"{MOVE_MODEL}|{BUFFER.SETTINGS()}"
+    if HEIGHT_AWARE:
+        SETTINGS = f"{SETTINGS}|height-aware"
+    if GEOMETRY.DIVIDER != GEOMETRY.COLS // 2:
+        SETTINGS = f"{SETTINGS}|divider {GEOMETRY.DIVIDER}"
+    return SETTINGS
 
 # Calculates the overall balance of the ship at a particular state
-def CALCULATE_BALANCE(GRID):
+def CALCULATE_BALANCE(GRID, GEOMETRY=DEFAULT_GEOMETRY):
     PORT_WEIGHT = 0
     STARBOARD_WEIGHT = 0
     
-    for ROW in range(1, 9):
-        for COL in range(1, 13):
+    for ROW in range(1, GEOMETRY.ROWS + 1):
+        for COL in range(1, GEOMETRY.COLS + 1):
             CELL = GRID.get((ROW, COL))
             if CELL and CELL['weight'] > 0:
-                if COL <= 6:
+                if GEOMETRY.IS_PORT(COL):
                     PORT_WEIGHT += CELL['weight']
                 else:
                     STARBOARD_WEIGHT += CELL['weight']
@@ -36,18 +60,18 @@ def VALID_POSITION(GRID, ROW, COL):
     return True
 
 # Identifies all containers that are free or accessible
-def GET_CONTAINERS(GRID):
+def GET_CONTAINERS(GRID, GEOMETRY=DEFAULT_GEOMETRY):
     ACCESSIBLE_CONTAINERS = []
     
-    for ROW in range(1, 9):
-        for COL in range(1, 13):
+    for ROW in range(1, GEOMETRY.ROWS + 1):
+        for COL in range(1, GEOMETRY.COLS + 1):
             GRID_CELL = GRID.get((ROW, COL))
             if not GRID_CELL or GRID_CELL['weight'] == 0:
                 continue
             
             IS_ACCESSIBLE = True
             
-            for CHECK_ROW in range(ROW + 1, 9):
+            for CHECK_ROW in range(ROW + 1, GEOMETRY.ROWS + 1):
                 ABOVE_CELL = GRID.get((CHECK_ROW, COL))
                 if ABOVE_CELL and ABOVE_CELL['weight'] > 0:
                     IS_ACCESSIBLE = False
@@ -59,23 +83,24 @@ def GET_CONTAINERS(GRID):
     return ACCESSIBLE_CONTAINERS
 
 # Identifies all valid end positions or destinations for containers
-def GET_VALID_DESTINATIONS(GRID):
+def GET_VALID_DESTINATIONS(GRID, GEOMETRY=DEFAULT_GEOMETRY):
     VALID_DESTINATIONS = []
     
-    for ROW in range(1, 9):
-        for COL in range(1, 13):
+    for ROW in range(1, GEOMETRY.ROWS + 1):
+        for COL in range(1, GEOMETRY.COLS + 1):
             if VALID_POSITION(GRID, ROW, COL):
                 VALID_DESTINATIONS.append((ROW, COL))
     
     return VALID_DESTINATIONS
 
-# Moves a container from one position to another
+# Moves a container from one position to another (buffer slots only appear in the grid while a container is staged there)
 def MOVE_CONTAINER(GRID, START_POSITION, END_POSITION):
     NEW_GRID = {}
     
     for POSITION in GRID:
         if POSITION == START_POSITION:
-            NEW_GRID[POSITION] = {'weight': 0, 'type': 'UNUSED', 'description': 'UNUSED'}
+            if not IS_BUFFER_POSITION(POSITION):
+                NEW_GRID[POSITION] = {'weight': 0, 'type': 'UNUSED', 'description': 'UNUSED'}
         elif POSITION == END_POSITION:
             NEW_GRID[POSITION] = {
                 'weight': GRID[START_POSITION]['weight'],
@@ -89,48 +114,882 @@ def MOVE_CONTAINER(GRID, START_POSITION, END_POSITION):
                 'description': GRID[POSITION]['description']
             }
     
+    if END_POSITION not in GRID:
+        NEW_GRID[END_POSITION] = {
+            'weight': GRID[START_POSITION]['weight'],
+            'type': GRID[START_POSITION]['type'],
+            'description': GRID[START_POSITION]['description']
+        }
+    
     return NEW_GRID
 
-# Calculates the manhattan distance between positions
-def CALCULATE_MANHATTAN_DISTANCE(POSITION_1, POSITION_2):
-    return abs(POSITION_1[0] - POSITION_2[0]) + abs(POSITION_1[1] - POSITION_2[1])
+# Lists the cells MOVE_CONTAINER would change as (position, cell before, cell after) with None for a slot missing from
+# the grid, so a move can be replayed (or undone) on one grid without copying it
+def MOVE_CHANGES(GRID, START_POSITION, END_POSITION):
+    MOVING = GRID[START_POSITION]
+    START_AFTER = None if IS_BUFFER_POSITION(START_POSITION) else {'weight': 0, 'type': 'UNUSED', 'description': 'UNUSED'}
+    END_BEFORE = GRID.get(END_POSITION)
+    END_TYPE = MOVING['type'] if END_BEFORE is None else END_BEFORE['type']
+    
+    return ((START_POSITION, MOVING, START_AFTER),
+            (END_POSITION, END_BEFORE, {'weight': MOVING['weight'], 'type': END_TYPE, 'description': MOVING['description']}))
 
 # Calculates the cost of moving a particular container from a position to another
-def CALCULATE_COST_OF_MOVE(START_POSITION, END_POSITION, PARK_POSITION=(1, 8)):
-    COST_FROM_PARK_TO_SOURCE = CALCULATE_MANHATTAN_DISTANCE(PARK_POSITION, START_POSITION)
-    COST_FROM_SOURCE_TO_DESTINATION = CALCULATE_MANHATTAN_DISTANCE(START_POSITION, END_POSITION)
-    COST_FROM_DEST_TO_PARK_POSITION = CALCULATE_MANHATTAN_DISTANCE(END_POSITION, PARK_POSITION)
+def CALCULATE_COST_OF_MOVE(START_POSITION, END_POSITION, GEOMETRY=DEFAULT_GEOMETRY, BUFFER=DEFAULT_BUFFER):
+    COST_MODEL = GET_COST_MODEL(GEOMETRY, BUFFER)
+    return COST_MODEL.PARK_TIME(START_POSITION) + COST_MODEL.TRAVEL_TIME(START_POSITION, END_POSITION) + COST_MODEL.PARK_TIME(END_POSITION)
+
+# Calculates the cost of balancing the ship based on the number of container moves (pass the GRID the moves start
+# from to charge for lifting over the stacks in between)
+def CALCULATE_BALANCE_COST(CONTAINER_MOVES, GEOMETRY=DEFAULT_GEOMETRY, BUFFER=DEFAULT_BUFFER, GRID=None):
+    return GET_COST_MODEL(GEOMETRY, BUFFER).PLAN_COST(CONTAINER_MOVES, GRID)
+
+# Replays a list of container moves on a grid
+def APPLY_MOVES(GRID, CONTAINER_MOVES):
+    for START_POSITION, END_POSITION in CONTAINER_MOVES:
+        GRID = MOVE_CONTAINER(GRID, START_POSITION, END_POSITION)
+    
+    return GRID
+
+# Builds, for every slot, the cheapest crane time to carry a container from it across the divider (or, from the
+# buffer, back onto the ship) and return to park
+def BUILD_CROSSING_TABLE(LAYOUT, COST_MODEL):
+    CROSSING_COSTS = []
+    TABLE = COST_MODEL.TABLE
+    PARK_INDEX = COST_MODEL.PARK_INDEX
+    
+    for START_INDEX, START_IS_PORT in enumerate(LAYOUT.IS_PORT):
+        CHEAPEST_CROSSING = float('inf')
+        
+        for END_INDEX in range(LAYOUT.SHIP_SLOTS):
+            if LAYOUT.NAN_MASK[END_INDEX] or START_IS_PORT == LAYOUT.IS_PORT[END_INDEX]:
+                continue
+            
+            CROSSING = TABLE[START_INDEX][END_INDEX] + TABLE[END_INDEX][PARK_INDEX]
+            CHEAPEST_CROSSING = min(CHEAPEST_CROSSING, CROSSING)
+        
+        CROSSING_COSTS.append(CHEAPEST_CROSSING)
+    
+    return CROSSING_COSTS
+
+# Builds, for the crane at CRANE_POSITION, the cheapest time to start carrying a container across the divider from
+# every ship column at every height: the crane's trip to the container, its crossing (see BUILD_CROSSING_TABLE) and a
+# column away and back for every container stacked on top of it (inf for a column with no container to take)
+def BUILD_FIRST_CROSSING_TABLE(LAYOUT, COST_MODEL, CROSSING_COSTS, CRANE_POSITION):
+    ROWS = LAYOUT.ROWS
+    COLS = LAYOUT.COLS
+    CRANE_DISTANCES = COST_MODEL.TRAVEL_FROM[CRANE_POSITION]
+    FIRST_CROSSINGS = []
+    
+    for COL in range(COLS):
+        BY_HEIGHT = [float('inf')]
+        for HEIGHT in range(1, ROWS + 1):
+            BY_HEIGHT.append(min((CRANE_DISTANCES[INDEX] + CROSSING_COSTS[INDEX] + 2 * (HEIGHT - 1 - INDEX // COLS)
+                                  for INDEX in range(COL, HEIGHT * COLS, COLS) if not LAYOUT.NAN_MASK[INDEX]),
+                                 default=float('inf')))
+        FIRST_CROSSINGS.append(tuple(BY_HEIGHT))
+    
+    return tuple(FIRST_CROSSINGS)
+
+# Runs a subset-sum DP over the container weights and returns every port side total (ascending) that would leave the
+# ship within the legal threshold; an empty list proves that no sequence of moves can balance the ship
+def BALANCED_PORT_TOTALS(WEIGHTS, BALANCE_THRESHOLD):
+    TOTAL_WEIGHT = sum(WEIGHTS)
+    
+    # Bit P of REACHABLE is set when some subset of the containers weighs exactly P
+    REACHABLE = 1
+    for WEIGHT in WEIGHTS:
+        if WEIGHT > 0:
+            REACHABLE |= REACHABLE << WEIGHT
+    
+    # Only totals within half the threshold of an even split can be legal, so just that window of bits is read
+    LOWEST = max(0, int((TOTAL_WEIGHT - BALANCE_THRESHOLD) // 2))
+    HIGHEST = min(TOTAL_WEIGHT, int((TOTAL_WEIGHT + BALANCE_THRESHOLD) // 2) + 1)
+    WINDOW = bin(REACHABLE >> LOWEST)[:1:-1][:HIGHEST - LOWEST + 1]
+    
+    TARGET_PORT_TOTALS = []
+    for OFFSET, BIT in enumerate(WINDOW):
+        PORT_TOTAL = LOWEST + OFFSET
+        IMBALANCE = abs(2 * PORT_TOTAL - TOTAL_WEIGHT)
+        if BIT == '1' and (IMBALANCE == 0 or IMBALANCE < BALANCE_THRESHOLD):
+            TARGET_PORT_TOTALS.append(PORT_TOTAL)
+    
+    return TARGET_PORT_TOTALS
+
+# Estimates a lower bound on the crane time still needed to balance the ship (admissible A* heuristic); FIRST_CROSSINGS
+# caches BUILD_FIRST_CROSSING_TABLE per crane position and fills up as the search goes
+def ESTIMATE_REMAINING_COST(STATE, CRANE_POSITION, IMBALANCE, BALANCE_THRESHOLD, TARGET_PORT_TOTALS, CROSSING_COSTS, COST_MODEL, FIRST_CROSSINGS):
+    CRANE_DISTANCES = COST_MODEL.TRAVEL_FROM[CRANE_POSITION]
+    
+    # Staged containers all have to come back aboard before the crane parks, which takes at least one return trip
+    if STATE.BUFFERED_WEIGHT() > 0:
+        return min(CRANE_DISTANCES[INDEX] + CROSSING_COSTS[INDEX]
+                   for INDEX in STATE.LAYOUT.BUFFER_SLOTS if STATE.WEIGHTS[INDEX] > 0)
+    
+    if IMBALANCE == 0 or IMBALANCE < BALANCE_THRESHOLD:
+        return CRANE_DISTANCES[COST_MODEL.PARK_INDEX]
+    
+    HEAVY_SIDE_IS_PORT = STATE.PORT_WEIGHT > STATE.STARBOARD_WEIGHT
+    
+    # The heavy side has to shed at least the distance from its total to the nearest reachable legal split
+    NEAREST = bisect.bisect_left(TARGET_PORT_TOTALS, STATE.PORT_WEIGHT)
+    if HEAVY_SIDE_IS_PORT:
+        if NEAREST == 0:
+            return float('inf')
+        REQUIRED_TRANSFER = STATE.PORT_WEIGHT - TARGET_PORT_TOTALS[NEAREST - 1]
+    else:
+        if NEAREST == len(TARGET_PORT_TOTALS):
+            return float('inf')
+        REQUIRED_TRANSFER = TARGET_PORT_TOTALS[NEAREST] - STATE.PORT_WEIGHT
+    
+    # The heaviest containers of the heavy side, which the state keeps sorted, give the fewest crossings that can do it
+    TRANSFERRED = 0
+    MINIMUM_MOVES = 0
+    for WEIGHT in reversed(STATE.SIDE_WEIGHTS[0 if HEAVY_SIDE_IS_PORT else 1]):
+        TRANSFERRED += WEIGHT
+        MINIMUM_MOVES += 1
+        if TRANSFERRED >= REQUIRED_TRANSFER:
+            break
+    else:
+        return float('inf')
+    
+    # Whatever sits on top of the first container to cross must be set down within its side (or in the buffer) first,
+    # which takes the crane at least one column away and back per container; the cheapest start in every column at
+    # every height is worked out once per crane position
+    COLUMN_CROSSINGS = FIRST_CROSSINGS.get(CRANE_POSITION)
+    if COLUMN_CROSSINGS is None:
+        COLUMN_CROSSINGS = FIRST_CROSSINGS[CRANE_POSITION] = BUILD_FIRST_CROSSING_TABLE(STATE.LAYOUT, COST_MODEL, CROSSING_COSTS, CRANE_POSITION)
+    
+    IS_PORT = STATE.LAYOUT.IS_PORT
+    FIRST_CROSSING = min(COLUMN_CROSSINGS[COL][HEIGHT] for COL, HEIGHT in enumerate(STATE.HEIGHTS) if IS_PORT[COL] == HEAVY_SIDE_IS_PORT)
+    
+    # Each further crossing forces the crane back over the divider and across again, at least two extra columns (the
+    # buffer lies off the port side, so detours through it cross the divider just the same)
+    return FIRST_CROSSING + 2 * (MINIMUM_MOVES - 1)
+
+# Reasons a search can stop for before it has finished: without a plan by then, nothing says the ship cannot be balanced
+BUDGET_STOPS = ('node budget', 'memory budget', 'time budget', 'cancelled')
+
+# Limits on how much work a search may do before it settles for the best plan found so far; engines sharing one
+# budget (like the anytime beam and A* passes) also share its count of expanded nodes and its SearchStats, if any
+class SearchBudget:
+    # NODE_BUDGET counts expanded nodes, MEMORY_BUDGET is in bytes and TIME_BUDGET in seconds (None means unlimited);
+    # CANCEL is an optional threading.Event another thread sets to stop the search early
+    def __init__(self, NODE_BUDGET=None, MEMORY_BUDGET=None, TIME_BUDGET=None, STATS=None, CANCEL=None):
+        self.NODE_BUDGET    = NODE_BUDGET
+        self.MEMORY_BUDGET  = MEMORY_BUDGET
+        self.DEADLINE       = None if TIME_BUDGET is None else time.monotonic() + TIME_BUDGET
+        self.STATS          = STATS
+        self.CANCEL         = CANCEL
+        self.NODES_EXPANDED = 0
+        self.EXHAUSTED_BY   = None
+    
+    # Checks whether any budget has run out given the nodes currently held in memory (and remembers which one did)
+    def EXHAUSTED(self, NODES_STORED, NODE_BYTES):
+        if self.NODE_BUDGET is not None and self.NODES_EXPANDED >= self.NODE_BUDGET:
+            self.EXHAUSTED_BY = 'node budget'
+        elif self.MEMORY_BUDGET is not None and NODES_STORED * NODE_BYTES >= self.MEMORY_BUDGET:
+            self.EXHAUSTED_BY = 'memory budget'
+        elif self.DEADLINE is not None and time.monotonic() >= self.DEADLINE:
+            self.EXHAUSTED_BY = 'time budget'
+        elif self.CANCEL is not None and self.CANCEL.is_set():
+            self.EXHAUSTED_BY = 'cancelled'
+        else:
+            return False
+        
+        return True
+    
+    # Creates a budget for a preliminary pass that may expand at most NODES more nodes, sharing this budget's deadline,
+    # memory limit, cancel event and statistics; hand its count back with SETTLE once the pass is done
+    def SUB_BUDGET(self, NODES):
+        BUDGET = copy.copy(self)
+        BUDGET.NODE_BUDGET = self.NODES_EXPANDED + NODES
+        if self.NODE_BUDGET is not None:
+            BUDGET.NODE_BUDGET = min(BUDGET.NODE_BUDGET, self.NODE_BUDGET)
+        BUDGET.EXHAUSTED_BY = None
+        return BUDGET
+    
+    # Counts the nodes a SUB_BUDGET pass expanded against this budget (a pass that ran out of its own share does not
+    # exhaust this one; a spent deadline or a cancel is noticed again by the next search)
+    def SETTLE(self, BUDGET):
+        self.NODES_EXPANDED = BUDGET.NODES_EXPANDED
+    
+    # Describes why a search that returned (moves, proven optimal) stopped
+    def TERMINATION(self, BEST_SOLUTION, IS_OPTIMAL):
+        if self.EXHAUSTED_BY is not None:
+            return self.EXHAUSTED_BY
+        if IS_OPTIMAL:
+            return 'optimal'
+        return 'no plan' if BEST_SOLUTION is None else 'search finished'
+
+# Everything a search engine needs to know about one balancing problem (shared by the A* and beam engines)
+class BalanceProblem:
+    # Precomputes the threshold and heuristic tables for the ship described by LAYOUT and INITIAL_STATE (the crane
+    # parks where the layout's geometry says)
+    def __init__(self, LAYOUT, INITIAL_STATE, HEIGHT_AWARE=HEIGHT_AWARE_CRANE):
+        self.LAYOUT            = LAYOUT
+        self.INITIAL_STATE     = INITIAL_STATE
+        self.PARK_POSITION     = LAYOUT.GEOMETRY.PARK_POSITION
+        self.BALANCE_THRESHOLD = (INITIAL_STATE.PORT_WEIGHT + INITIAL_STATE.STARBOARD_WEIGHT) * 0.10
+        self.COST_MODEL        = GET_COST_MODEL(LAYOUT.GEOMETRY, LAYOUT.BUFFER, HEIGHT_AWARE)
+        self.CROSSING_COSTS    = BUILD_CROSSING_TABLE(LAYOUT, self.COST_MODEL)
+        self.FIRST_CROSSINGS   = {}
+        
+        # Port totals a legal final state can have; empty when the ship can never be balanced
+        self.TARGET_PORT_TOTALS = BALANCED_PORT_TOTALS(INITIAL_STATE.WEIGHTS, self.BALANCE_THRESHOLD)
+        
+        # Slots whose containers may be moved (None means any accessible container); see TransferProblem
+        self.SOURCE_SLOTS = None
+        
+        # Whether a container may be set down within its own side to uncover the one beneath it (see CHILDREN)
+        self.SAME_SIDE_MOVES = True
+        
+        # Buffer slots containers may be staged in, nearest the gate first (empty when the layout has no buffer)
+        self.BUFFER_SLOTS = LAYOUT.BUFFER_SLOTS
+        
+        # Scores the candidate moves of a state in one go with NumPy; None scores them one by one (see SCORE_MOVES)
+        self.VECTOR_SCORER = VectorMoveScorer(LAYOUT, self.COST_MODEL) if VECTORIZED_MOVES else None
+        
+        # Rough size of one stored search node (state, its tuples, queue entry and table slot) for memory budgets
+        self.NODE_BYTES = (sys.getsizeof(INITIAL_STATE) + sys.getsizeof(INITIAL_STATE.WEIGHTS)
+                           + sys.getsizeof(INITIAL_STATE.HEIGHTS) + sys.getsizeof(INITIAL_STATE.SIDE_WEIGHTS)
+                           + sum(map(sys.getsizeof, INITIAL_STATE.SIDE_WEIGHTS)) + 256)
+    
+    # Checks whether an imbalance is within the legal 10% threshold
+    def IS_BALANCED(self, IMBALANCE):
+        return IMBALANCE == 0 or IMBALANCE < self.BALANCE_THRESHOLD
+    
+    # Checks whether a plan may end in STATE: legally balanced with nothing left in the buffer
+    def IS_GOAL(self, STATE, IMBALANCE):
+        return self.IS_BALANCED(IMBALANCE) and STATE.BUFFERED_WEIGHT() == 0
+    
+    # Estimates a lower bound on the crane time still needed from STATE with the crane at CRANE_POSITION (for a goal
+    # state, the exact time back to park)
+    def ESTIMATE(self, STATE, CRANE_POSITION, IMBALANCE):
+        if self.IS_GOAL(STATE, IMBALANCE):
+            return self.PARK_TIME(STATE, CRANE_POSITION)
+        return ESTIMATE_REMAINING_COST(STATE, CRANE_POSITION, IMBALANCE, self.BALANCE_THRESHOLD, self.TARGET_PORT_TOTALS, self.CROSSING_COSTS, self.COST_MODEL, self.FIRST_CROSSINGS)
+    
+    # Checks whether some split of the containers between the sides is legal at all (decided before any search)
+    def IS_FEASIBLE(self):
+        return bool(self.TARGET_PORT_TOTALS)
+    
+    # Creates a copy of the problem without moves within a side or through the buffer; its search space is far smaller
+    # because every move then brings the sides closer
+    def CROSSING_ONLY(self):
+        PROBLEM = copy.copy(self)
+        PROBLEM.SAME_SIDE_MOVES = False
+        PROBLEM.BUFFER_SLOTS = ()
+        return PROBLEM
+    
+    # Calculates the extra crane time of a leg between two ship slots for lifting over the tallest stack between their
+    # columns (none without a CLEARANCE table, or for legs from or to the buffer, whose columns are 0 and below; those
+    # keep the table time). Park is a ship slot like any other, so legs from or to it climb too.
+    def CLIMB_TIME(self, CLEARANCE, POSITION_1, POSITION_2):
+        if CLEARANCE is None:
+            return 0
+        
+        (ROW_1, COL_1), (ROW_2, COL_2) = POSITION_1, POSITION_2
+        if COL_1 < 1 or COL_2 < 1:
+            return 0
+        
+        if COL_1 > COL_2:
+            COL_1, COL_2 = COL_2, COL_1
+        
+        TALLEST = CLEARANCE_BETWEEN(CLEARANCE, COL_1, COL_2 - 1)
+        return 2 * (TALLEST + 1 - max(ROW_1, ROW_2)) if TALLEST >= ROW_1 and TALLEST >= ROW_2 else 0
+    
+    # Calculates the crane time from CRANE_POSITION back to park in STATE, lifting over the stacks in between like
+    # every other leg (see CostModel.LEG_TIME)
+    def PARK_TIME(self, STATE, CRANE_POSITION):
+        if not self.COST_MODEL.HEIGHT_AWARE:
+            return self.COST_MODEL.PARK_TIME(CRANE_POSITION)
+        
+        TOPS = [max(HEIGHT, NAN_TOP) for HEIGHT, NAN_TOP in zip(STATE.HEIGHTS, self.LAYOUT.NAN_TOPS)]
+        return self.COST_MODEL.LEG_TIME(CRANE_POSITION, self.PARK_POSITION, TOPS)
+    
+    # Scores the ship moves of the containers in SOURCES (UNCOVERS tells, per source, whether it may move within its
+    # side) one by one: a list per source of (end index, imbalance after the move, carry time) for the moves worth
+    # making, so only those become child states. VectorMoveScorer.SCORE does the same for all pairs at once.
+    def SCORE_MOVES(self, STATE, SOURCES, UNCOVERS, DESTINATIONS, IMBALANCE, CLEARANCE):
+        POSITIONS = self.LAYOUT.POSITIONS
+        IS_PORT = self.LAYOUT.IS_PORT
+        COLS = self.LAYOUT.COLS
+        TRAVEL_FROM = self.COST_MODEL.TRAVEL_FROM
+        SIDE_DIFFERENCE = STATE.PORT_WEIGHT - STATE.STARBOARD_WEIGHT
+        SCORED_MOVES = []
+        
+        for START_INDEX, START_UNCOVERS in zip(SOURCES, UNCOVERS):
+            START_POSITION = POSITIONS[START_INDEX]
+            START_DISTANCES = TRAVEL_FROM[START_POSITION]
+            
+            # Carrying a container across the divider shifts PORT - STARBOARD by twice its weight, wherever it lands
+            WEIGHT = STATE.WEIGHTS[START_INDEX]
+            CROSSED_IMBALANCE = abs(SIDE_DIFFERENCE - 2 * WEIGHT if IS_PORT[START_INDEX] else SIDE_DIFFERENCE + 2 * WEIGHT)
+            MOVES = []
+            
+            for END_INDEX in DESTINATIONS:
+                if IS_PORT[START_INDEX] == IS_PORT[END_INDEX]:
+                    if not START_UNCOVERS or END_INDEX % COLS == START_INDEX % COLS:
+                        continue
+                    NEW_IMBALANCE = IMBALANCE
+                
+                # Crossing the divider is only worth it when it brings the sides closer together
+                elif CROSSED_IMBALANCE >= IMBALANCE:
+                    continue
+                else:
+                    NEW_IMBALANCE = CROSSED_IMBALANCE
+                
+                CARRY_TIME = START_DISTANCES[END_INDEX] + self.CLIMB_TIME(CLEARANCE, START_POSITION, POSITIONS[END_INDEX])
+                MOVES.append((END_INDEX, NEW_IMBALANCE, CARRY_TIME))
+            
+            SCORED_MOVES.append(MOVES)
+        
+        return SCORED_MOVES
+    
+    # Generates (child state, start position, end position, crane time so far, imbalance) for every legal move: moves
+    # across the divider that bring the sides closer, plus (when SAME_SIDE_MOVES is on) moving a container within its
+    # side to uncover the one beneath it; the search's costs decide whether such a detour pays off. When the ship has
+    # no room where a container has to go (the light side is full, or nowhere else on its side to uncover the one
+    # beneath it) it may be staged in the buffer instead, and staged containers may go back to any free ship slot.
+    def CHILDREN(self, STATE, CRANE_POSITION, COST, IMBALANCE):
+        POSITIONS = self.LAYOUT.POSITIONS
+        IS_PORT = self.LAYOUT.IS_PORT
+        COLS = self.LAYOUT.COLS
+        TRAVEL_FROM = self.COST_MODEL.TRAVEL_FROM
+        CRANE_DISTANCES = TRAVEL_FROM[CRANE_POSITION]
+        DESTINATIONS = STATE.VALID_DESTINATIONS()
+        
+        # The state keeps the top of every column up to date move by move; one sparse table over those tops per
+        # expansion gives the tallest stack between any two columns in O(1) (see CostModel.LEG_TIME)
+        CLEARANCE = None
+        if self.COST_MODEL.HEIGHT_AWARE:
+            CLEARANCE = BUILD_CLEARANCE_TABLE([max(HEIGHT, NAN_TOP) for HEIGHT, NAN_TOP in zip(STATE.HEIGHTS, self.LAYOUT.NAN_TOPS)])
+        
+        # Only containers on the heavy side ever have to cross, so only that side is worth digging into
+        HEAVY_SIDE_IS_PORT = STATE.PORT_WEIGHT > STATE.STARBOARD_WEIGHT
+        
+        # Every buffer slot is reached through the gate, so the free one nearest it is the only one worth using
+        STAGING_INDEX = next((INDEX for INDEX in self.BUFFER_SLOTS if STATE.WEIGHTS[INDEX] == 0), None)
+        LIGHT_SIDE_FULL = all(IS_PORT[END_INDEX] is HEAVY_SIDE_IS_PORT for END_INDEX in DESTINATIONS)
+        
+        SOURCES = [INDEX for INDEX in STATE.ACCESSIBLE_CONTAINERS() if self.SOURCE_SLOTS is None or INDEX in self.SOURCE_SLOTS]
+        SHIP_SOURCES = [INDEX for INDEX in SOURCES if IS_PORT[INDEX] is not None]
+        UNCOVERS = [self.SAME_SIDE_MOVES and IS_PORT[INDEX] == HEAVY_SIDE_IS_PORT and INDEX >= COLS and STATE.WEIGHTS[INDEX - COLS] > 0
+                    for INDEX in SHIP_SOURCES]
+        
+        # Every ship move is scored first, so only the ones worth making are built (all at once with NumPy when there are
+        # enough of them to repay its overhead)
+        SCORE_MOVES = self.SCORE_MOVES
+        if self.VECTOR_SCORER is not None and len(SHIP_SOURCES) * len(DESTINATIONS) >= VECTOR_MIN_PAIRS:
+            SCORE_MOVES = self.VECTOR_SCORER.SCORE
+        SCORED_MOVES = SCORE_MOVES(STATE, SHIP_SOURCES, UNCOVERS, DESTINATIONS, IMBALANCE, CLEARANCE)
+        
+        for START_INDEX, START_UNCOVERS, MOVES in zip(SHIP_SOURCES, UNCOVERS, SCORED_MOVES):
+            START_POSITION = POSITIONS[START_INDEX]
+            COST_TO_SOURCE = COST + CRANE_DISTANCES[START_INDEX] + self.CLIMB_TIME(CLEARANCE, CRANE_POSITION, START_POSITION)
+            SAME_SIDE_ROOM = False
+            
+            for END_INDEX, NEW_IMBALANCE, CARRY_TIME in MOVES:
+                SAME_SIDE_ROOM = SAME_SIDE_ROOM or IS_PORT[START_INDEX] == IS_PORT[END_INDEX]
+                yield STATE.MOVE(START_INDEX, END_INDEX), START_POSITION, POSITIONS[END_INDEX], COST_TO_SOURCE + CARRY_TIME, NEW_IMBALANCE
+            
+            if STAGING_INDEX is not None and (LIGHT_SIDE_FULL or (START_UNCOVERS and not SAME_SIDE_ROOM)):
+                NEW_STATE = STATE.MOVE(START_INDEX, STAGING_INDEX)
+                yield NEW_STATE, START_POSITION, POSITIONS[STAGING_INDEX], COST_TO_SOURCE + TRAVEL_FROM[START_POSITION][STAGING_INDEX], NEW_STATE.IMBALANCE()
+        
+        # A staged container has to come back aboard, to whichever side suits the balance
+        for START_INDEX in SOURCES:
+            if IS_PORT[START_INDEX] is not None:
+                continue
+            
+            START_POSITION = POSITIONS[START_INDEX]
+            START_DISTANCES = TRAVEL_FROM[START_POSITION]
+            COST_TO_SOURCE = COST + CRANE_DISTANCES[START_INDEX]
+            
+            for END_INDEX in DESTINATIONS:
+                NEW_STATE = STATE.MOVE(START_INDEX, END_INDEX)
+                yield NEW_STATE, START_POSITION, POSITIONS[END_INDEX], COST_TO_SOURCE + START_DISTANCES[END_INDEX], NEW_STATE.IMBALANCE()
+
+# Phase two of the two-phase engine: the balancing problem narrowed to carrying exactly the containers in SOURCE_SLOTS
+# across the divider (it shares the precomputed tables of the full PROBLEM)
+class TransferProblem(BalanceProblem):
+    # Restricts PROBLEM to moving the containers in SOURCE_SLOTS, whose weights add up to TRANSFERRED
+    def __init__(self, PROBLEM, SOURCE_SLOTS, TRANSFERRED):
+        self.__dict__.update(vars(PROBLEM))
+        self.SOURCE_SLOTS = frozenset(SOURCE_SLOTS)
+        
+        # Phase one already sends blockers across with the containers under them, so nothing moves within a side or
+        # through the buffer
+        self.SAME_SIDE_MOVES = False
+        self.BUFFER_SLOTS = ()
+        
+        # Every move carries a chosen container off the heavy side, so the target imbalance is reached exactly when
+        # all of them have crossed
+        STATE = PROBLEM.INITIAL_STATE
+        SIGN = -1 if STATE.PORT_WEIGHT > STATE.STARBOARD_WEIGHT else 1
+        FINAL_PORT_WEIGHT = STATE.PORT_WEIGHT + SIGN * TRANSFERRED
+        self.TARGET_IMBALANCE = abs(2 * FINAL_PORT_WEIGHT - STATE.PORT_WEIGHT - STATE.STARBOARD_WEIGHT)
+        
+        # Columns every chosen container has to travel (loaded) to reach the other side, and the crane again (empty)
+        # to come back for it
+        LAYOUT = self.LAYOUT
+        LIGHT_COLUMNS = [COL for COL in range(1, LAYOUT.COLS + 1) if LAYOUT.IS_PORT[COL - 1] == (SIGN > 0)]
+        self.CROSSING_COLUMNS = {INDEX: min(abs(LAYOUT.POSITIONS[INDEX][1] - COL) for COL in LIGHT_COLUMNS)
+                                 for INDEX in self.SOURCE_SLOTS}
+        self.PARK_COLUMNS = min(abs(self.PARK_POSITION[1] - COL) for COL in LIGHT_COLUMNS)
+    
+    # Checks whether every chosen container has crossed
+    def IS_BALANCED(self, IMBALANCE):
+        return IMBALANCE == self.TARGET_IMBALANCE
+    
+    # Estimates a lower bound on the crane time to carry the remaining chosen containers across and park: each one
+    # needs a loaded and (apart from the first) an empty trip over its crossing columns
+    def ESTIMATE(self, STATE, CRANE_POSITION, IMBALANCE):
+        REMAINING = [INDEX for INDEX in self.SOURCE_SLOTS if STATE.WEIGHTS[INDEX] > 0]
+        if not REMAINING:
+            return self.PARK_TIME(STATE, CRANE_POSITION)
+        
+        CRANE_DISTANCES = self.COST_MODEL.TRAVEL_FROM[CRANE_POSITION]
+        CROSSING_COLUMNS = self.CROSSING_COLUMNS
+        FIRST_TRIP = min(CRANE_DISTANCES[INDEX] - CROSSING_COLUMNS[INDEX]
+                         for INDEX in REMAINING)
+        
+        return FIRST_TRIP + 2 * sum(CROSSING_COLUMNS[INDEX] for INDEX in REMAINING) + self.PARK_COLUMNS
+
+# Runs A* and yields (moves, cost, proven optimal) every time a cheaper plan is found; the last plan yielded is
+# flagged as proven optimal when the search finishes within budget. INCUMBENT seeds the search with a known plan,
+# ROOTS replaces the initial state with a list of (state, moves, crane position, cost, imbalance) start nodes and
+# SHARED_BOUND (a multiprocessing.Value) lets parallel workers prune against each other's best cost.
+# Among equally cheap plans the lexicographically smallest move list wins, so the answer does not depend on
+# expansion order (the parallel root split relies on this to match the serial search exactly).
+def ASTAR_PLANS(PROBLEM, BUDGET, INCUMBENT=(None, float('inf')), ROOTS=None, SHARED_BOUND=None):
+    PARK_POSITION = PROBLEM.PARK_POSITION
+    
+    if ROOTS is None:
+        INITIAL_STATE = PROBLEM.INITIAL_STATE
+        ROOTS = [(INITIAL_STATE, [], PARK_POSITION, 0, INITIAL_STATE.IMBALANCE())]
+    
+    # A* frontier ordered by (estimated total cost, deeper plans first, insertion order)
+    CONTAINER_SOLVER_QUEUE = []
+    COUNTER = 0
+    
+    # Transposition table: Zobrist key of (state, crane position) -> (cheapest crane time, moves) known to reach it
+    BEST_COST_SO_FAR = {}
+    
+    for ROOT_STATE, ROOT_MOVES, ROOT_CRANE, ROOT_COST, ROOT_IMBALANCE in ROOTS:
+        ROOT_KEY = ROOT_STATE.SEARCH_KEY(ROOT_CRANE)
+        if ROOT_KEY in BEST_COST_SO_FAR and BEST_COST_SO_FAR[ROOT_KEY] <= (ROOT_COST, ROOT_MOVES):
+            continue
+        
+        ROOT_ESTIMATE = ROOT_COST + PROBLEM.ESTIMATE(ROOT_STATE, ROOT_CRANE, ROOT_IMBALANCE)
+        if ROOT_ESTIMATE == float('inf'):
+            continue
+        
+        BEST_COST_SO_FAR[ROOT_KEY] = (ROOT_COST, ROOT_MOVES)
+        COUNTER += 1
+        heapq.heappush(CONTAINER_SOLVER_QUEUE, (ROOT_ESTIMATE, -ROOT_COST, COUNTER, ROOT_STATE, ROOT_MOVES, ROOT_CRANE, ROOT_IMBALANCE))
+    
+    BEST_SOLUTION, BEST_COST = INCUMBENT
+    
+    # Counted in locals and handed to the budget's SearchStats (if any) when the search stops
+    STATS = BUDGET.STATS
+    TIMERS = STATS is not None and STATS.TIMERS
+    GENERATED = DUPLICATES = STALE = PRUNED = 0
+    
+    try:
+        while CONTAINER_SOLVER_QUEUE:
+            # Out of budget: the incumbent (if any) was already yielded, but it is not proven optimal
+            if BUDGET.EXHAUSTED(len(BEST_COST_SO_FAR), PROBLEM.NODE_BYTES):
+                return
+            
+            ESTIMATE, NEGATIVE_COST, _, CURRENT_STATE, CURRENT_MOVES, CRANE_POSITION, CURRENT_IMBALANCE = heapq.heappop(CONTAINER_SOLVER_QUEUE)
+            CURRENT_COST = -NEGATIVE_COST
+            
+            BOUND = BEST_COST if SHARED_BOUND is None else min(BEST_COST, SHARED_BOUND.value)
+            
+            # Every estimate left in the queue is a lower bound, so nothing can beat (or tie) the incumbent anymore
+            if ESTIMATE > BOUND:
+                break
+            
+            # Skip entries superseded by a cheaper (or equally cheap, lexicographically smaller) path queued later
+            if BEST_COST_SO_FAR[CURRENT_STATE.SEARCH_KEY(CRANE_POSITION)][1] is not CURRENT_MOVES:
+                STALE += 1
+                continue
+            
+            BUDGET.NODES_EXPANDED += 1
+            
+            CHILDREN = PROBLEM.CHILDREN(CURRENT_STATE, CRANE_POSITION, CURRENT_COST, CURRENT_IMBALANCE)
+            if STATS is not None:
+                STATS.EXPANDED(CURRENT_STATE, CURRENT_COST, CURRENT_IMBALANCE, len(CONTAINER_SOLVER_QUEUE), len(BEST_COST_SO_FAR))
+                
+                # Timing splits generating the moves from evaluating them, so the children are generated up front
+                if TIMERS:
+                    GENERATION_START = time.perf_counter()
+                    CHILDREN = list(CHILDREN)
+                    EVALUATION_START = time.perf_counter()
+                    STATS.ADD_TIME('move generation', EVALUATION_START - GENERATION_START)
+            
+            for NEW_STATE, START_POSITION, END_POSITION, NEW_COST, NEW_IMBALANCE in CHILDREN:
+                GENERATED += 1
+                NEW_KEY = NEW_STATE.SEARCH_KEY(END_POSITION)
+                KNOWN = BEST_COST_SO_FAR.get(NEW_KEY)
+                if KNOWN is not None and KNOWN[0] < NEW_COST:
+                    DUPLICATES += 1
+                    continue
+                
+                NEW_MOVES = CURRENT_MOVES + [(START_POSITION, END_POSITION)]
+                if KNOWN is not None and KNOWN <= (NEW_COST, NEW_MOVES):
+                    DUPLICATES += 1
+                    continue
+                
+                NEW_ESTIMATE = NEW_COST + PROBLEM.ESTIMATE(NEW_STATE, END_POSITION, NEW_IMBALANCE)
+                
+                # An infinite estimate means no legal split is reachable from the child any more
+                if NEW_ESTIMATE > BOUND or NEW_ESTIMATE == float('inf'):
+                    PRUNED += 1
+                    continue
+                
+                # A balanced child's estimate is its exact cost including the trip back to park
+                if PROBLEM.IS_GOAL(NEW_STATE, NEW_IMBALANCE):
+                    if (NEW_ESTIMATE, NEW_MOVES) < (BEST_COST, BEST_SOLUTION or []):
+                        IMPROVED = NEW_ESTIMATE < BEST_COST
+                        BEST_SOLUTION = NEW_MOVES
+                        BEST_COST = NEW_ESTIMATE
+                        
+                        if SHARED_BOUND is not None:
+                            with SHARED_BOUND.get_lock():
+                                SHARED_BOUND.value = min(SHARED_BOUND.value, BEST_COST)
+                        
+                        if IMPROVED:
+                            if STATS is not None:
+                                STATS.FOUND_PLAN(BEST_SOLUTION, BEST_COST)
+                            yield BEST_SOLUTION, BEST_COST, False
+                    continue
+                
+                BEST_COST_SO_FAR[NEW_KEY] = (NEW_COST, NEW_MOVES)
+                COUNTER += 1
+                heapq.heappush(CONTAINER_SOLVER_QUEUE, (NEW_ESTIMATE, -NEW_COST, COUNTER, NEW_STATE, NEW_MOVES, END_POSITION, NEW_IMBALANCE))
+            
+            if TIMERS:
+                STATS.ADD_TIME('evaluation', time.perf_counter() - EVALUATION_START)
+    finally:
+        if STATS is not None:
+            STATS.NODES_GENERATED += GENERATED
+            STATS.DUPLICATES_PRUNED += DUPLICATES
+            STATS.STALE_ENTRIES += STALE
+            STATS.BOUND_PRUNED += PRUNED
+    
+    if BEST_SOLUTION is not None:
+        yield BEST_SOLUTION, BEST_COST, True
+
+# Finds the minimum crane time plan with A*, returning (moves, cost, proven optimal) or (None, inf, False) when no
+# plan was found in budget (INCUMBENT, a known (moves, cost), is returned unless something at least as cheap is found)
+def ASTAR_SEARCH(PROBLEM, BUDGET, INCUMBENT=(None, float('inf'))):
+    BEST_SOLUTION, BEST_COST = INCUMBENT
+    IS_OPTIMAL = False
+    
+    for BEST_SOLUTION, BEST_COST, IS_OPTIMAL in ASTAR_PLANS(PROBLEM, BUDGET, INCUMBENT):
+        pass
+    
+    return BEST_SOLUTION, BEST_COST, IS_OPTIMAL
+
+# Best cost found by any root split worker, installed in every worker process by SET_SHARED_BOUND
+SHARED_BEST_COST = None
+
+# Pool initializer that hands each worker process the shared best-cost bound
+def SET_SHARED_BOUND(SHARED_BOUND):
+    global SHARED_BEST_COST
+    SHARED_BEST_COST = SHARED_BOUND
+
+# Runs A* over one worker's share of the first moves, returning (moves, cost, budget that ran out or None when it
+# finished, nodes expanded, SearchStats counts); the counts are only kept when TIMERS is not None, and then with timers
+# on if it is True
+def ROOT_SPLIT_WORKER(PROBLEM, ROOTS, INCUMBENT, NODE_BUDGET, MEMORY_BUDGET, TIME_BUDGET, TIMERS=None):
+    STATS = None if TIMERS is None else SearchStats(TIMERS)
+    BUDGET = SearchBudget(NODE_BUDGET, MEMORY_BUDGET, TIME_BUDGET, STATS)
+    BEST_SOLUTION, BEST_COST = INCUMBENT
+    
+    for BEST_SOLUTION, BEST_COST, _ in ASTAR_PLANS(PROBLEM, BUDGET, INCUMBENT, ROOTS, SHARED_BEST_COST):
+        pass
+    
+    # Only set when the search loop itself stopped on a budget; a subtree finished just past the deadline is complete
+    return BEST_SOLUTION, BEST_COST, BUDGET.EXHAUSTED_BY, BUDGET.NODES_EXPANDED, None if STATS is None else STATS.COUNTS()
+
+# Finds the same plan as ASTAR_SEARCH by splitting the first moves across WORKERS processes that share a best-cost bound,
+# returning (moves, cost, proven optimal, nodes expanded, budget that ran out in some worker or None); the workers' counts are added to STATS, when given (its
+# hooks cannot follow the search into the worker processes, so they are not called). NODE_BUDGET is split evenly
+# between the workers, while MEMORY_BUDGET and TIME_BUDGET apply to each worker process on its own.
+def ROOT_SPLIT_SEARCH(PROBLEM, WORKERS, NODE_BUDGET=None, MEMORY_BUDGET=None, TIME_BUDGET=None, STATS=None):
+    INITIAL_STATE = PROBLEM.INITIAL_STATE
+    PARK_POSITION = PROBLEM.PARK_POSITION
+    
+    # First moves that already balance the ship are scored here; the rest become roots keyed like the A* table
+    INCUMBENT = (None, float('inf'))
+    ROOTS = {}
+    for NEW_STATE, START_POSITION, END_POSITION, NEW_COST, NEW_IMBALANCE in PROBLEM.CHILDREN(INITIAL_STATE, PARK_POSITION, 0, INITIAL_STATE.IMBALANCE()):
+        NEW_MOVES = [(START_POSITION, END_POSITION)]
+        
+        if PROBLEM.IS_GOAL(NEW_STATE, NEW_IMBALANCE):
+            TOTAL_COST = NEW_COST + PROBLEM.PARK_TIME(NEW_STATE, END_POSITION)
+            if (TOTAL_COST, NEW_MOVES) < (INCUMBENT[1], INCUMBENT[0] or []):
+                INCUMBENT = (NEW_MOVES, TOTAL_COST)
+            continue
+        
+        NEW_KEY = NEW_STATE.SEARCH_KEY(END_POSITION)
+        if NEW_KEY not in ROOTS or (NEW_COST, NEW_MOVES) < (ROOTS[NEW_KEY][3], ROOTS[NEW_KEY][1]):
+            ROOTS[NEW_KEY] = (NEW_STATE, NEW_MOVES, END_POSITION, NEW_COST, NEW_IMBALANCE)
+    
+    # Deal the roots out cheapest-estimate first so every worker gets a fair share of promising subtrees
+    ROOTS = sorted(ROOTS.values(), key=lambda ROOT: (ROOT[3] + PROBLEM.ESTIMATE(ROOT[0], ROOT[2], ROOT[4]), ROOT[1]))
+    PARTITIONS = [ROOTS[i::WORKERS] for i in range(WORKERS)]
     
-    return COST_FROM_PARK_TO_SOURCE + COST_FROM_SOURCE_TO_DESTINATION + COST_FROM_DEST_TO_PARK_POSITION
+    PARTITIONS = [PARTITION for PARTITION in PARTITIONS if PARTITION]
+    WORKER_NODE_BUDGET = None if NODE_BUDGET is None else max(1, NODE_BUDGET // max(1, len(PARTITIONS)))
+    
+    SHARED_BOUND = multiprocessing.Value('d', INCUMBENT[1])
+    BEST_SOLUTION, BEST_COST = INCUMBENT
+    EXHAUSTED_BY = None
+    NODES_EXPANDED = 0
+    
+    with ProcessPoolExecutor(max_workers=WORKERS, initializer=SET_SHARED_BOUND, initargs=(SHARED_BOUND,)) as EXECUTOR:
+        TIMERS = None if STATS is None else STATS.TIMERS
+        FUTURES = [EXECUTOR.submit(ROOT_SPLIT_WORKER, PROBLEM, PARTITION, INCUMBENT, WORKER_NODE_BUDGET, MEMORY_BUDGET, TIME_BUDGET, TIMERS)
+                   for PARTITION in PARTITIONS]
+        
+        for FUTURE in FUTURES:
+            SOLUTION, COST, WORKER_EXHAUSTED_BY, WORKER_NODES, WORKER_COUNTS = FUTURE.result()
+            NODES_EXPANDED += WORKER_NODES
+            EXHAUSTED_BY = EXHAUSTED_BY or WORKER_EXHAUSTED_BY
+            if STATS is not None:
+                STATS.MERGE(WORKER_COUNTS)
+            
+            # Same tie-break as the serial search: cheapest, then lexicographically smallest move list
+            if SOLUTION is not None and (COST, SOLUTION) < (BEST_COST, BEST_SOLUTION or []):
+                BEST_SOLUTION, BEST_COST = SOLUTION, COST
+    
+    if STATS is not None and BEST_SOLUTION is not None:
+        STATS.BEST_COST = BEST_COST
+    
+    return BEST_SOLUTION, BEST_COST, EXHAUSTED_BY is None and BEST_SOLUTION is not None, NODES_EXPANDED, EXHAUSTED_BY
 
-# Calculates the cost of balancing the ship based on the number of container moves 
-def CALCULATE_BALANCE_COST(CONTAINER_MOVES, PARK_POSITION=(1, 8)):
-    if not CONTAINER_MOVES:
-        return 0
+# Finds a good (not necessarily optimal) plan keeping only the BEAM_WIDTH most promising nodes per move, so memory stays flat
+def BEAM_SEARCH(PROBLEM, BUDGET, BEAM_WIDTH=200):
+    INITIAL_STATE = PROBLEM.INITIAL_STATE
+    PARK_POSITION = PROBLEM.PARK_POSITION
+    INITIAL_IMBALANCE = INITIAL_STATE.IMBALANCE()
+    
+    BEAM = [(PROBLEM.ESTIMATE(INITIAL_STATE, PARK_POSITION, INITIAL_IMBALANCE), 0, INITIAL_STATE, [], PARK_POSITION, INITIAL_IMBALANCE)]
     
-    TOTAL_COST = 0
-    CURRENT_POSITION = PARK_POSITION
+    BEST_SOLUTION = None
+    BEST_COST = float('inf')
+    
+    # Crane time every (state, crane position) kept in an earlier layer was reached with, so moves within a side
+    # cannot send the beam around in circles
+    KEPT = {INITIAL_STATE.SEARCH_KEY(PARK_POSITION): 0}
+    
+    # Counted in locals and handed to the budget's SearchStats (if any) when the search stops, as in ASTAR_PLANS
+    STATS = BUDGET.STATS
+    TIMERS = STATS is not None and STATS.TIMERS
+    GENERATED = DUPLICATES = PRUNED = 0
+    
+    try:
+        while BEAM:
+            # Children of this layer, deduplicated on (state, crane position) keeping the cheapest path
+            NEXT_LAYER = {}
+            
+            for ESTIMATE, CURRENT_COST, CURRENT_STATE, CURRENT_MOVES, CRANE_POSITION, CURRENT_IMBALANCE in BEAM:
+                if ESTIMATE >= BEST_COST:
+                    continue
+                
+                # Out of budget: settle for the incumbent (if any)
+                if BUDGET.EXHAUSTED(len(BEAM) + len(NEXT_LAYER) + len(KEPT), PROBLEM.NODE_BYTES):
+                    return BEST_SOLUTION, BEST_COST
+                
+                BUDGET.NODES_EXPANDED += 1
+                
+                CHILDREN = PROBLEM.CHILDREN(CURRENT_STATE, CRANE_POSITION, CURRENT_COST, CURRENT_IMBALANCE)
+                if STATS is not None:
+                    STATS.EXPANDED(CURRENT_STATE, CURRENT_COST, CURRENT_IMBALANCE, len(BEAM) + len(NEXT_LAYER), len(BEAM) + len(NEXT_LAYER) + len(KEPT))
+                    if TIMERS:
+                        GENERATION_START = time.perf_counter()
+                        CHILDREN = list(CHILDREN)
+                        EVALUATION_START = time.perf_counter()
+                        STATS.ADD_TIME('move generation', EVALUATION_START - GENERATION_START)
+                
+                for NEW_STATE, START_POSITION, END_POSITION, NEW_COST, NEW_IMBALANCE in CHILDREN:
+                    GENERATED += 1
+                    NEW_ESTIMATE = NEW_COST + PROBLEM.ESTIMATE(NEW_STATE, END_POSITION, NEW_IMBALANCE)
+                    
+                    if NEW_ESTIMATE >= BEST_COST:
+                        PRUNED += 1
+                        continue
+                    
+                    NEW_MOVES = CURRENT_MOVES + [(START_POSITION, END_POSITION)]
+                    
+                    if PROBLEM.IS_GOAL(NEW_STATE, NEW_IMBALANCE):
+                        BEST_SOLUTION = NEW_MOVES
+                        BEST_COST = NEW_ESTIMATE
+                        if STATS is not None:
+                            STATS.FOUND_PLAN(BEST_SOLUTION, BEST_COST)
+                        continue
+                    
+                    NEW_KEY = NEW_STATE.SEARCH_KEY(END_POSITION)
+                    if KEPT.get(NEW_KEY, float('inf')) <= NEW_COST:
+                        DUPLICATES += 1
+                        continue
+                    
+                    if NEW_KEY not in NEXT_LAYER or NEXT_LAYER[NEW_KEY][1] > NEW_COST:
+                        NEXT_LAYER[NEW_KEY] = (NEW_ESTIMATE, NEW_COST, NEW_STATE, NEW_MOVES, END_POSITION, NEW_IMBALANCE)
+                    else:
+                        DUPLICATES += 1
+                
+                if TIMERS:
+                    STATS.ADD_TIME('evaluation', time.perf_counter() - EVALUATION_START)
+            
+            BEAM = heapq.nsmallest(BEAM_WIDTH, NEXT_LAYER.values(), key=lambda ENTRY: (ENTRY[0], -ENTRY[1]))
+            for ENTRY in BEAM:
+                KEPT[ENTRY[2].SEARCH_KEY(ENTRY[4])] = ENTRY[1]
+    finally:
+        if STATS is not None:
+            STATS.NODES_GENERATED += GENERATED
+            STATS.DUPLICATES_PRUNED += DUPLICATES
+            STATS.BOUND_PRUNED += PRUNED
     
-    for MOVE in CONTAINER_MOVES:
-        START_POSITION, END_POSITION = MOVE
-        COST_TO_SOURCE = CALCULATE_MANHATTAN_DISTANCE(CURRENT_POSITION, START_POSITION)
-        COST_TO_DESTINATION = CALCULATE_MANHATTAN_DISTANCE(START_POSITION, END_POSITION)
-        TOTAL_COST += COST_TO_SOURCE + COST_TO_DESTINATION
-        CURRENT_POSITION = END_POSITION
+    return BEST_SOLUTION, BEST_COST
+
+# Beam width of the quick first pass that gives A* an incumbent plan to prune against
+FIRST_PLAN_BEAM_WIDTH = 10
+
+# Most of a node budget the first plan beam may spend (it needs about a beam's worth of nodes per move of its plan),
+# and the most the divider-only A* after it may spend, so the A* search they seed always gets the rest
+FIRST_PLAN_NODE_SHARE = 0.5
+INCUMBENT_NODE_SHARE = 0.10
+
+# Yields successively cheaper (moves, cost) plans to seed A* with: a narrow beam plan within milliseconds, then the
+# cheapest plan that only crosses the divider. Each pass gets a sub-budget of its own: the beam a beam's worth of
+# nodes per container (about as deep as a plan gets) but at most FIRST_PLAN_NODE_SHARE of BUDGET's node budget, the
+# divider-only A* INCUMBENT_NODE_SHARE of it (or as much as the beam without a node budget).
+def INCUMBENT_PLANS(PROBLEM, BUDGET, BEAM_WIDTH=FIRST_PLAN_BEAM_WIDTH):
+    BEAM_NODES = CROSSING_NODES = BEAM_WIDTH * sum(1 for WEIGHT in PROBLEM.INITIAL_STATE.WEIGHTS if WEIGHT > 0)
+    if BUDGET.NODE_BUDGET is not None:
+        BEAM_NODES = min(BEAM_NODES, int(BUDGET.NODE_BUDGET * FIRST_PLAN_NODE_SHARE))
+        CROSSING_NODES = int(BUDGET.NODE_BUDGET * INCUMBENT_NODE_SHARE)
     
-    COST_TO_PARK_POSITION = CALCULATE_MANHATTAN_DISTANCE(CURRENT_POSITION, PARK_POSITION)
-    TOTAL_COST += COST_TO_PARK_POSITION
+    INCUMBENT_BUDGET = BUDGET.SUB_BUDGET(BEAM_NODES)
+    try:
+        INCUMBENT = BEAM_SEARCH(PROBLEM, INCUMBENT_BUDGET, BEAM_WIDTH)
+    finally:
+        BUDGET.SETTLE(INCUMBENT_BUDGET)
+    if INCUMBENT[0] is not None:
+        yield INCUMBENT
     
-    return TOTAL_COST
+    INCUMBENT_BUDGET = BUDGET.SUB_BUDGET(CROSSING_NODES)
+    try:
+        for SOLUTION, COST, _ in ASTAR_PLANS(PROBLEM.CROSSING_ONLY(), INCUMBENT_BUDGET, INCUMBENT):
+            if COST < INCUMBENT[1]:
+                INCUMBENT = (SOLUTION, COST)
+                yield INCUMBENT
+    finally:
+        BUDGET.SETTLE(INCUMBENT_BUDGET)
+
+# Phase one of the two-phase engine: lists candidate sets of heavy-side slots to carry across, cheapest first, as
+# (estimated crane time, slots, weight carried). Containers only ever cross the divider, so a buried container can
+# only go once everything above it goes too; each heavy column therefore contributes some number of containers from
+# its top, and a knapsack over the columns keeps the cheapest set for every transferable weight that ends in a legal
+# split. A container's estimated cost is the columns the crane crosses to carry it over and come back for the next.
+def TRANSFER_CANDIDATES(PROBLEM):
+    STATE = PROBLEM.INITIAL_STATE
+    LAYOUT = PROBLEM.LAYOUT
+    HEAVY_SIDE_IS_PORT = STATE.PORT_WEIGHT > STATE.STARBOARD_WEIGHT
+    LIGHT_COLUMNS = [COL for COL in range(LAYOUT.COLS) if LAYOUT.IS_PORT[COL] != HEAVY_SIDE_IS_PORT]
+    
+    # Transferred weight -> (cheapest estimated crane time, slots that make it up)
+    TRANSFERS = {0: (0, ())}
+    
+    for COL, HEIGHT in enumerate(STATE.HEIGHTS):
+        if HEIGHT == 0 or LAYOUT.IS_PORT[COL] != HEAVY_SIDE_IS_PORT:
+            continue
+        
+        # Taking the top k containers of a column costs a round trip over the divider for each of them
+        ROUND_TRIP = 2 * min(abs(COL - LIGHT_COLUMN) for LIGHT_COLUMN in LIGHT_COLUMNS)
+        OPTIONS = []
+        WEIGHT = 0
+        COST = 0
+        SLOTS = ()
+        for ROW in range(HEIGHT - 1, -1, -1):
+            INDEX = ROW * LAYOUT.COLS + COL
+            if STATE.WEIGHTS[INDEX] == 0:
+                continue
+            WEIGHT += STATE.WEIGHTS[INDEX]
+            COST += ROUND_TRIP
+            SLOTS += (INDEX,)
+            OPTIONS.append((WEIGHT, COST, SLOTS))
+        
+        NEXT_TRANSFERS = dict(TRANSFERS)
+        for TRANSFERRED, (TRANSFER_COST, TRANSFER_SLOTS) in TRANSFERS.items():
+            for WEIGHT, COST, SLOTS in OPTIONS:
+                KNOWN = NEXT_TRANSFERS.get(TRANSFERRED + WEIGHT)
+                CANDIDATE = (TRANSFER_COST + COST, TRANSFER_SLOTS + SLOTS)
+                if KNOWN is None or CANDIDATE < KNOWN:
+                    NEXT_TRANSFERS[TRANSFERRED + WEIGHT] = CANDIDATE
+        TRANSFERS = NEXT_TRANSFERS
+    
+    TARGET_PORT_TOTALS = set(PROBLEM.TARGET_PORT_TOTALS)
+    SIGN = -1 if HEAVY_SIDE_IS_PORT else 1
+    
+    return sorted((COST, SLOTS, TRANSFERRED) for TRANSFERRED, (COST, SLOTS) in TRANSFERS.items()
+                  if STATE.PORT_WEIGHT + SIGN * TRANSFERRED in TARGET_PORT_TOTALS)
+
+# Finds a good (not necessarily optimal) plan in two phases: phase one picks which containers cross the divider
+# (TRANSFER_CANDIDATES) and phase two runs A* over just those containers to order the moves and pick their
+# destinations. Transfer sets never move a container within its side or through the buffer, so the engine starts
+# from the plans of INCUMBENT_PLANS and keeps whichever is cheapest. Up to CANDIDATES sets are planned, skipping any
+# whose lower bound cannot beat the best plan so far.
+def TWO_PHASE_SEARCH(PROBLEM, BUDGET, CANDIDATES=5):
+    INITIAL_STATE = PROBLEM.INITIAL_STATE
+    BEST_SOLUTION = None
+    BEST_COST = float('inf')
+    
+    for BEST_SOLUTION, BEST_COST in INCUMBENT_PLANS(PROBLEM, BUDGET):
+        pass
+    
+    for _, SOURCE_SLOTS, TRANSFERRED in TRANSFER_CANDIDATES(PROBLEM):
+        if CANDIDATES == 0:
+            break
+        
+        TRANSFER = TransferProblem(PROBLEM, SOURCE_SLOTS, TRANSFERRED)
+        if TRANSFER.ESTIMATE(INITIAL_STATE, PROBLEM.PARK_POSITION, INITIAL_STATE.IMBALANCE()) >= BEST_COST:
+            continue
+        
+        # The best plan so far bounds phase two, so costlier orderings of this set are pruned early
+        CANDIDATES -= 1
+        BEST_SOLUTION, BEST_COST, _ = ASTAR_SEARCH(TRANSFER, BUDGET, (BEST_SOLUTION, BEST_COST))
+        
+        # The search stopped on the budget: settle for the best plan so far
+        if BUDGET.EXHAUSTED_BY is not None:
+            return BEST_SOLUTION, BEST_COST
+    
+    # Some ships only balance by moving weight both ways across the divider, which no transfer set covers
+    if BEST_SOLUTION is None:
+        BEST_SOLUTION, BEST_COST, _ = ASTAR_SEARCH(PROBLEM, BUDGET)
+    
+    return BEST_SOLUTION, BEST_COST
 
 # Balances the ship by moving containers accordingly (if necessary)
-def BALANCE_SHIP(GRID):
+# (ENGINE is 'ASTAR' for the cheapest plan, or the heuristics 'BEAM' / 'TWO_PHASE' for faster plans on big bays that
+# are not proven optimal and may cost more;
+# STATS, when given a SearchStats, is filled in as the search runs and says why it stopped; WORKERS > 1 splits the A* search
+# across that many processes and returns the same plan as the serial search; CACHE is an optional SolutionCache;
+# BUFFER is the BufferArea containers may be staged in, or None to keep every move on the ship; GEOMETRY is the
+# ShipGeometry of the bay, its divider and park position)
+def BALANCE_SHIP(GRID, GEOMETRY=DEFAULT_GEOMETRY, ENGINE='ASTAR', BEAM_WIDTH=200, NODE_BUDGET=10000, MEMORY_BUDGET=None, TIME_BUDGET=None, STATS=None, WORKERS=1, CACHE=None, BUFFER=DEFAULT_BUFFER):
     # for case: 2 containers on same side
-    ROWS = 8
-    COLS = 12
+    ROWS = GEOMETRY.ROWS
+    COLS = GEOMETRY.COLS
 
-    FIRST_HALF = range(1, 7)
-    SECOND_HALF = range(7, 13)
+    FIRST_HALF = range(1, GEOMETRY.DIVIDER + 1)
+    SECOND_HALF = range(GEOMETRY.DIVIDER + 1, COLS + 1)
 
     CONTAINERS = []
     for POSITION, CELL in GRID.items():
@@ -170,74 +1029,171 @@ def BALANCE_SHIP(GRID):
             
             if BEST_MOVE:
                 POSITION, DESTINATION_LOCATION, CELL = BEST_MOVE
-                GRID[DESTINATION_LOCATION] = CELL
-                GRID[POSITION] = {'weight': 0, 'type': 'UNUSED', 'description': 'UNUSED'}
+                SOLUTION = [(POSITION, DESTINATION_LOCATION)]
 
-                return [(POSITION, DESTINATION_LOCATION)], GRID
+                # The move goes on a copy, so the caller's grid still describes where the plan starts from
+                FINAL_GRID = dict(GRID)
+                FINAL_GRID[DESTINATION_LOCATION] = CELL
+                FINAL_GRID[POSITION] = {'weight': 0, 'type': 'UNUSED', 'description': 'UNUSED'}
+
+                if STATS is not None:
+                    STATS.ENGINE = 'DIRECT'
+                    STATS.FOUND_PLAN(SOLUTION, CALCULATE_BALANCE_COST(SOLUTION, GEOMETRY, BUFFER, GRID))
+                    STATS.FINISH('two containers')
+                return SOLUTION, FINAL_GRID
             
+            if STATS is not None:
+                STATS.ENGINE = 'DIRECT'
+                STATS.FINISH('two containers')
             return [], GRID
     
     else:
-        TOTAL_WEIGHT = sum(CELL['weight'] for CELL in GRID.values())
-        BALANCE_THRESHOLD = TOTAL_WEIGHT * 0.10
-    
-        INITIAL_IMBALANCE = CALCULATE_BALANCE(GRID)
+        if STATS is not None:
+            STATS.ENGINE = 'ROOT_SPLIT' if ENGINE == 'ASTAR' and WORKERS > 1 else ENGINE
+        
+        with PHASE_TIMER(STATS, 'setup'):
+            LAYOUT = ShipLayout(GRID, GEOMETRY, BUFFER)
+            INITIAL_STATE = LAYOUT.INITIAL_STATE(GRID)
+            PROBLEM = BalanceProblem(LAYOUT, INITIAL_STATE)
     
-        if INITIAL_IMBALANCE < BALANCE_THRESHOLD:
+        if PROBLEM.IS_BALANCED(INITIAL_STATE.IMBALANCE()):
+            if STATS is not None:
+                STATS.FINISH('already balanced')
             return [], GRID
     
-        CONTAINER_SOLVER_QUEUE = deque()
-        CONTAINER_SOLVER_QUEUE.append((GRID, [], INITIAL_IMBALANCE))
-        VISITED = set()
+        # No split of these weights is legal, so there is nothing to search for
+        if not PROBLEM.IS_FEASIBLE():
+            if STATS is not None:
+                STATS.FINISH('infeasible')
+            return None, GRID
     
-        BEST_SOLUTION = None
-        BEST_IMBALANCE = INITIAL_IMBALANCE
-        BEST_COST = float('inf')
-        BEST_GRID = GRID
+        # Only proven optimal A* plans are cached, so the other engines neither read nor fill the cache
+        CACHE_KEY = None
+        if CACHE is not None and ENGINE == 'ASTAR':
+            CACHE_KEY = MANIFEST_KEY(GRID, GEOMETRY.PARK_POSITION, SEARCH_SETTINGS(BUFFER, GEOMETRY=GEOMETRY))
+            CACHED = CACHE.GET(CACHE_KEY)
+            if CACHED is not None:
+                if STATS is not None:
+                    STATS.BEST_COST = CACHED[1]
+                    STATS.FINISH('cache hit')
+                return CACHED[0], APPLY_MOVES(GRID, CACHED[0])
     
-        MAX_ITERATIONS = 10000
-        ITERATION_COUNT = 0
+        BUDGET = SearchBudget(NODE_BUDGET, MEMORY_BUDGET, TIME_BUDGET, STATS)
     
-        while CONTAINER_SOLVER_QUEUE and ITERATION_COUNT < MAX_ITERATIONS:
-            ITERATION_COUNT += 1
-            CURRENT_GRID, CURRENT_MOVES, CURRENT_IMBALANCE = CONTAINER_SOLVER_QUEUE.popleft()
-        
-            GRID_STATE = tuple(sorted((POSITION, CELL['weight']) for POSITION, CELL in CURRENT_GRID.items()))
-            if GRID_STATE in VISITED:
-                continue
-        
-            VISITED.add(GRID_STATE)
-        
-            if CURRENT_IMBALANCE == 0 or CURRENT_IMBALANCE < BALANCE_THRESHOLD:
-                CURRENT_COST = CALCULATE_BALANCE_COST(CURRENT_MOVES)
-            
-                if CURRENT_COST < BEST_COST:
-                    BEST_SOLUTION = CURRENT_MOVES
-                    BEST_IMBALANCE = CURRENT_IMBALANCE
-                    BEST_COST = CURRENT_COST
-                    BEST_GRID = CURRENT_GRID
-            
-                if CURRENT_IMBALANCE < BALANCE_THRESHOLD:
-                    break
-        
-            if len(CURRENT_MOVES) >= 8:
-                continue
-        
-            ACCESSIBLE_CONTAINERS = GET_CONTAINERS(CURRENT_GRID)
-            DESTINATIONS = GET_VALID_DESTINATIONS(CURRENT_GRID)
-        
-            for START_POSITION in ACCESSIBLE_CONTAINERS:
-                FROM_COL = START_POSITION[1]
-            
-                for END_POSITION in DESTINATIONS:
-                    TO_COL = END_POSITION[1]
-                
-                    if (FROM_COL <= 6 and TO_COL > 6) or (FROM_COL > 6 and TO_COL <= 6):
-                        NEW_GRID = MOVE_CONTAINER(CURRENT_GRID, START_POSITION, END_POSITION)
-                        NEW_IMBALANCE = CALCULATE_BALANCE(NEW_GRID)
-                        NEW_MOVES = CURRENT_MOVES + [(START_POSITION, END_POSITION)]
-                    
-                        if NEW_IMBALANCE < CURRENT_IMBALANCE:
-                            CONTAINER_SOLVER_QUEUE.append((NEW_GRID, NEW_MOVES, NEW_IMBALANCE))
+        if ENGINE == 'BEAM':
+            with PHASE_TIMER(STATS, 'search'):
+                BEST_SOLUTION, BEST_COST = BEAM_SEARCH(PROBLEM, BUDGET, BEAM_WIDTH)
+            IS_OPTIMAL = False
+        elif ENGINE == 'TWO_PHASE':
+            with PHASE_TIMER(STATS, 'search'):
+                BEST_SOLUTION, BEST_COST = TWO_PHASE_SEARCH(PROBLEM, BUDGET)
+            IS_OPTIMAL = False
+        elif WORKERS > 1:
+            with PHASE_TIMER(STATS, 'search'):
+                BEST_SOLUTION, BEST_COST, IS_OPTIMAL, BUDGET.NODES_EXPANDED, BUDGET.EXHAUSTED_BY = ROOT_SPLIT_SEARCH(PROBLEM, WORKERS, NODE_BUDGET, MEMORY_BUDGET, TIME_BUDGET, STATS)
+        else:
+            # A quick incumbent bounds A* from the start and is still returned if the budget runs out before A* finishes
+            INCUMBENT = (None, float('inf'))
+            with PHASE_TIMER(STATS, 'incumbent'):
+                for INCUMBENT in INCUMBENT_PLANS(PROBLEM, BUDGET):
+                    pass
+            with PHASE_TIMER(STATS, 'search'):
+                BEST_SOLUTION, BEST_COST, IS_OPTIMAL = ASTAR_SEARCH(PROBLEM, BUDGET, INCUMBENT)
+    
+        if STATS is not None:
+            STATS.FINISH(BUDGET.TERMINATION(BEST_SOLUTION, IS_OPTIMAL))
+    
+        if CACHE_KEY is not None and IS_OPTIMAL:
+            CACHE.PUT(CACHE_KEY, BEST_SOLUTION, BEST_COST)
+    
+        if BEST_SOLUTION is None:
+            return None, GRID
+    
+        # Search states only carry weights, so rebuild the described grid by replaying the plan once
+        return BEST_SOLUTION, APPLY_MOVES(GRID, BEST_SOLUTION)
+
+# Checks whether the moves of SOLUTION can be made in turn from PROBLEM's initial state (each from the top of a stack
+# or the buffer onto a free slot) and end in a state the search would accept as a goal
+def IS_GOAL_PLAN(PROBLEM, SOLUTION):
+    INDEX = PROBLEM.LAYOUT.INDEX
+    STATE = PROBLEM.INITIAL_STATE
+    
+    for START_POSITION, END_POSITION in SOLUTION:
+        START_INDEX = INDEX.get(START_POSITION)
+        END_INDEX = INDEX.get(END_POSITION)
+        if START_INDEX not in STATE.ACCESSIBLE_CONTAINERS() or END_INDEX not in STATE.VALID_DESTINATIONS() + list(PROBLEM.BUFFER_SLOTS):
+            return False
+        STATE = STATE.MOVE(START_INDEX, END_INDEX)
+    
+    return PROBLEM.IS_GOAL(STATE, STATE.IMBALANCE())
+
+# Balances the ship as an anytime search: yields (moves, balanced grid, crane minutes, proven optimal) as soon as a
+# plan exists and again whenever a cheaper one is found, until optimality is proven or TIME_BUDGET seconds run out
+# (STATS, when given a SearchStats, is kept up to date as the search runs and says why it stopped once the generator
+# is done; CACHE is an optional SolutionCache whose hit is yielded straight away; GEOMETRY and BUFFER are as for
+# BALANCE_SHIP; setting the threading.Event CANCEL from another thread stops the search like a spent budget, keeping
+# the best plan yielded)
+def BALANCE_SHIP_ANYTIME(GRID, GEOMETRY=DEFAULT_GEOMETRY, TIME_BUDGET=None, NODE_BUDGET=None, MEMORY_BUDGET=None, FIRST_PLAN_BEAM_WIDTH=FIRST_PLAN_BEAM_WIDTH, STATS=None, CACHE=None, BUFFER=DEFAULT_BUFFER, CANCEL=None):
+    CONTAINER_COUNT = sum(1 for CELL in GRID.values() if CELL['weight'] > 0)
+    
+    if STATS is not None:
+        STATS.ENGINE = 'ANYTIME'
+    
+    with PHASE_TIMER(STATS, 'setup'):
+        LAYOUT = ShipLayout(GRID, GEOMETRY, BUFFER)
+        INITIAL_STATE = LAYOUT.INITIAL_STATE(GRID)
+        PROBLEM = BalanceProblem(LAYOUT, INITIAL_STATE)
+    
+    if PROBLEM.IS_BALANCED(INITIAL_STATE.IMBALANCE()):
+        if STATS is not None:
+            STATS.FINISH('already balanced')
+        yield [], GRID, 0, True
+        return
+    
+    # No split of these weights is legal, so the generator ends without a plan straight away
+    if not PROBLEM.IS_FEASIBLE():
+        if STATS is not None:
+            STATS.FINISH('infeasible')
+        return
+    
+    # Two containers on one side are solved directly by BALANCE_SHIP's shortcut, but its move is only taken as the
+    # answer when it is legal and leaves the ship in a goal state by the search's own rule; otherwise (and for two
+    # containers on opposite sides, which the shortcut does not handle) the ship is searched like any other
+    if CONTAINER_COUNT == 2:
+        SHORTCUT = BALANCE_SHIP(GRID, GEOMETRY, BUFFER=BUFFER)
+        if SHORTCUT is not None and SHORTCUT[0] and IS_GOAL_PLAN(PROBLEM, SHORTCUT[0]):
+            SOLUTION, FINAL_GRID = SHORTCUT
+            COST = CALCULATE_BALANCE_COST(SOLUTION, GEOMETRY, BUFFER, GRID)
+            if STATS is not None:
+                STATS.ENGINE = 'DIRECT'
+                STATS.FOUND_PLAN(SOLUTION, COST)
+                STATS.FINISH('two containers')
+            yield SOLUTION, FINAL_GRID, COST, True
+            return
+    
+    CACHE_KEY = None
+    if CACHE is not None:
+        CACHE_KEY = MANIFEST_KEY(GRID, GEOMETRY.PARK_POSITION, SEARCH_SETTINGS(BUFFER, GEOMETRY=GEOMETRY))
+        CACHED = CACHE.GET(CACHE_KEY)
+        if CACHED is not None:
+            if STATS is not None:
+                STATS.BEST_COST = CACHED[1]
+                STATS.FINISH('cache hit')
+            yield CACHED[0], APPLY_MOVES(GRID, CACHED[0]), CACHED[1], True
+            return
+    
+    BUDGET = SearchBudget(NODE_BUDGET, MEMORY_BUDGET, TIME_BUDGET, STATS, CANCEL)
+    
+    # A narrow beam gets a first feasible plan out within milliseconds; A* then only looks for something cheaper
+    INCUMBENT = (None, float('inf'))
+    for INCUMBENT in INCUMBENT_PLANS(PROBLEM, BUDGET, FIRST_PLAN_BEAM_WIDTH):
+        yield INCUMBENT[0], APPLY_MOVES(GRID, INCUMBENT[0]), INCUMBENT[1], False
+    
+    SOLUTION, IS_OPTIMAL = INCUMBENT[0], False
+    for SOLUTION, COST, IS_OPTIMAL in ASTAR_PLANS(PROBLEM, BUDGET, INCUMBENT):
+        if CACHE_KEY is not None and IS_OPTIMAL:
+            CACHE.PUT(CACHE_KEY, SOLUTION, COST)
+        yield SOLUTION, APPLY_MOVES(GRID, SOLUTION), COST, IS_OPTIMAL
     
-        return BEST_SOLUTION, BEST_GRID
\ No newline at end of file
+    if STATS is not None:
+        STATS.FINISH(BUDGET.TERMINATION(SOLUTION, IS_OPTIMAL))
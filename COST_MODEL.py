@@ -0,0 +1,159 @@
+from SHIP_STATE import DEFAULT_BUFFER, DEFAULT_GEOMETRY, IS_BUFFER_POSITION
+
+# Whether crane times account for lifting over the stacks between two columns (see CostModel.LEG_TIME)
+HEIGHT_AWARE_CRANE = True
+
+# Calculates the manhattan distance between positions
+def CALCULATE_MANHATTAN_DISTANCE(POSITION_1, POSITION_2):
+    return abs(POSITION_1[0] - POSITION_2[0]) + abs(POSITION_1[1] - POSITION_2[1])
+
+# Crane travel times for one bay GEOMETRY (a ShipGeometry), computed once: TABLE[i][j] is the time from slot i to slot
+# j, with slots numbered like ShipLayout.POSITIONS (the ship row by row, then the buffer nearest the gate first) and the
+# geometry's park position at PARK_INDEX (appended when it is not a slot itself). With HEIGHT_AWARE on, a trip between two ship slots
+# has to clear the tallest stack in the columns between them (see LEG_TIME), park included since it is a ship slot too;
+# only trips from or to the buffer, which leave the bay over its top anyway, keep the table time.
+class CostModel:
+    # Precomputes the travel table for the bay of GEOMETRY, its park position and optional BUFFER
+    def __init__(self, GEOMETRY=DEFAULT_GEOMETRY, BUFFER=DEFAULT_BUFFER, HEIGHT_AWARE=HEIGHT_AWARE_CRANE):
+        PARK_POSITION = GEOMETRY.PARK_POSITION
+        self.ROWS          = GEOMETRY.ROWS
+        self.COLS          = GEOMETRY.COLS
+        self.PARK_POSITION = PARK_POSITION
+        self.BUFFER        = BUFFER
+        self.HEIGHT_AWARE  = HEIGHT_AWARE
+
+        POSITIONS = GEOMETRY.POSITIONS()
+        if BUFFER is not None:
+            POSITIONS += BUFFER.POSITIONS
+        if PARK_POSITION not in POSITIONS:
+            POSITIONS.append(PARK_POSITION)
+
+        self.POSITIONS  = tuple(POSITIONS)
+        self.INDEX      = {POSITION: i for i, POSITION in enumerate(self.POSITIONS)}
+        self.PARK_INDEX = self.INDEX[PARK_POSITION]
+        self.TABLE      = [[self.DIRECT_TIME(FROM_POSITION, TO_POSITION) for TO_POSITION in self.POSITIONS]
+                           for FROM_POSITION in self.POSITIONS]
+
+        # Row of the table for every position, so the search gets any edge cost with one dict and one list index
+        self.TRAVEL_FROM = {POSITION: ROW for POSITION, ROW in zip(self.POSITIONS, self.TABLE)}
+
+    # Calculates the crane time between two positions with nothing in the way (manhattan within an area, through the
+    # gates plus the transfer penalty between the ship and the buffer)
+    def DIRECT_TIME(self, POSITION_1, POSITION_2):
+        if self.BUFFER is None or not (IS_BUFFER_POSITION(POSITION_1) or IS_BUFFER_POSITION(POSITION_2)):
+            return CALCULATE_MANHATTAN_DISTANCE(POSITION_1, POSITION_2)
+
+        return self.BUFFER.DISTANCE(POSITION_1, POSITION_2)
+
+    # Looks up the crane time between two positions
+    def TRAVEL_TIME(self, POSITION_1, POSITION_2):
+        return self.TRAVEL_FROM[POSITION_1][self.INDEX[POSITION_2]]
+
+    # Looks up the crane time from a position back to park
+    def PARK_TIME(self, POSITION):
+        return self.TRAVEL_FROM[POSITION][self.PARK_INDEX]
+
+    # Calculates the crane time between two ship slots when the crane must pass above TALLEST, the top occupied row
+    # of the columns strictly between them: it rises to the clearance row, crosses and comes down again (with nothing
+    # in the way this is the manhattan distance)
+    def CLEARED_TIME(self, POSITION_1, POSITION_2, TALLEST):
+        CLEARANCE_ROW = max(POSITION_1[0], POSITION_2[0], TALLEST + 1)
+        return abs(POSITION_1[1] - POSITION_2[1]) + 2 * CLEARANCE_ROW - POSITION_1[0] - POSITION_2[0]
+
+    # Calculates the crane time of one leg given the top occupied row of every ship column (HEIGHTS, indexed from 0;
+    # None or a height-blind model means the table time)
+    def LEG_TIME(self, POSITION_1, POSITION_2, HEIGHTS=None):
+        if HEIGHTS is None or not self.HEIGHT_AWARE or IS_BUFFER_POSITION(POSITION_1) or IS_BUFFER_POSITION(POSITION_2):
+            return self.TRAVEL_TIME(POSITION_1, POSITION_2)
+
+        LOW, HIGH = sorted((POSITION_1[1], POSITION_2[1]))
+        TALLEST = max(HEIGHTS[LOW:HIGH - 1], default=0)
+        return self.CLEARED_TIME(POSITION_1, POSITION_2, TALLEST)
+
+    # Calculates the top occupied row (containers and NAN slots alike) of every ship column of GRID
+    def COLUMN_HEIGHTS(self, GRID):
+        HEIGHTS = [0] * self.COLS
+
+        for (ROW, COL), CELL in GRID.items():
+            if 1 <= COL <= self.COLS and (CELL['weight'] > 0 or CELL['type'] == 'NAN'):
+                HEIGHTS[COL - 1] = max(HEIGHTS[COL - 1], ROW)
+
+        return HEIGHTS
+
+    # Calculates the crane time of every step of a plan: a (to source, source to destination) pair per move and the
+    # final trip back to park. GRID, the grid the plan starts from, is only needed by a height-aware model, which
+    # replays the stacks as the containers move.
+    def STEP_TIMES(self, CONTAINER_MOVES, GRID=None):
+        HEIGHTS = None
+        if self.HEIGHT_AWARE and GRID is not None:
+            OCCUPIED = {POSITION for POSITION, CELL in GRID.items() if CELL['weight'] > 0 or CELL['type'] == 'NAN'}
+            HEIGHTS = self.COLUMN_HEIGHTS(GRID)
+
+        STEPS = []
+        CURRENT_POSITION = self.PARK_POSITION
+
+        for START_POSITION, END_POSITION in CONTAINER_MOVES:
+            TIME_TO_SOURCE = self.LEG_TIME(CURRENT_POSITION, START_POSITION, HEIGHTS)
+
+            # The container is lifted out before it is carried, so its own column no longer counts
+            if HEIGHTS is not None:
+                OCCUPIED.discard(START_POSITION)
+                if not IS_BUFFER_POSITION(START_POSITION):
+                    COL = START_POSITION[1]
+                    HEIGHTS[COL - 1] = max((ROW for ROW, OCCUPIED_COL in OCCUPIED if OCCUPIED_COL == COL), default=0)
+
+            TIME_TO_DESTINATION = self.LEG_TIME(START_POSITION, END_POSITION, HEIGHTS)
+
+            if HEIGHTS is not None:
+                OCCUPIED.add(END_POSITION)
+                if not IS_BUFFER_POSITION(END_POSITION):
+                    HEIGHTS[END_POSITION[1] - 1] = max(HEIGHTS[END_POSITION[1] - 1], END_POSITION[0])
+
+            STEPS.append((TIME_TO_SOURCE, TIME_TO_DESTINATION))
+            CURRENT_POSITION = END_POSITION
+
+        return STEPS, self.LEG_TIME(CURRENT_POSITION, self.PARK_POSITION, HEIGHTS)
+
+    # Calculates the total crane time of a plan, from park through every move and back to park
+    def PLAN_COST(self, CONTAINER_MOVES, GRID=None):
+        if not CONTAINER_MOVES:
+            return 0
+
+        STEPS, TIME_TO_PARK = self.STEP_TIMES(CONTAINER_MOVES, GRID)
+        return sum(TIME_TO_SOURCE + TIME_TO_DESTINATION for TIME_TO_SOURCE, TIME_TO_DESTINATION in STEPS) + TIME_TO_PARK
+
+# Builds a sparse table over the top occupied row of every ship column (HEIGHTS, indexed from 0): level k holds the
+# tallest of every run of 2**k neighbouring columns, so CLEARANCE_BETWEEN answers any range in O(1)
+def BUILD_CLEARANCE_TABLE(HEIGHTS):
+    LEVEL = list(HEIGHTS)
+    CLEARANCE = [LEVEL]
+    WIDTH = 1
+
+    while 2 * WIDTH <= len(HEIGHTS):
+        LEVEL = [max(LEVEL[i], LEVEL[i + WIDTH]) for i in range(len(LEVEL) - WIDTH)]
+        CLEARANCE.append(LEVEL)
+        WIDTH *= 2
+
+    return CLEARANCE
+
+# Reads the tallest stack of the columns with indices LOW to HIGH - 1 from a clearance table (0 for an empty range)
+def CLEARANCE_BETWEEN(CLEARANCE, LOW, HIGH):
+    if HIGH <= LOW:
+        return 0
+
+    LEVEL = (HIGH - LOW).bit_length() - 1
+    ROW = CLEARANCE[LEVEL]
+    return max(ROW[LOW], ROW[HIGH - (1 << LEVEL)])
+
+# Cost models already built, keyed by geometry, so every solve of the same bay shares one table
+COST_MODELS = {}
+
+# Returns the cost model of a bay geometry, building its table the first time it is asked for (the divider does not
+# change crane times, so geometries differing only there share one)
+def GET_COST_MODEL(GEOMETRY=DEFAULT_GEOMETRY, BUFFER=DEFAULT_BUFFER, HEIGHT_AWARE=HEIGHT_AWARE_CRANE):
+    KEY = (GEOMETRY.ROWS, GEOMETRY.COLS, GEOMETRY.PARK_POSITION, None if BUFFER is None else BUFFER.SETTINGS(), HEIGHT_AWARE)
+
+    if KEY not in COST_MODELS:
+        COST_MODELS[KEY] = CostModel(GEOMETRY, BUFFER, HEIGHT_AWARE)
+
+    return COST_MODELS[KEY]
@@ -1,17 +1,27 @@
+import threading
 import tkinter as tk
 from tkinter import ttk
+from CONTAINER_SOLVER import BALANCE_SHIP_ANYTIME, MOVE_CHANGES
+from COST_MODEL import GET_COST_MODEL
+from HELPER_FUNCTIONS import FORMAT_POSITION
+from SHIP_STATE import DEFAULT_GEOMETRY, IS_BUFFER_POSITION, ShipLayout
 
 # GUI class for visualizing ship balancing operations
 class ShipBalanceGUI:
-    # Initialize the GUI with grid data and solution moves
-    def __init__(self, ROOT, GRID, SOLUTION, SHIP_NAME):
+    # Initialize the GUI with grid data and solution moves (GEOMETRY is the ShipGeometry the grid was read as)
+    def __init__(self, ROOT, GRID, SOLUTION, SHIP_NAME, GEOMETRY=DEFAULT_GEOMETRY):
         self.ROOT          = ROOT
         self.ROOT.title(f"Ship Balancing Visualization - {SHIP_NAME}")
         self.GRID          = GRID
         self.SOLUTION      = SOLUTION
+        self.GEOMETRY      = GEOMETRY
+        self.ROWS          = GEOMETRY.ROWS
+        self.COLS          = GEOMETRY.COLS
         self.CURRENT_STEP  = 0
-        self.CELL_SIZE     = 60
-        self.PARK_POS      = (1, 8)
+        self.PARK_POS      = GEOMETRY.PARK_POSITION
+        
+        # Wide multi-bay ships get smaller cells so the whole bay still fits on screen
+        self.CELL_SIZE     = max(36, min(60, 1440 // self.COLS))
         
         self.EXPANDED_STEPS = self.CREATE_EXPANDED_STEPS()
         
@@ -21,8 +31,8 @@ class ShipBalanceGUI:
         TITLE = ttk.Label(self.MAIN_FRAME, text=f"Ship: {SHIP_NAME}", font=('Arial', 16, 'bold'))
         TITLE.grid(row=0, column=0, columnspan=2, pady=10)
         
-        self.CANVAS = tk.Canvas(self.MAIN_FRAME, width=self.CELL_SIZE*12+50, 
-                                height=self.CELL_SIZE*8+50, bg='white')
+        self.CANVAS = tk.Canvas(self.MAIN_FRAME, width=self.CELL_SIZE*self.COLS+50, 
+                                height=self.CELL_SIZE*self.ROWS+50, bg='white')
         self.CANVAS.grid(row=1, column=0, columnspan=2, padx=10, pady=10)
         
         self.INFO_FRAME = ttk.LabelFrame(self.MAIN_FRAME, text="Information", padding="10")
@@ -52,188 +62,158 @@ class ShipBalanceGUI:
                                        command=self.RESET_VIEW)
         self.RESET_BUTTON.grid(row=0, column=2, padx=5)
         
-        self.INITIAL_GRID = {}
-        for pos, cell in self.GRID.items():
-            self.INITIAL_GRID[pos] = cell.copy()
-        
-        self.GRID_STATES = []
-        self.APPLY_MOVES()
+        # One working grid, moved forward and back through the steps by their recorded cell changes
+        self.CURRENT_GRID = dict(self.GRID)
+        self.HIGHLIGHTS   = {}
+        self.RECORD_STEP_CHANGES()
         
-        self.DRAW_GRID()
+        self.BUILD_CANVAS()
         self.UPDATE_INFO()
     
-    # Create expanded step list that includes PARK movements
+    # Create expanded step list that includes PARK movements (step times come from the shared cost model)
     def CREATE_EXPANDED_STEPS(self):
         EXPANDED = []
+        STEP_TIMES, TIME_DEST_TO_PARK = GET_COST_MODEL(self.GEOMETRY).STEP_TIMES(self.SOLUTION, self.GRID)
         
         for i, MOVE in enumerate(self.SOLUTION, 1):
             FROM_POS, TO_POS = MOVE
             
             if i == 1:
-                TIME_TO_SOURCE = abs(self.PARK_POS[0] - FROM_POS[0]) + abs(self.PARK_POS[1] - FROM_POS[1])
+                TIME_TO_SOURCE = STEP_TIMES[i-1][0]
                 EXPANDED.append({
                     'type': 'to_source',
                     'move_num': i,
                     'from': self.PARK_POS,
                     'to': FROM_POS,
                     'time': TIME_TO_SOURCE,
-                    'description': f"{i} of {len(self.SOLUTION)}: Move from PARK to [{FROM_POS[0]:02d},{FROM_POS[1]:02d}], {TIME_TO_SOURCE} minutes"
+                    'description': f"{i} of {len(self.SOLUTION)}: Move from PARK to {FORMAT_POSITION(FROM_POS)}, {TIME_TO_SOURCE} minutes"
                 })
             else:
                 PREV_POS = self.SOLUTION[i-2][1]
-                TIME_TO_SOURCE = abs(PREV_POS[0] - FROM_POS[0]) + abs(PREV_POS[1] - FROM_POS[1])
+                TIME_TO_SOURCE = STEP_TIMES[i-1][0]
                 EXPANDED.append({
                     'type': 'to_source',
                     'move_num': i,
                     'from': PREV_POS,
                     'to': FROM_POS,
                     'time': TIME_TO_SOURCE,
-                    'description': f"{i} of {len(self.SOLUTION)}: Move from [{PREV_POS[0]:02d},{PREV_POS[1]:02d}] to [{FROM_POS[0]:02d},{FROM_POS[1]:02d}], {TIME_TO_SOURCE} minutes"
+                    'description': f"{i} of {len(self.SOLUTION)}: Move from {FORMAT_POSITION(PREV_POS)} to {FORMAT_POSITION(FROM_POS)}, {TIME_TO_SOURCE} minutes"
                 })
             
-            TIME_SOURCE_TO_DEST = abs(FROM_POS[0] - TO_POS[0]) + abs(FROM_POS[1] - TO_POS[1])
+            TIME_SOURCE_TO_DEST = STEP_TIMES[i-1][1]
             EXPANDED.append({
                 'type': 'move_container',
                 'move_num': i,
                 'from': FROM_POS,
                 'to': TO_POS,
                 'time': TIME_SOURCE_TO_DEST,
-                'description': f"{i} of {len(self.SOLUTION)}: Move container in [{FROM_POS[0]:02d},{FROM_POS[1]:02d}] to [{TO_POS[0]:02d},{TO_POS[1]:02d}], {TIME_SOURCE_TO_DEST} minutes"
+                'description': f"{i} of {len(self.SOLUTION)}: Move container in {FORMAT_POSITION(FROM_POS)} to {FORMAT_POSITION(TO_POS)}, {TIME_SOURCE_TO_DEST} minutes"
             })
         
         # Final step: return to PARK from last destination
         LAST_POS = self.SOLUTION[-1][1]
-        TIME_DEST_TO_PARK = abs(LAST_POS[0] - self.PARK_POS[0]) + abs(LAST_POS[1] - self.PARK_POS[1])
         EXPANDED.append({
             'type': 'to_park',
             'move_num': len(self.SOLUTION),
             'from': LAST_POS,
             'to': self.PARK_POS,
             'time': TIME_DEST_TO_PARK,
-            'description': f"{len(self.SOLUTION)} of {len(self.SOLUTION)}: Move from [{LAST_POS[0]:02d},{LAST_POS[1]:02d}] to PARK, {TIME_DEST_TO_PARK} minutes"
+            'description': f"{len(self.SOLUTION)} of {len(self.SOLUTION)}: Move from {FORMAT_POSITION(LAST_POS)} to PARK, {TIME_DEST_TO_PARK} minutes"
         })
         
         return EXPANDED
     
-    # Apply each move to create grid states for each step
-    def APPLY_MOVES(self):
-        CURRENT_GRID = {}
-        for pos, cell in self.INITIAL_GRID.items():
-            CURRENT_GRID[pos] = cell.copy()
+    # Record the cells each step changes (only container moves change any) and the side weights after every step
+    # (tracked incrementally), instead of a copy of the whole grid per step
+    def RECORD_STEP_CHANGES(self):
+        WORKING_GRID = dict(self.CURRENT_GRID)
+        
+        INITIAL_STATE = ShipLayout(WORKING_GRID, self.GEOMETRY).INITIAL_STATE(WORKING_GRID)
+        PORT_WEIGHT = INITIAL_STATE.PORT_WEIGHT
+        STARBOARD_WEIGHT = INITIAL_STATE.STARBOARD_WEIGHT
         
-        self.GRID_STATES.append(CURRENT_GRID.copy())
+        self.STEP_CHANGES = []
+        self.SIDE_WEIGHTS = [(PORT_WEIGHT, STARBOARD_WEIGHT)]
         
         for STEP in self.EXPANDED_STEPS:
-            if STEP['type'] == 'to_source':
-                self.GRID_STATES.append(CURRENT_GRID.copy())
-            elif STEP['type'] == 'move_container':
+            CHANGES = ()
+            
+            if STEP['type'] == 'move_container':
                 FROM_POS = STEP['from']
                 TO_POS = STEP['to']
-                NEW_GRID = {}
                 
-                for POSITION in CURRENT_GRID:
-                    if POSITION == FROM_POS:
-                        NEW_GRID[POSITION] = {'weight': 0, 'type': 'UNUSED', 'description': 'UNUSED'}
-                    elif POSITION == TO_POS:
-                        NEW_GRID[POSITION] = {
-                            'weight': CURRENT_GRID[FROM_POS]['weight'],
-                            'type': CURRENT_GRID[TO_POS]['type'],
-                            'description': CURRENT_GRID[FROM_POS]['description']
-                        }
+                # Only a move across the divider or to or from the buffer (which belongs to neither side) changes the side totals
+                WEIGHT = WORKING_GRID[FROM_POS]['weight']
+                if not IS_BUFFER_POSITION(FROM_POS):
+                    if self.GEOMETRY.IS_PORT(FROM_POS[1]):
+                        PORT_WEIGHT -= WEIGHT
+                    else:
+                        STARBOARD_WEIGHT -= WEIGHT
+                if not IS_BUFFER_POSITION(TO_POS):
+                    if self.GEOMETRY.IS_PORT(TO_POS[1]):
+                        PORT_WEIGHT += WEIGHT
                     else:
-                        NEW_GRID[POSITION] = CURRENT_GRID[POSITION].copy()
+                        STARBOARD_WEIGHT += WEIGHT
                 
-                self.GRID_STATES.append(NEW_GRID)
-                CURRENT_GRID = NEW_GRID
-            elif STEP['type'] == 'to_park':
-                self.GRID_STATES.append(CURRENT_GRID.copy())
+                CHANGES = MOVE_CHANGES(WORKING_GRID, FROM_POS, TO_POS)
+                self.SET_CELLS(WORKING_GRID, CHANGES)
+            
+            self.STEP_CHANGES.append(CHANGES)
+            self.SIDE_WEIGHTS.append((PORT_WEIGHT, STARBOARD_WEIGHT))
     
-    # Draw the ship grid on the canvas
-    def DRAW_GRID(self):
-        self.CANVAS.delete("all")
-        
-        CURRENT_GRID = self.GRID_STATES[self.CURRENT_STEP]
-        
-        for COL in range(1, 13):
+    # Apply recorded cell changes to a grid, or take them back with UNDO
+    @staticmethod
+    def SET_CELLS(GRID, CHANGES, UNDO=False):
+        for POSITION, BEFORE, AFTER in (reversed(CHANGES) if UNDO else CHANGES):
+            CELL = BEFORE if UNDO else AFTER
+            if CELL is None:
+                GRID.pop(POSITION, None)
+            else:
+                GRID[POSITION] = CELL
+    
+    # Find the top left corner of a slot on the canvas
+    def CELL_ORIGIN(self, POSITION):
+        ROW, COL = POSITION
+        return 25 + (COL - 1) * self.CELL_SIZE, 30 + (self.ROWS - ROW) * self.CELL_SIZE
+    
+    # Create every canvas item once: the column numbers, the divider, the legend, one tagged box and set of labels per
+    # slot ("box", "weight" and "description" followed by "_ROW_COL") and the move arrow; stepping only reconfigures them
+    def BUILD_CANVAS(self):
+        for COL in range(1, self.COLS + 1):
             X = 25 + (COL - 1) * self.CELL_SIZE + self.CELL_SIZE // 2
             self.CANVAS.create_text(X, 15, text=str(COL), font=('Arial', 10, 'bold'))
         
-        DIVIDER_X = 25 + 6 * self.CELL_SIZE
-        self.CANVAS.create_line(DIVIDER_X, 30, DIVIDER_X, 30 + 8 * self.CELL_SIZE, 
-                                width=3, fill='red', dash=(5, 5))
+        DIVIDER_X = 25 + self.GEOMETRY.DIVIDER * self.CELL_SIZE
         
-        HIGHLIGHT_FROM = None
-        HIGHLIGHT_TO = None
-        
-        if self.CURRENT_STEP > 0 and self.CURRENT_STEP <= len(self.EXPANDED_STEPS):
-            STEP_INFO = self.EXPANDED_STEPS[self.CURRENT_STEP - 1]
+        for POSITION, CELL in self.CURRENT_GRID.items():
+            if IS_BUFFER_POSITION(POSITION):
+                continue
             
-            if STEP_INFO['from'] != self.PARK_POS:
-                HIGHLIGHT_FROM = STEP_INFO['from']
-            if STEP_INFO['to'] != self.PARK_POS:
-                HIGHLIGHT_TO = STEP_INFO['to']
-        
-        for ROW in range(8, 0, -1):
-            for COL in range(1, 13):
-                X    = 25 + (COL - 1) * self.CELL_SIZE
-                Y    = 30 + (8 - ROW) * self.CELL_SIZE
-                CELL = CURRENT_GRID.get((ROW, COL))
-                
-                if not CELL:
-                    continue
-                
-                if CELL['type'] == 'NAN':
-                    COLOR   = '#808080'
-                    OUTLINE = 'black'
-                elif CELL['weight'] > 0:
-                    COLOR   = '#4CAF50'
-                    OUTLINE = 'black'
-                else:
-                    COLOR   = '#E0E0E0'
-                    OUTLINE = 'gray'
-                
-                WIDTH = 1
-                
-                if (ROW, COL) == HIGHLIGHT_FROM:
-                    OUTLINE = 'blue'
-                    WIDTH   = 3
-                elif (ROW, COL) == HIGHLIGHT_TO:
-                    OUTLINE = 'orange'
-                    WIDTH   = 3
-                
-                self.CANVAS.create_rectangle(X, Y, X + self.CELL_SIZE, Y + self.CELL_SIZE,
-                                            fill=COLOR, outline=OUTLINE, width=WIDTH)
-                
-                self.CANVAS.create_text(X + 5, Y + 5, 
-                                       text=f"[{ROW},{COL}]", 
-                                       anchor=tk.NW, font=('Arial', 7))
-                
-                if CELL['weight'] > 0:
-                    self.CANVAS.create_text(X + self.CELL_SIZE // 2, Y + self.CELL_SIZE // 2 - 5,
-                                           text=f"{CELL['weight']} kg", 
-                                           font=('Arial', 8, 'bold'))
-                    DESC = CELL['description']
-                    if len(DESC) > 10:
-                        DESC = DESC[:8] + "..."
-                    self.CANVAS.create_text(X + self.CELL_SIZE // 2, Y + self.CELL_SIZE // 2 + 8,
-                                           text=DESC, font=('Arial', 7))
-                elif CELL['type'] == 'NAN':
-                    self.CANVAS.create_text(X + self.CELL_SIZE // 2, Y + self.CELL_SIZE // 2,
-                                           text="NAN", font=('Arial', 8, 'bold'))
-        
-        if HIGHLIGHT_FROM and HIGHLIGHT_TO and HIGHLIGHT_FROM != HIGHLIGHT_TO:
-            STEP_INFO = self.EXPANDED_STEPS[self.CURRENT_STEP - 1] if self.CURRENT_STEP > 0 else None
+            ROW, COL = POSITION
+            X, Y = self.CELL_ORIGIN(POSITION)
+            SUFFIX = f"_{ROW}_{COL}"
             
-            if STEP_INFO and STEP_INFO['type'] == 'move_container':
-                X1 = 25 + (HIGHLIGHT_FROM[1] - 1) * self.CELL_SIZE + self.CELL_SIZE // 2
-                Y1 = 30 + (8 - HIGHLIGHT_FROM[0]) * self.CELL_SIZE + self.CELL_SIZE // 2
-                X2 = 25 + (HIGHLIGHT_TO[1] - 1) * self.CELL_SIZE + self.CELL_SIZE // 2
-                Y2 = 30 + (8 - HIGHLIGHT_TO[0]) * self.CELL_SIZE + self.CELL_SIZE // 2
-                
-                self.CANVAS.create_line(X1, Y1, X2, Y2, arrow=tk.LAST, width=3, 
-                                       fill='red', dash=(5, 3))
+            self.CANVAS.create_rectangle(X, Y, X + self.CELL_SIZE, Y + self.CELL_SIZE, tags=('box', 'box' + SUFFIX))
+            self.CANVAS.create_text(X + 5, Y + 5, 
+                                   text=f"[{ROW},{COL}]", 
+                                   anchor=tk.NW, font=('Arial', 7))
+            
+            if CELL['type'] == 'NAN':
+                self.CANVAS.create_text(X + self.CELL_SIZE // 2, Y + self.CELL_SIZE // 2,
+                                       text="NAN", font=('Arial', 8, 'bold'))
+            self.CANVAS.create_text(X + self.CELL_SIZE // 2, Y + self.CELL_SIZE // 2 - 5,
+                                   text="", font=('Arial', 8, 'bold'), tags=('weight', 'weight' + SUFFIX))
+            self.CANVAS.create_text(X + self.CELL_SIZE // 2, Y + self.CELL_SIZE // 2 + 8,
+                                   text="", font=('Arial', 7), tags=('description', 'description' + SUFFIX))
+            
+            self.DRAW_CELL(POSITION)
+        
+        self.CANVAS.create_line(DIVIDER_X, 30, DIVIDER_X, 30 + self.ROWS * self.CELL_SIZE, 
+                                width=3, fill='red', dash=(5, 5))
+        self.CANVAS.create_line(0, 0, 0, 0, arrow=tk.LAST, width=3, 
+                                fill='red', dash=(5, 3), state='hidden', tags=('arrow',))
         
-        LEGEND_Y = 30 + 8 * self.CELL_SIZE + 20
+        LEGEND_Y = 30 + self.ROWS * self.CELL_SIZE + 20
         self.CANVAS.create_rectangle(25, LEGEND_Y, 45, LEGEND_Y + 15, fill='#4CAF50')
         self.CANVAS.create_text(50, LEGEND_Y + 7, text="Container", anchor=tk.W, font=('Arial', 9))
         
@@ -243,21 +223,99 @@ class ShipBalanceGUI:
         self.CANVAS.create_rectangle(200, LEGEND_Y, 220, LEGEND_Y + 15, fill='#808080')
         self.CANVAS.create_text(225, LEGEND_Y + 7, text="Unavailable", anchor=tk.W, font=('Arial', 9))
     
-    # Calculate port and starboard weights for current state
-    def CALCULATE_BALANCE_INFO(self):
-        CURRENT_GRID = self.GRID_STATES[self.CURRENT_STEP]
-        PORT_WEIGHT      = 0
-        STARBOARD_WEIGHT = 0
-        
-        for ROW in range(1, 9):
-            for COL in range(1, 13):
-                CELL = CURRENT_GRID.get((ROW, COL))
-                if CELL and CELL['weight'] > 0:
-                    if COL <= 6:
-                        PORT_WEIGHT += CELL['weight']
-                    else:
-                        STARBOARD_WEIGHT += CELL['weight']
+    # Bring one slot's box and labels up to date with the working grid and the highlights of the current step
+    def DRAW_CELL(self, POSITION):
+        CELL = self.CURRENT_GRID.get(POSITION)
+        if CELL is None or IS_BUFFER_POSITION(POSITION):
+            return
+        
+        if CELL['type'] == 'NAN':
+            COLOR   = '#808080'
+            OUTLINE = 'black'
+        elif CELL['weight'] > 0:
+            COLOR   = '#4CAF50'
+            OUTLINE = 'black'
+        else:
+            COLOR   = '#E0E0E0'
+            OUTLINE = 'gray'
+        
+        OUTLINE, WIDTH = self.HIGHLIGHTS.get(POSITION, (OUTLINE, 1))
+        
+        WEIGHT_TEXT = ""
+        DESC = ""
+        if CELL['weight'] > 0:
+            WEIGHT_TEXT = f"{CELL['weight']} kg"
+            DESC = CELL['description']
+            if len(DESC) > 10:
+                DESC = DESC[:8] + "..."
+        
+        SUFFIX = f"_{POSITION[0]}_{POSITION[1]}"
+        self.CANVAS.itemconfigure('box' + SUFFIX, fill=COLOR, outline=OUTLINE, width=WIDTH)
+        self.CANVAS.itemconfigure('weight' + SUFFIX, text=WEIGHT_TEXT)
+        self.CANVAS.itemconfigure('description' + SUFFIX, text=DESC)
+    
+    # Work out which slots the current step highlights: its start in blue and its end in orange (park is not a slot)
+    def STEP_HIGHLIGHTS(self):
+        if self.CURRENT_STEP == 0:
+            return {}
+        
+        STEP_INFO = self.EXPANDED_STEPS[self.CURRENT_STEP - 1]
+        HIGHLIGHTS = {}
+        if STEP_INFO['to'] != self.PARK_POS:
+            HIGHLIGHTS[STEP_INFO['to']] = ('orange', 3)
+        if STEP_INFO['from'] != self.PARK_POS:
+            HIGHLIGHTS[STEP_INFO['from']] = ('blue', 3)
+        return HIGHLIGHTS
+    
+    # Point the arrow along the current step when it moves a container, and hide it otherwise
+    def DRAW_ARROW(self):
+        STEP_INFO = self.EXPANDED_STEPS[self.CURRENT_STEP - 1] if self.CURRENT_STEP > 0 else None
+        
+        if not STEP_INFO or STEP_INFO['type'] != 'move_container' or STEP_INFO['from'] == STEP_INFO['to']:
+            self.CANVAS.itemconfigure('arrow', state='hidden')
+            return
+        
+        # The buffer is off the canvas to the left, so arrows to or from it end at the left edge by the gate
+        ENDS = []
+        for POSITION in (STEP_INFO['from'], STEP_INFO['to']):
+            if IS_BUFFER_POSITION(POSITION):
+                ENDS += [0, 30]
+            else:
+                X, Y = self.CELL_ORIGIN(POSITION)
+                ENDS += [X + self.CELL_SIZE // 2, Y + self.CELL_SIZE // 2]
+        
+        self.CANVAS.coords('arrow', *ENDS)
+        self.CANVAS.itemconfigure('arrow', state='normal')
+        self.CANVAS.tag_raise('arrow')
+    
+    # Step the working grid to TARGET through the recorded changes and redraw only the slots that changed or whose
+    # highlight did
+    def SHOW_STEP(self, TARGET):
+        DIRTY = set(self.HIGHLIGHTS)
+        
+        while self.CURRENT_STEP < TARGET:
+            CHANGES = self.STEP_CHANGES[self.CURRENT_STEP]
+            self.SET_CELLS(self.CURRENT_GRID, CHANGES)
+            DIRTY.update(POSITION for POSITION, _, _ in CHANGES)
+            self.CURRENT_STEP += 1
         
+        while self.CURRENT_STEP > TARGET:
+            self.CURRENT_STEP -= 1
+            CHANGES = self.STEP_CHANGES[self.CURRENT_STEP]
+            self.SET_CELLS(self.CURRENT_GRID, CHANGES, UNDO=True)
+            DIRTY.update(POSITION for POSITION, _, _ in CHANGES)
+        
+        self.HIGHLIGHTS = self.STEP_HIGHLIGHTS()
+        DIRTY.update(self.HIGHLIGHTS)
+        
+        for POSITION in DIRTY:
+            self.DRAW_CELL(POSITION)
+        self.DRAW_ARROW()
+        self.UPDATE_INFO()
+    
+    # Look up port and starboard weights for current state (tracked incrementally in RECORD_STEP_CHANGES)
+    def CALCULATE_BALANCE_INFO(self):
+        PORT_WEIGHT, STARBOARD_WEIGHT = self.SIDE_WEIGHTS[self.CURRENT_STEP]
         IMBALANCE = abs(PORT_WEIGHT - STARBOARD_WEIGHT)
         return PORT_WEIGHT, STARBOARD_WEIGHT, IMBALANCE
     
@@ -283,30 +341,125 @@ class ShipBalanceGUI:
     # Move to next step in the visualization
     def NEXT_STEP(self):
         if self.CURRENT_STEP < len(self.EXPANDED_STEPS):
-            self.CURRENT_STEP += 1
-            self.DRAW_GRID()
-            self.UPDATE_INFO()
+            self.SHOW_STEP(self.CURRENT_STEP + 1)
     
     # Move to previous step in the visualization
     def PREV_STEP(self):
         if self.CURRENT_STEP > 0:
-            self.CURRENT_STEP -= 1
-            self.DRAW_GRID()
-            self.UPDATE_INFO()
+            self.SHOW_STEP(self.CURRENT_STEP - 1)
     
     # Reset to initial state
     def RESET_VIEW(self):
-        self.CURRENT_STEP = 0
-        self.DRAW_GRID()
-        self.UPDATE_INFO()
+        self.SHOW_STEP(0)
 
 
+# Window that runs BALANCE_SHIP_ANYTIME on a worker thread and shows its progress (polled from STATS, a SearchStats, on
+# the Tk thread) until the search stops; Cancel, or closing the window, stops it early with the best plan found so far
+class SolverProgressGUI:
+    # Open the window and start the search
+    def __init__(self, ROOT, GRID, SHIP_NAME, STATS, TIME_BUDGET=None, CACHE=None, GEOMETRY=DEFAULT_GEOMETRY, POLL_INTERVAL=100):
+        self.ROOT          = ROOT
+        self.ROOT.title(f"Ship Balancing - {SHIP_NAME}")
+        self.GRID          = GRID
+        self.GEOMETRY      = GEOMETRY
+        self.STATS         = STATS
+        self.TIME_BUDGET   = TIME_BUDGET
+        self.CACHE         = CACHE
+        self.POLL_INTERVAL = POLL_INTERVAL
+        self.CANCEL        = threading.Event()
+        
+        # Latest (moves, balanced grid, crane minutes, proven optimal) yielded, replaced whole so the Tk thread never
+        # sees half of one; ERROR holds whatever the search raised, for SOLVE_WITH_PROGRESS to raise again
+        self.RESULT        = (None, GRID, None, False)
+        self.ERROR         = None
+        
+        self.MAIN_FRAME    = ttk.Frame(ROOT, padding="10")
+        self.MAIN_FRAME.grid(row=0, column=0, sticky=(tk.W, tk.E, tk.N, tk.S))
+        
+        TITLE = ttk.Label(self.MAIN_FRAME, text=f"Ship: {SHIP_NAME}", font=('Arial', 16, 'bold'))
+        TITLE.grid(row=0, column=0, pady=10)
+        
+        self.INFO_FRAME = ttk.LabelFrame(self.MAIN_FRAME, text="Search", padding="10")
+        self.INFO_FRAME.grid(row=1, column=0, sticky=(tk.W, tk.E), pady=10)
+        
+        self.STATUS_LABEL = ttk.Label(self.INFO_FRAME, text="Calculating solution...", font=('Arial', 10, 'bold'))
+        self.STATUS_LABEL.grid(row=0, column=0, sticky=tk.W)
+        
+        self.NODES_LABEL = ttk.Label(self.INFO_FRAME, text="", font=('Arial', 10))
+        self.NODES_LABEL.grid(row=1, column=0, sticky=tk.W)
+        
+        self.IMBALANCE_LABEL = ttk.Label(self.INFO_FRAME, text="", font=('Arial', 10))
+        self.IMBALANCE_LABEL.grid(row=2, column=0, sticky=tk.W)
+        
+        self.PLAN_LABEL = ttk.Label(self.INFO_FRAME, text="", font=('Arial', 10))
+        self.PLAN_LABEL.grid(row=3, column=0, sticky=tk.W)
+        
+        self.CANCEL_BUTTON = ttk.Button(self.MAIN_FRAME, text="Cancel (keep best plan)", 
+                                        command=self.CANCEL_SEARCH)
+        self.CANCEL_BUTTON.grid(row=2, column=0, pady=10)
+        
+        self.ROOT.protocol("WM_DELETE_WINDOW", self.CANCEL_SEARCH)
+        
+        self.WORKER = threading.Thread(target=self.SOLVE, name='Solver', daemon=True)
+        self.WORKER.start()
+        self.POLL()
+    
+    # Run the search on the worker thread, keeping each plan it yields
+    def SOLVE(self):
+        try:
+            for self.RESULT in BALANCE_SHIP_ANYTIME(self.GRID, self.GEOMETRY, TIME_BUDGET=self.TIME_BUDGET, STATS=self.STATS, 
+                                                    CACHE=self.CACHE, CANCEL=self.CANCEL):
+                pass
+        except Exception as ERROR:
+            self.ERROR = ERROR
+    
+    # Show how far the search has got, and close the window once it has stopped
+    def POLL(self):
+        SOLUTION, _, PLAN_COST, IS_OPTIMAL = self.RESULT
+        BEST_IMBALANCE = self.STATS.BEST_IMBALANCE
+        
+        self.NODES_LABEL.config(text=f"Nodes expanded: {self.STATS.NODES_EXPANDED}")
+        self.IMBALANCE_LABEL.config(
+            text=f"Best imbalance reached: {'-' if BEST_IMBALANCE is None else f'{BEST_IMBALANCE} kg'}"
+        )
+        if SOLUTION is None:
+            self.PLAN_LABEL.config(text="Best plan so far: none yet")
+        else:
+            PLAN_STATUS = "Optimal plan" if IS_OPTIMAL else "Best plan so far"
+            self.PLAN_LABEL.config(text=f"{PLAN_STATUS}: {len(SOLUTION)} container moves, {PLAN_COST} minutes")
+        
+        if self.WORKER.is_alive():
+            self.ROOT.after(self.POLL_INTERVAL, self.POLL)
+        else:
+            self.ROOT.destroy()
+    
+    # Ask the search to stop; it does so at its next node and the window closes on the following poll
+    def CANCEL_SEARCH(self):
+        self.CANCEL.set()
+        self.CANCEL_BUTTON.config(state='disabled')
+        self.STATUS_LABEL.config(text="Stopping search...")
+
+# Solve GRID on a worker thread behind a progress window and return the last (moves, balanced grid, crane minutes,
+# proven optimal) found, moves being None when there is no plan; STATS and GEOMETRY are as for BALANCE_SHIP_ANYTIME.
+# Raises tk.TclError when no display is available, so callers can fall back to solving in the terminal.
+def SOLVE_WITH_PROGRESS(GRID, SHIP_NAME, STATS, TIME_BUDGET=None, CACHE=None, GEOMETRY=DEFAULT_GEOMETRY):
+    ROOT = tk.Tk()
+    APP  = SolverProgressGUI(ROOT, GRID, SHIP_NAME, STATS, TIME_BUDGET, CACHE, GEOMETRY)
+    ROOT.mainloop()
+    
+    # Stops a search still running if the window went away some other way
+    APP.CANCEL.set()
+    APP.WORKER.join()
+    if APP.ERROR is not None:
+        raise APP.ERROR
+    return APP.RESULT
+
 # Create and show the GUI visualization window
-def SHOW_BALANCE_VISUALIZATION(GRID, SOLUTION, SHIP_NAME):
+def SHOW_BALANCE_VISUALIZATION(GRID, SOLUTION, SHIP_NAME, GEOMETRY=DEFAULT_GEOMETRY):
     if not SOLUTION:
         print("No moves to visualize - ship is already balanced.")
         return
     
     ROOT = tk.Tk()
-    APP  = ShipBalanceGUI(ROOT, GRID, SOLUTION, SHIP_NAME)
+    APP  = ShipBalanceGUI(ROOT, GRID, SOLUTION, SHIP_NAME, GEOMETRY)
     ROOT.mainloop()
\ No newline at end of file
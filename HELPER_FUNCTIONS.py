@@ -1,85 +1,143 @@
+import io
 import os
+import re
 from datetime import datetime, timedelta
+from OUTPUT_WRITER import DEFAULT_OUTPUT_DIR, WRITE_ATOMICALLY
+from SHIP_STATE import BAY_GEOMETRY, DEFAULT_GEOMETRY, IS_BUFFER_POSITION
 
-# Analyzes and extracts information from the manifest file
-def PARSE_MANIFEST_FILE(FILENAME):
+# One manifest line: "[RR,CC], {WWWWW}, DESCRIPTION" (trailing blanks and a Windows line ending are allowed)
+MANIFEST_LINE = re.compile(r'\[(\d+),(\d+)\],[ \t]*\{(\d{1,5})\},[ \t]*(\S(?:.*\S)?)[ \t\r]*$')
+
+# Raised for a manifest that cannot be trusted, naming the manifest and the offending line
+class ManifestError(ValueError):
+    # Builds the message "NAME, line N: PROBLEM" (LINE_NUMBER is None for problems with the manifest as a whole)
+    def __init__(self, NAME, LINE_NUMBER, PROBLEM):
+        self.NAME        = NAME
+        self.LINE_NUMBER = LINE_NUMBER
+        self.PROBLEM     = PROBLEM
+        super().__init__(f"{NAME}: {PROBLEM}" if LINE_NUMBER is None else f"{NAME}, line {LINE_NUMBER}: {PROBLEM}")
+
+# Turns a manifest source into lines of text: a text file object is read as it is, an open binary file line by line,
+# and str or bytes contents in memory
+def MANIFEST_LINES(SOURCE):
+    if isinstance(SOURCE, io.TextIOBase):
+        return SOURCE
+    if isinstance(SOURCE, str):
+        return io.StringIO(SOURCE)
+    if isinstance(SOURCE, (bytes, bytearray, memoryview)):
+        return io.StringIO(bytes(SOURCE).decode())
+    return (LINE.decode() for LINE in SOURCE)
+
+# Yields the lines of a manifest source (see MANIFEST_LINES), raising a ManifestError rather than a UnicodeDecodeError
+# when it is not UTF-8 text (NAME labels the manifest in the message)
+def DECODED_LINES(SOURCE, NAME='manifest'):
+    try:
+        yield from MANIFEST_LINES(SOURCE)
+    except UnicodeDecodeError:
+        raise ManifestError(NAME, None, "not a text manifest") from None
+
+# Builds the grid of the bay of GEOMETRY (a ShipGeometry) from a manifest in one pass over its lines, streamed from
+# SOURCE (see MANIFEST_LINES); every slot must be listed exactly once, and anything else raises a ManifestError naming
+# the line (NAME labels the manifest in the message)
+def PARSE_MANIFEST(SOURCE, NAME='manifest', GEOMETRY=DEFAULT_GEOMETRY):
     GRID = {}
     CONTAINER_COUNT = 0
+    ROWS = GEOMETRY.ROWS
+    COLS = GEOMETRY.COLS
     
-    with open(FILENAME, 'r') as FHANDLE:
-        LINES = FHANDLE.readlines()
+    # Line each slot was listed on (0 for not yet), by slot index in row-major order
+    LISTED_ON = [0] * GEOMETRY.SLOTS
+    MATCH = MANIFEST_LINE.match
+    LINE_NUMBER = 0
     
-    for LINE in LINES:
-        LINE = LINE.strip()
-        if not LINE or not LINE.startswith('['):
+    for LINE_NUMBER, LINE in enumerate(DECODED_LINES(SOURCE, NAME), 1):
+        FOUND = MATCH(LINE)
+        if FOUND is None:
+            if LINE.strip():
+                raise ManifestError(NAME, LINE_NUMBER, f"expected '[row,col], {{weight}}, description', got {LINE.strip()!r}")
             continue
         
-        PARTS_OF_FILE = LINE.split(',', 1)
-        if len(PARTS_OF_FILE) < 2:
-            continue
+        ROW_TEXT, COL_TEXT, WEIGHT_TEXT, DESCRIPTION = FOUND.groups()
+        ROW = int(ROW_TEXT)
+        COL = int(COL_TEXT)
         
-        ROW_PART = PARTS_OF_FILE[0].strip('[')
-        REST = PARTS_OF_FILE[1]
+        if not (1 <= ROW <= ROWS and 1 <= COL <= COLS):
+            raise ManifestError(NAME, LINE_NUMBER, f"slot [{ROW_TEXT},{COL_TEXT}] is outside the {ROWS}x{COLS} bay")
         
-        COL_PART = REST.split(']')[0]
-        REMAINDER = REST.split(']', 1)[1].strip().lstrip(',').strip()
+        SLOT = (ROW - 1) * COLS + COL - 1
+        if LISTED_ON[SLOT]:
+            raise ManifestError(NAME, LINE_NUMBER, f"slot [{ROW_TEXT},{COL_TEXT}] is already listed on line {LISTED_ON[SLOT]}")
+        LISTED_ON[SLOT] = LINE_NUMBER
         
-        try:
-            ROW = int(ROW_PART)
-            COL = int(COL_PART)
-        except ValueError:
-            continue
-        
-        if REMAINDER.startswith('{') and '}' in REMAINDER:
-            WEIGHT_STR = REMAINDER.split('{')[1].split('}')[0]
-            DESC_PART = REMAINDER.split('}', 1)[1].strip()
-            
-            if DESC_PART.startswith(','):
-                DESC_PART = DESC_PART[1:].strip()
-            
-            try:
-                WEIGHT = int(WEIGHT_STR)
-            except ValueError:
-                WEIGHT = 0
-            
-            if DESC_PART == 'NAN':
-                GRID[(ROW, COL)] = {'weight': 0, 'type': 'NAN', 'description': 'NAN'}
-            elif DESC_PART == 'UNUSED':
-                GRID[(ROW, COL)] = {'weight': 0, 'type': 'UNUSED', 'description': 'UNUSED'}
-            else:
-                GRID[(ROW, COL)] = {'weight': WEIGHT, 'type': 'CONTAINER', 'description': DESC_PART}
-                if WEIGHT > 0:
-                    CONTAINER_COUNT += 1
+        WEIGHT = int(WEIGHT_TEXT)
+        if DESCRIPTION == 'NAN' or DESCRIPTION == 'UNUSED':
+            if WEIGHT:
+                raise ManifestError(NAME, LINE_NUMBER, f"{DESCRIPTION} slot [{ROW_TEXT},{COL_TEXT}] has weight {WEIGHT_TEXT}")
+            GRID[ROW, COL] = {'weight': 0, 'type': DESCRIPTION, 'description': DESCRIPTION}
+        else:
+            GRID[ROW, COL] = {'weight': WEIGHT, 'type': 'CONTAINER', 'description': DESCRIPTION}
+            if WEIGHT > 0:
+                CONTAINER_COUNT += 1
     
-    for ROW in range(1, 9):
-        for COL in range(1, 13):
-            if (ROW, COL) not in GRID:
-                GRID[(ROW, COL)] = {'weight': 0, 'type': 'UNUSED', 'description': 'UNUSED'}
+    if len(GRID) < GEOMETRY.SLOTS:
+        MISSING = next(POSITION for POSITION in GEOMETRY.POSITIONS() if POSITION not in GRID)
+        raise ManifestError(NAME, None, f"{GEOMETRY.SLOTS - len(GRID)} of {GEOMETRY.SLOTS} slots are missing after line {LINE_NUMBER}, starting with {FORMAT_POSITION(MISSING)}")
     
     return GRID, CONTAINER_COUNT
 
-# Writes entries to the manifest file
-def WRITE_MANIFEST(FILENAME, GRID):
-    DESKTOP = os.path.join(os.path.expanduser('~'), 'Desktop')
-    FULL_PATH = os.path.join(DESKTOP, FILENAME)
+# Analyzes and extracts information from the manifest file
+def PARSE_MANIFEST_FILE(FILENAME, GEOMETRY=DEFAULT_GEOMETRY):
+    with open(FILENAME, 'r', encoding='utf-8') as FHANDLE:
+        return PARSE_MANIFEST(FHANDLE, os.path.basename(FILENAME), GEOMETRY)
+
+# Works out the bay a manifest source (see MANIFEST_LINES) describes from the slots it lists: a bigger bay than the
+# standard one only when it lists exactly as many slots as that bay's whole rectangle has, the standard bay (with the
+# default divider and park position) otherwise. A standard manifest with a stray line outside it (or missing its last
+# lines) is therefore still read as a standard bay, and PARSE_MANIFEST reports the line at fault; lines that do not
+# parse are left for it to report too.
+def SOURCE_GEOMETRY(SOURCE, NAME='manifest'):
+    ROWS = 0
+    COLS = 0
+    SLOTS = 0
+    MATCH = MANIFEST_LINE.match
+    
+    for LINE in DECODED_LINES(SOURCE, NAME):
+        FOUND = MATCH(LINE)
+        if FOUND is not None:
+            ROWS = max(ROWS, int(FOUND.group(1)))
+            COLS = max(COLS, int(FOUND.group(2)))
+            SLOTS += 1
     
-    with open(FULL_PATH, 'w') as FILE:
-        for ROW in range(1, 9):
-            for COL in range(1, 13):
-                CELL = GRID.get((ROW, COL))
-                if CELL:
-                    WEIGHT = CELL['weight']
-                    DESC = CELL['description']
-                    FILE.write(f"[{ROW:02d},{COL:02d}], {{{WEIGHT:05d}}}, {DESC}\n")
+    if ROWS <= DEFAULT_GEOMETRY.ROWS and COLS <= DEFAULT_GEOMETRY.COLS or SLOTS != ROWS * COLS:
+        return DEFAULT_GEOMETRY
+    return BAY_GEOMETRY(ROWS, COLS)
+
+# Works out the bay a manifest file describes, see SOURCE_GEOMETRY
+def MANIFEST_GEOMETRY(FILENAME):
+    with open(FILENAME, 'r', encoding='utf-8') as FHANDLE:
+        return SOURCE_GEOMETRY(FHANDLE, os.path.basename(FILENAME))
+
+# Lays out the grid of a bay of GEOMETRY as manifest text, one "[RR,CC], {WWWWW}, DESCRIPTION" line per slot
+def MANIFEST_TEXT(GRID, GEOMETRY=DEFAULT_GEOMETRY):
+    LINES = []
+    for ROW, COL in GEOMETRY.POSITIONS():
+        CELL = GRID.get((ROW, COL))
+        if CELL:
+            LINES.append(f"[{ROW:02d},{COL:02d}], {{{CELL['weight']:05d}}}, {CELL['description']}\n")
+    return ''.join(LINES)
+
+# Writes entries to the manifest file (into OUTPUT_DIR, DEFAULT_OUTPUT_DIR() by default) in one atomic write, so a
+# crash never leaves a truncated manifest behind; GEOMETRY is the bay the grid was read as
+def WRITE_MANIFEST(FILENAME, GRID, OUTPUT_DIR=None, GEOMETRY=DEFAULT_GEOMETRY):
+    WRITE_ATOMICALLY(os.path.join(OUTPUT_DIR or DEFAULT_OUTPUT_DIR(), FILENAME), MANIFEST_TEXT(GRID, GEOMETRY))
 
 # Creates the date stamp for each log entry
 def CREATE_MANIFEST_LOG_ENTRY(MESSAGE, CURRENT_TIME):
     TIMESTAMP = CURRENT_TIME.strftime("%m %d %Y: %H:%M")
     return f"{TIMESTAMP} {MESSAGE}"
 
-# Saves the log file in the correct format and naming convention
-def SAVE_LOG_FILE(LOG_ENTRIES, START_TIME, MANIFEST_FILE=None):
-    DESKTOP = os.path.join(os.path.expanduser('~'), 'Desktop')
+# Names the log file of a session after its manifest and start time
+def LOG_FILE_NAME(START_TIME, MANIFEST_FILE=None):
     TIMESTAMP = START_TIME.strftime("%m_%d_%Y_%H%M")
     
     if MANIFEST_FILE:
@@ -87,23 +145,21 @@ def SAVE_LOG_FILE(LOG_ENTRIES, START_TIME, MANIFEST_FILE=None):
     else:
         BASE_NAME = "KeoghsPort"
     
-    FILENAME = f"{BASE_NAME}{TIMESTAMP}.txt"
-    FULL_PATH = os.path.join(DESKTOP, FILENAME)
-    
-    with open(FULL_PATH, 'w') as FILE:
-        for ENTRY in LOG_ENTRIES:
-            FILE.write(ENTRY + '\n')
-    
+    return f"{BASE_NAME}{TIMESTAMP}.txt"
+
+# Lays out log entries as the text of a log file
+def LOG_TEXT(LOG_ENTRIES):
+    return ''.join(ENTRY + '\n' for ENTRY in LOG_ENTRIES)
+
+# Saves the log file in the correct format and naming convention (into OUTPUT_DIR, DEFAULT_OUTPUT_DIR() by default) in
+# one atomic write
+def SAVE_LOG_FILE(LOG_ENTRIES, START_TIME, MANIFEST_FILE=None, OUTPUT_DIR=None):
+    FILENAME = LOG_FILE_NAME(START_TIME, MANIFEST_FILE)
+    WRITE_ATOMICALLY(os.path.join(OUTPUT_DIR or DEFAULT_OUTPUT_DIR(), FILENAME), LOG_TEXT(LOG_ENTRIES))
     return FILENAME
 
-# Calculates the time for each step of a container move:
-def CALCULATE_MOVE_TIME(FROM_POS, TO_POS, PREV_POS):
-    PARK_POSITION = (1, 8)
-    
-    TIME_TO_SOURCE = abs(PREV_POS[0] - FROM_POS[0]) + abs(PREV_POS[1] - FROM_POS[1])
-    
-    TIME_SOURCE_TO_DEST = abs(FROM_POS[0] - TO_POS[0]) + abs(FROM_POS[1] - TO_POS[1])
-    
-    TIME_DEST_TO_PARK = abs(TO_POS[0] - PARK_POSITION[0]) + abs(TO_POS[1] - PARK_POSITION[1])
-    
-    return (TIME_TO_SOURCE, TIME_SOURCE_TO_DEST, TIME_DEST_TO_PARK)
\ No newline at end of file
+# Formats a position for the log and screen ("[RR,CC]" on the ship, buffer slots counted from the gate)
+def FORMAT_POSITION(POSITION):
+    if IS_BUFFER_POSITION(POSITION):
+        return f"buffer [{POSITION[0]:02d},{1 - POSITION[1]:02d}]"
+    return f"[{POSITION[0]:02d},{POSITION[1]:02d}]"
\ No newline at end of file
@@ -1,8 +1,17 @@
 import os
 from datetime import datetime, timedelta
-from CONTAINER_SOLVER import BALANCE_SHIP, CALCULATE_BALANCE_COST
-from HELPER_FUNCTIONS import PARSE_MANIFEST_FILE, WRITE_MANIFEST, CREATE_MANIFEST_LOG_ENTRY, SAVE_LOG_FILE, CALCULATE_MOVE_TIME
-from GUI_GRID_VISUALIZATION import SHOW_BALANCE_VISUALIZATION
+from tkinter import TclError
+from CONTAINER_SOLVER import BALANCE_SHIP, BALANCE_SHIP_ANYTIME, BUDGET_STOPS
+from COST_MODEL import GET_COST_MODEL
+from OUTPUT_WRITER import DEFAULT_OUTPUT_DIR, DESCRIBE_OUTPUT_DIR
+from HELPER_FUNCTIONS import PARSE_MANIFEST_FILE, MANIFEST_GEOMETRY, WRITE_MANIFEST, CREATE_MANIFEST_LOG_ENTRY, SAVE_LOG_FILE, FORMAT_POSITION, ManifestError
+from GUI_GRID_VISUALIZATION import SHOW_BALANCE_VISUALIZATION, SOLVE_WITH_PROGRESS
+from SEARCH_STATS import SearchStats
+from SHIP_STATE import DEFAULT_GEOMETRY, ShipLayout
+from SOLUTION_CACHE import SolutionCache
+
+# Seconds the solver may keep improving a plan before the operator gets the best one found
+SOLVER_TIME_BUDGET = 30
 
 # Main program that runs the container solver
 def main():
@@ -26,27 +35,32 @@ def main():
         return
     
     SHIP_NAME = MANIFEST_FILE.replace(".txt", "").replace("OUTBOUND", "")
-    GRID, CONTAINER_COUNT = PARSE_MANIFEST_FILE(MANIFEST_FILE)
     
-    LOG_ENTRIES.append(CREATE_MANIFEST_LOG_ENTRY(f"Manifest {MANIFEST_FILE} is opened, there are {CONTAINER_COUNT} containers on the ship.", SIMULATED_TIME))
+    try:
+        # Bays bigger than the standard one are read at the size their manifest lists
+        GEOMETRY = MANIFEST_GEOMETRY(MANIFEST_FILE)
+        GRID, CONTAINER_COUNT = PARSE_MANIFEST_FILE(MANIFEST_FILE, GEOMETRY)
+    except ManifestError as ERROR:
+        print(f"ERROR: {ERROR}")
+        LOG_ENTRIES.append(CREATE_MANIFEST_LOG_ENTRY(f"ERROR: Manifest {ERROR}. Program terminated.", SIMULATED_TIME))
+        LOG_ENTRIES.append(CREATE_MANIFEST_LOG_ENTRY("Program was shut down.", SIMULATED_TIME))
+        LOG_FILENAME = SAVE_LOG_FILE(LOG_ENTRIES, START_TIME, MANIFEST_FILE=MANIFEST_FILE)
+        print(f"\nLog saved to: {LOG_FILENAME}")
+        return
     
-    INITIAL_PORT_WEIGHT = 0
-    INITIAL_STARBOARD_WEIGHT = 0
+    LOG_ENTRIES.append(CREATE_MANIFEST_LOG_ENTRY(f"Manifest {MANIFEST_FILE} is opened, there are {CONTAINER_COUNT} containers on the ship.", SIMULATED_TIME))
     
-    for ROW in range(1, 9):
-        for COL in range(1, 13):
-            CELL = GRID.get((ROW, COL))
-            if CELL and CELL['weight'] > 0:
-                if COL <= 6:
-                    INITIAL_PORT_WEIGHT += CELL['weight']
-                else:
-                    INITIAL_STARBOARD_WEIGHT += CELL['weight']
+    INITIAL_STATE = ShipLayout(GRID, GEOMETRY).INITIAL_STATE(GRID)
+    INITIAL_PORT_WEIGHT = INITIAL_STATE.PORT_WEIGHT
+    INITIAL_STARBOARD_WEIGHT = INITIAL_STATE.STARBOARD_WEIGHT
     
     TOTAL_WEIGHT = INITIAL_PORT_WEIGHT + INITIAL_STARBOARD_WEIGHT
     BALANCE_THRESHOLD = TOTAL_WEIGHT * 0.10
     INITIAL_IMBALANCE = abs(INITIAL_PORT_WEIGHT - INITIAL_STARBOARD_WEIGHT)
     
     print(f"\nShip: {SHIP_NAME}")
+    if GEOMETRY is not DEFAULT_GEOMETRY:
+        print(f"Bay: {GEOMETRY.ROWS} rows x {GEOMETRY.COLS} columns")
     print(f"Containers: {CONTAINER_COUNT}")
     print(f"Port side weight: {INITIAL_PORT_WEIGHT} kg")
     print(f"Starboard side weight: {INITIAL_STARBOARD_WEIGHT} kg")
@@ -57,6 +71,9 @@ def main():
     SOLUTION = None
     FINAL_GRID = GRID
     
+    # Filled in by the solver when it runs, and saved next to the log file
+    STATS = None
+    
     # Store a deep copy of the original grid for visualization
     ORIGINAL_GRID = {}
     for pos, cell in GRID.items():
@@ -64,33 +81,36 @@ def main():
     
     if CONTAINER_COUNT == 0:
         print("\nShip is empty - already balanced!")
-        WRITE_MANIFEST(OUTBOUND_FILE, GRID)
+        WRITE_MANIFEST(OUTBOUND_FILE, GRID, GEOMETRY=GEOMETRY)
         SIMULATED_TIME += timedelta(minutes=1)
-        LOG_ENTRIES.append(CREATE_MANIFEST_LOG_ENTRY(f"Finished a Cycle. Manifest {OUTBOUND_FILE} was written to desktop, and a reminder pop-up to operator to send file was displayed.", SIMULATED_TIME))
+        LOG_ENTRIES.append(CREATE_MANIFEST_LOG_ENTRY(f"Finished a Cycle. Manifest {OUTBOUND_FILE} was written to {DESCRIBE_OUTPUT_DIR()}, and a reminder pop-up to operator to send file was displayed.", SIMULATED_TIME))
     
     elif CONTAINER_COUNT == 1:
         print("\nShip has only one container - already balanced!")
-        WRITE_MANIFEST(OUTBOUND_FILE, GRID)
+        WRITE_MANIFEST(OUTBOUND_FILE, GRID, GEOMETRY=GEOMETRY)
         SIMULATED_TIME += timedelta(minutes=1)
-        LOG_ENTRIES.append(CREATE_MANIFEST_LOG_ENTRY(f"Finished a Cycle. Manifest {OUTBOUND_FILE} was written to desktop, and a reminder pop-up to operator to send file was displayed.", SIMULATED_TIME))
+        LOG_ENTRIES.append(CREATE_MANIFEST_LOG_ENTRY(f"Finished a Cycle. Manifest {OUTBOUND_FILE} was written to {DESCRIBE_OUTPUT_DIR()}, and a reminder pop-up to operator to send file was displayed.", SIMULATED_TIME))
     
     elif CONTAINER_COUNT == 2:
         CONTAINERS = [(POS, CELL) for POS, CELL in GRID.items() if CELL['weight'] > 0]
         COL1 = CONTAINERS[0][0][1]
         COL2 = CONTAINERS[1][0][1]
         
-        if (COL1 <= 6 and COL2 > 6) or (COL1 > 6 and COL2 <= 6):
+        if GEOMETRY.IS_PORT(COL1) != GEOMETRY.IS_PORT(COL2):
             print("\nShip has two containers on opposite sides - already balanced!")
-            WRITE_MANIFEST(OUTBOUND_FILE, GRID)
-            LOG_ENTRIES.append(CREATE_MANIFEST_LOG_ENTRY(f"Finished a Cycle. Manifest {OUTBOUND_FILE} was written to desktop, and a reminder pop-up to operator to send file was displayed.", SIMULATED_TIME))
+            WRITE_MANIFEST(OUTBOUND_FILE, GRID, GEOMETRY=GEOMETRY)
+            LOG_ENTRIES.append(CREATE_MANIFEST_LOG_ENTRY(f"Finished a Cycle. Manifest {OUTBOUND_FILE} was written to {DESCRIBE_OUTPUT_DIR()}, and a reminder pop-up to operator to send file was displayed.", SIMULATED_TIME))
         
         else:
             print("\nShip has two containers on the same side - moving one to achieve legal balance...")
-            SOLUTION, FINAL_GRID = BALANCE_SHIP(GRID)
+            STATS = SearchStats(TIMERS=True)
+            SOLUTION, FINAL_GRID = BALANCE_SHIP(GRID, GEOMETRY, STATS=STATS)
 
             if SOLUTION:
                 # Now steps: 2 per move + 1 final return to park
-                TOTAL_TIME = CALCULATE_BALANCE_COST(SOLUTION)
+                COST_MODEL = GET_COST_MODEL(GEOMETRY)
+                STEP_TIMES, TIME_TO_PARK = COST_MODEL.STEP_TIMES(SOLUTION, GRID)
+                TOTAL_TIME = COST_MODEL.PLAN_COST(SOLUTION, GRID)
                 TOTAL_STEPS = len(SOLUTION) * 2 + 1
                 SIMULATED_TIME += timedelta(minutes=1)
                 print(f"\n... solution was found, it will take {TOTAL_TIME} minutes and {TOTAL_STEPS} moves")
@@ -100,29 +120,27 @@ def main():
                 for i, MOVE in enumerate(SOLUTION, 1):
                     FROM_POS, TO_POS = MOVE
                     # prev position (for time to source) is park for first move, otherwise previous move destination
-                    PREV_POS = (1, 8) if i == 1 else SOLUTION[i-2][1]
-                    MOVE_TIME = CALCULATE_MOVE_TIME(FROM_POS, TO_POS, PREV_POS)
+                    PREV_POS = GEOMETRY.PARK_POSITION if i == 1 else SOLUTION[i-2][1]
+                    MOVE_TIME = STEP_TIMES[i - 1]
                     
                     # Step: move from PARK or previous pos to source
                     SIMULATED_TIME += timedelta(minutes=MOVE_TIME[0])
-                    print(f"\n{STEP_NUM} of {TOTAL_STEPS}: Move from {'PARK' if PREV_POS == (1,8) else f'[{PREV_POS[0]:02d},{PREV_POS[1]:02d}]'} to [{FROM_POS[0]:02d},{FROM_POS[1]:02d}], {MOVE_TIME[0]} minutes")
-                    LOG_ENTRIES.append(CREATE_MANIFEST_LOG_ENTRY(f"Move from {'PARK' if PREV_POS == (1,8) else f'[{PREV_POS[0]:02d},{PREV_POS[1]:02d}]'} to [{FROM_POS[0]:02d},{FROM_POS[1]:02d}], {MOVE_TIME[0]} minutes", SIMULATED_TIME))
+                    print(f"\n{STEP_NUM} of {TOTAL_STEPS}: Move from {'PARK' if i == 1 else FORMAT_POSITION(PREV_POS)} to {FORMAT_POSITION(FROM_POS)}, {MOVE_TIME[0]} minutes")
+                    LOG_ENTRIES.append(CREATE_MANIFEST_LOG_ENTRY(f"Move from {'PARK' if i == 1 else FORMAT_POSITION(PREV_POS)} to {FORMAT_POSITION(FROM_POS)}, {MOVE_TIME[0]} minutes", SIMULATED_TIME))
                     STEP_NUM += 1
                     
                     # Step: move container from source to destination
                     SIMULATED_TIME += timedelta(minutes=MOVE_TIME[1])
-                    print(f"{STEP_NUM} of {TOTAL_STEPS}: Move container in [{FROM_POS[0]:02d},{FROM_POS[1]:02d}] to [{TO_POS[0]:02d},{TO_POS[1]:02d}], {MOVE_TIME[1]} minutes")
-                    LOG_ENTRIES.append(CREATE_MANIFEST_LOG_ENTRY(f"[{FROM_POS[0]:02d},{FROM_POS[1]:02d}] was moved to [{TO_POS[0]:02d},{TO_POS[1]:02d}], {MOVE_TIME[1]} minutes", SIMULATED_TIME))
+                    print(f"{STEP_NUM} of {TOTAL_STEPS}: Move container in {FORMAT_POSITION(FROM_POS)} to {FORMAT_POSITION(TO_POS)}, {MOVE_TIME[1]} minutes")
+                    LOG_ENTRIES.append(CREATE_MANIFEST_LOG_ENTRY(f"{FORMAT_POSITION(FROM_POS)} was moved to {FORMAT_POSITION(TO_POS)}, {MOVE_TIME[1]} minutes", SIMULATED_TIME))
                     STEP_NUM += 1
                 
                 # Final return to PARK (only once)
                 LAST_DEST = SOLUTION[-1][1]
-                # compute time directly (or reuse last MOVE_TIME[2])
-                TIME_TO_PARK = abs(LAST_DEST[0] - 1) + abs(LAST_DEST[1] - 8)
                 SIMULATED_TIME += timedelta(minutes=TIME_TO_PARK)
 
-                print(f"\n{STEP_NUM} of {TOTAL_STEPS}: Move from [{LAST_DEST[0]:02d},{LAST_DEST[1]:02d}] to PARK, {TIME_TO_PARK} minutes")
-                LOG_ENTRIES.append(CREATE_MANIFEST_LOG_ENTRY(f"Move from [{LAST_DEST[0]:02d},{LAST_DEST[1]:02d}] to PARK, {TIME_TO_PARK} minutes", SIMULATED_TIME))
+                print(f"\n{STEP_NUM} of {TOTAL_STEPS}: Move from {FORMAT_POSITION(LAST_DEST)} to PARK, {TIME_TO_PARK} minutes")
+                LOG_ENTRIES.append(CREATE_MANIFEST_LOG_ENTRY(f"Move from {FORMAT_POSITION(LAST_DEST)} to PARK, {TIME_TO_PARK} minutes", SIMULATED_TIME))
                 
                 # Ask for operator comment after all moves are shown
                 COMMENT_INPUT = input("\nAdd a comment? (y/n): ").strip().lower()
@@ -140,26 +158,44 @@ def main():
                         SIMULATED_TIME += timedelta(minutes=1)
                         LOG_ENTRIES.append(CREATE_MANIFEST_LOG_ENTRY(FULL_COMMENT, SIMULATED_TIME))
 
-                print(f"\nDone! {OUTBOUND_FILE} was written to the desktop")
-                WRITE_MANIFEST(OUTBOUND_FILE, FINAL_GRID)
+                print(f"\nDone! {OUTBOUND_FILE} was written to {DESCRIBE_OUTPUT_DIR()}")
+                WRITE_MANIFEST(OUTBOUND_FILE, FINAL_GRID, GEOMETRY=GEOMETRY)
                 SIMULATED_TIME += timedelta(minutes=1)
-                LOG_ENTRIES.append(CREATE_MANIFEST_LOG_ENTRY(f"Finished a Cycle. Manifest {OUTBOUND_FILE} was written to desktop.", SIMULATED_TIME))
+                LOG_ENTRIES.append(CREATE_MANIFEST_LOG_ENTRY(f"Finished a Cycle. Manifest {OUTBOUND_FILE} was written to {DESCRIBE_OUTPUT_DIR()}.", SIMULATED_TIME))
 
             else:
                 print("\nNo balance solution found within constraints.")
-                WRITE_MANIFEST(OUTBOUND_FILE, GRID)
+                WRITE_MANIFEST(OUTBOUND_FILE, GRID, GEOMETRY=GEOMETRY)
     
     elif INITIAL_IMBALANCE < BALANCE_THRESHOLD:
         print("\nShip is already balanced!")
-        WRITE_MANIFEST(OUTBOUND_FILE, GRID)
-        LOG_ENTRIES.append(CREATE_MANIFEST_LOG_ENTRY(f"Finished a Cycle. Manifest {OUTBOUND_FILE} was written to desktop, and a reminder pop-up to operator to send file was displayed.", SIMULATED_TIME))
+        WRITE_MANIFEST(OUTBOUND_FILE, GRID, GEOMETRY=GEOMETRY)
+        LOG_ENTRIES.append(CREATE_MANIFEST_LOG_ENTRY(f"Finished a Cycle. Manifest {OUTBOUND_FILE} was written to {DESCRIBE_OUTPUT_DIR()}, and a reminder pop-up to operator to send file was displayed.", SIMULATED_TIME))
     
     else:
         print("\nShip needs balancing. Calculating solution...")
-        SOLUTION, FINAL_GRID = BALANCE_SHIP(GRID)
+        
+        # The search runs behind a progress window the operator can cancel (keeping the best plan so far); without a
+        # display, the first feasible plan is shown right away and upgraded in place as cheaper plans are found. A ship
+        # solved on an earlier run comes straight from the solution cache either way.
+        CACHE = SolutionCache()
+        STATS = SearchStats(TIMERS=True)
+        try:
+            SOLUTION, FINAL_GRID, PLAN_COST, IS_OPTIMAL = SOLVE_WITH_PROGRESS(GRID, SHIP_NAME, STATS, SOLVER_TIME_BUDGET, CACHE, GEOMETRY)
+        except TclError:
+            for SOLUTION, FINAL_GRID, PLAN_COST, IS_OPTIMAL in BALANCE_SHIP_ANYTIME(GRID, GEOMETRY, TIME_BUDGET=SOLVER_TIME_BUDGET, STATS=STATS, CACHE=CACHE):
+                PLAN_STATUS = "optimal plan" if IS_OPTIMAL else "best plan so far"
+                print(f"\r... {PLAN_STATUS}: {len(SOLUTION)} container moves, {PLAN_COST} minutes      ", end="", flush=True)
+            print()
+        print(f"... search stopped: {STATS.TERMINATION}, {STATS.NODES_EXPANDED} nodes expanded")
+        if CACHE.HITS:
+            print("... plan loaded from the solution cache")
+        CACHE.CLOSE()
         
         if SOLUTION:
-            TOTAL_TIME = CALCULATE_BALANCE_COST(SOLUTION)
+            COST_MODEL = GET_COST_MODEL(GEOMETRY)
+            STEP_TIMES, TIME_TO_PARK = COST_MODEL.STEP_TIMES(SOLUTION, GRID)
+            TOTAL_TIME = COST_MODEL.PLAN_COST(SOLUTION, GRID)
             TOTAL_STEPS = len(SOLUTION) * 2 + 1  # two steps per move + final return to park
             SIMULATED_TIME += timedelta(minutes=1)
             print(f"\n... solution was found, it will take {TOTAL_TIME} minutes and {TOTAL_STEPS} moves")
@@ -168,25 +204,24 @@ def main():
             STEP_NUM = 1
             for i, MOVE in enumerate(SOLUTION, 1):
                 FROM_POS, TO_POS = MOVE
-                PREV_POS = (1, 8) if i == 1 else SOLUTION[i-2][1]
-                MOVE_TIME = CALCULATE_MOVE_TIME(FROM_POS, TO_POS, PREV_POS)
+                PREV_POS = GEOMETRY.PARK_POSITION if i == 1 else SOLUTION[i-2][1]
+                MOVE_TIME = STEP_TIMES[i - 1]
 
                 SIMULATED_TIME += timedelta(minutes=MOVE_TIME[0])
-                print(f"\n{STEP_NUM} of {TOTAL_STEPS}: Move from {'PARK' if PREV_POS == (1,8) else f'[{PREV_POS[0]:02d},{PREV_POS[1]:02d}]'} to [{FROM_POS[0]:02d},{FROM_POS[1]:02d}], {MOVE_TIME[0]} minutes")
-                LOG_ENTRIES.append(CREATE_MANIFEST_LOG_ENTRY(f"Move from {'PARK' if PREV_POS == (1,8) else f'[{PREV_POS[0]:02d},{PREV_POS[1]:02d}]'} to [{FROM_POS[0]:02d},{FROM_POS[1]:02d}], {MOVE_TIME[0]} minutes", SIMULATED_TIME))
+                print(f"\n{STEP_NUM} of {TOTAL_STEPS}: Move from {'PARK' if i == 1 else FORMAT_POSITION(PREV_POS)} to {FORMAT_POSITION(FROM_POS)}, {MOVE_TIME[0]} minutes")
+                LOG_ENTRIES.append(CREATE_MANIFEST_LOG_ENTRY(f"Move from {'PARK' if i == 1 else FORMAT_POSITION(PREV_POS)} to {FORMAT_POSITION(FROM_POS)}, {MOVE_TIME[0]} minutes", SIMULATED_TIME))
                 STEP_NUM += 1
                 
                 SIMULATED_TIME += timedelta(minutes=MOVE_TIME[1])
-                print(f"{STEP_NUM} of {TOTAL_STEPS}: Move container in [{FROM_POS[0]:02d},{FROM_POS[1]:02d}] to [{TO_POS[0]:02d},{TO_POS[1]:02d}], {MOVE_TIME[1]} minutes")
-                LOG_ENTRIES.append(CREATE_MANIFEST_LOG_ENTRY(f"[{FROM_POS[0]:02d},{FROM_POS[1]:02d}] was moved to [{TO_POS[0]:02d},{TO_POS[1]:02d}], {MOVE_TIME[1]} minutes", SIMULATED_TIME))
+                print(f"{STEP_NUM} of {TOTAL_STEPS}: Move container in {FORMAT_POSITION(FROM_POS)} to {FORMAT_POSITION(TO_POS)}, {MOVE_TIME[1]} minutes")
+                LOG_ENTRIES.append(CREATE_MANIFEST_LOG_ENTRY(f"{FORMAT_POSITION(FROM_POS)} was moved to {FORMAT_POSITION(TO_POS)}, {MOVE_TIME[1]} minutes", SIMULATED_TIME))
                 STEP_NUM += 1
             
             # Final single return to PARK
             LAST_DEST = SOLUTION[-1][1]
-            TIME_TO_PARK = abs(LAST_DEST[0] - 1) + abs(LAST_DEST[1] - 8)
             SIMULATED_TIME += timedelta(minutes=TIME_TO_PARK)
-            print(f"\n{STEP_NUM} of {TOTAL_STEPS}: Move from [{LAST_DEST[0]:02d},{LAST_DEST[1]:02d}] to PARK, {TIME_TO_PARK} minutes")
-            LOG_ENTRIES.append(CREATE_MANIFEST_LOG_ENTRY(f"Move from [{LAST_DEST[0]:02d},{LAST_DEST[1]:02d}] to PARK, {TIME_TO_PARK} minutes", SIMULATED_TIME))
+            print(f"\n{STEP_NUM} of {TOTAL_STEPS}: Move from {FORMAT_POSITION(LAST_DEST)} to PARK, {TIME_TO_PARK} minutes")
+            LOG_ENTRIES.append(CREATE_MANIFEST_LOG_ENTRY(f"Move from {FORMAT_POSITION(LAST_DEST)} to PARK, {TIME_TO_PARK} minutes", SIMULATED_TIME))
             
             # Ask for operator comment after all moves are shown
             COMMENT_INPUT = input("\nAdd a comment? (y/n): ").strip().lower()
@@ -204,25 +239,36 @@ def main():
                     SIMULATED_TIME += timedelta(minutes=1)
                     LOG_ENTRIES.append(CREATE_MANIFEST_LOG_ENTRY(FULL_COMMENT, SIMULATED_TIME))
             
-            print(f"\nDone! {OUTBOUND_FILE} was written to the desktop")
-            WRITE_MANIFEST(OUTBOUND_FILE, FINAL_GRID)
+            print(f"\nDone! {OUTBOUND_FILE} was written to {DESCRIBE_OUTPUT_DIR()}")
+            WRITE_MANIFEST(OUTBOUND_FILE, FINAL_GRID, GEOMETRY=GEOMETRY)
             SIMULATED_TIME += timedelta(minutes=1)
-            LOG_ENTRIES.append(CREATE_MANIFEST_LOG_ENTRY(f"Finished a Cycle. Manifest {OUTBOUND_FILE} was written to desktop.", SIMULATED_TIME))
+            LOG_ENTRIES.append(CREATE_MANIFEST_LOG_ENTRY(f"Finished a Cycle. Manifest {OUTBOUND_FILE} was written to {DESCRIBE_OUTPUT_DIR()}.", SIMULATED_TIME))
+        
+        # Stopped before any plan turned up: the ship may well balance, so no OUTBOUND manifest goes out
+        elif STATS.TERMINATION in BUDGET_STOPS:
+            REASON = "search cancelled" if STATS.TERMINATION == 'cancelled' else f"search stopped: {STATS.TERMINATION}"
+            print(f"\nNo balance solution found ({REASON}), no OUTBOUND manifest was written.")
+            LOG_ENTRIES.append(CREATE_MANIFEST_LOG_ENTRY(f"No balance solution found, {REASON}. No OUTBOUND manifest was written.", SIMULATED_TIME))
         
         else:
             print("\nCannot balance ship.")
             LOG_ENTRIES.append(CREATE_MANIFEST_LOG_ENTRY("Ship cannot be balanced.", SIMULATED_TIME))
-            WRITE_MANIFEST(OUTBOUND_FILE, GRID)
+            WRITE_MANIFEST(OUTBOUND_FILE, GRID, GEOMETRY=GEOMETRY)
     
     LOG_ENTRIES.append(CREATE_MANIFEST_LOG_ENTRY("Program was shut down.", SIMULATED_TIME))
     
     LOG_FILENAME = SAVE_LOG_FILE(LOG_ENTRIES, START_TIME, MANIFEST_FILE=MANIFEST_FILE)
     print(f"\nLog saved to: {LOG_FILENAME}")
+    
+    if STATS is not None:
+        STATS_FILENAME = os.path.splitext(LOG_FILENAME)[0] + ".stats.json"
+        STATS.WRITE_JSON(os.path.join(DEFAULT_OUTPUT_DIR(), STATS_FILENAME))
+        print(f"Search statistics saved to: {STATS_FILENAME}")
     print("\n" + "=" * 60)
     
     if SOLUTION and len(SOLUTION) > 0:
         print("\nOpening visualization window...")
-        SHOW_BALANCE_VISUALIZATION(ORIGINAL_GRID, SOLUTION, SHIP_NAME)
+        SHOW_BALANCE_VISUALIZATION(ORIGINAL_GRID, SOLUTION, SHIP_NAME, GEOMETRY)
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -0,0 +1,193 @@
+import hashlib
+import mmap
+import os
+import struct
+import sys
+from HELPER_FUNCTIONS import PARSE_MANIFEST, SOURCE_GEOMETRY
+from OUTPUT_WRITER import WRITE_ATOMICALLY
+from SHIP_STATE import BAY_GEOMETRY, DEFAULT_GEOMETRY
+
+# Sidecar files are named after their manifest with this suffix added ("ShipCase1.txt-<hash>.grid")
+SIDECAR_SUFFIX = '.grid'
+
+# Identifies a sidecar file and its layout version
+SIDECAR_MAGIC = b'KPGRID01'
+
+# Sidecar header: magic, rows, columns, container count, source mtime (ns), source size, source sha256, number of
+# interned strings, bytes of string data, byte order of the arrays (0 little, 1 big) and padding to a 4-byte boundary.
+# After it come the weights (uint32 per slot, row-major), the description of every slot (uint32 index into the string
+# table), the string offsets (uint32, one more than there are strings), the NAN bitmap (one bit per slot) and the
+# UTF-8 string data.
+SIDECAR_HEADER = struct.Struct('=8sHHIqQ32sIIB3x')
+
+# Byte order flag of this machine, as stored in the header
+NATIVE_BYTE_ORDER = 0 if sys.byteorder == 'little' else 1
+
+# A sidecar mapped read-only into memory: the weights, description indices and NAN bitmap are views straight into the
+# file, so opening one costs a header read however large the bay is
+class MappedManifest:
+    # Maps the sidecar at PATH (raises ValueError when the file is not a sidecar this version can read)
+    def __init__(self, PATH):
+        with open(PATH, 'rb') as FILE:
+            self.MAP = mmap.mmap(FILE.fileno(), 0, access=mmap.ACCESS_READ)
+
+        try:
+            (MAGIC, self.ROWS, self.COLS, self.CONTAINER_COUNT, self.SOURCE_MTIME_NS, self.SOURCE_SIZE,
+             self.SOURCE_DIGEST, STRING_COUNT, STRING_BYTES, BYTE_ORDER) = SIDECAR_HEADER.unpack_from(self.MAP)
+            if MAGIC != SIDECAR_MAGIC or BYTE_ORDER != NATIVE_BYTE_ORDER:
+                raise ValueError(f"{PATH} is not a sidecar this program can read")
+
+            SLOTS = self.ROWS * self.COLS
+            VIEW = memoryview(self.MAP)
+            OFFSET = SIDECAR_HEADER.size
+
+            self.WEIGHTS = VIEW[OFFSET:OFFSET + 4 * SLOTS].cast('I')
+            OFFSET += 4 * SLOTS
+            self.DESCRIPTION_IDS = VIEW[OFFSET:OFFSET + 4 * SLOTS].cast('I')
+            OFFSET += 4 * SLOTS
+            self.STRING_OFFSETS = VIEW[OFFSET:OFFSET + 4 * (STRING_COUNT + 1)].cast('I')
+            OFFSET += 4 * (STRING_COUNT + 1)
+            self.NAN_BITMAP = VIEW[OFFSET:OFFSET + (SLOTS + 7) // 8]
+            OFFSET += (SLOTS + 7) // 8
+            self.STRING_DATA = VIEW[OFFSET:OFFSET + STRING_BYTES]
+            VIEW.release()
+
+            if len(self.STRING_DATA) != STRING_BYTES:
+                raise ValueError(f"{PATH} is truncated")
+        except (struct.error, TypeError, ValueError):
+            self.CLOSE()
+            raise ValueError(f"{PATH} is not a sidecar this program can read")
+
+    # Checks whether slot number SLOT (row-major, from 0) is a NAN slot
+    def IS_NAN(self, SLOT):
+        return bool(self.NAN_BITMAP[SLOT >> 3] & (1 << (SLOT & 7)))
+
+    # Decodes the interned string table
+    def STRINGS(self):
+        OFFSETS = self.STRING_OFFSETS
+        DATA = bytes(self.STRING_DATA)
+        return [DATA[OFFSETS[i]:OFFSETS[i + 1]].decode() for i in range(len(OFFSETS) - 1)]
+
+    # Builds the grid the solver works on, as PARSE_MANIFEST would have (a slot's type follows from its description
+    # there, so it is worked out once per interned string)
+    def GRID(self):
+        STRINGS = self.STRINGS()
+        TYPES = [STRING if STRING in ('NAN', 'UNUSED') else 'CONTAINER' for STRING in STRINGS]
+        POSITIONS = ((ROW, COL) for ROW in range(1, self.ROWS + 1) for COL in range(1, self.COLS + 1))
+
+        return {POSITION: {'weight': WEIGHT, 'type': TYPES[DESCRIPTION_ID], 'description': STRINGS[DESCRIPTION_ID]}
+                for POSITION, WEIGHT, DESCRIPTION_ID in zip(POSITIONS, self.WEIGHTS, self.DESCRIPTION_IDS)}
+
+    # Releases the views and unmaps the file
+    def CLOSE(self):
+        for NAME in ('WEIGHTS', 'DESCRIPTION_IDS', 'STRING_OFFSETS', 'NAN_BITMAP', 'STRING_DATA'):
+            VIEW = getattr(self, NAME, None)
+            if VIEW is not None:
+                VIEW.release()
+        self.MAP.close()
+
+# Where sidecars are kept when no directory is given: $KEOGHS_CACHE_DIR, or else ~/.cache/keoghs/sidecars
+def DEFAULT_SIDECAR_DIR():
+    return os.environ.get('KEOGHS_CACHE_DIR') or os.path.join(os.path.expanduser('~'), '.cache', 'keoghs', 'sidecars')
+
+# Names the sidecar of the manifest FILENAME in SIDECAR_DIR (DEFAULT_SIDECAR_DIR() by default): the manifest's name
+# plus a hash of its absolute path, so manifests of the same name in different directories never share a sidecar
+def SIDECAR_FILE(FILENAME, SIDECAR_DIR=None):
+    PATH_HASH = hashlib.sha256(os.path.abspath(FILENAME).encode()).hexdigest()[:16]
+    return os.path.join(SIDECAR_DIR or DEFAULT_SIDECAR_DIR(), f"{os.path.basename(FILENAME)}-{PATH_HASH}{SIDECAR_SUFFIX}")
+
+# Calculates the sha256 digest of a manifest's contents
+def SOURCE_DIGEST(DATA):
+    return hashlib.sha256(DATA).digest()
+
+# Writes the sidecar of a parsed manifest atomically (see OUTPUT_WRITER.WRITE_ATOMICALLY, so concurrent batch workers
+# never see half a file); SOURCE_STAT and DIGEST describe the manifest it was parsed from
+def WRITE_SIDECAR(PATH, GRID, CONTAINER_COUNT, ROWS, COLS, SOURCE_STAT, DIGEST):
+    STRING_IDS = {}
+    WEIGHTS = []
+    DESCRIPTION_IDS = []
+    NAN_BITMAP = bytearray((ROWS * COLS + 7) // 8)
+
+    for SLOT in range(ROWS * COLS):
+        CELL = GRID[SLOT // COLS + 1, SLOT % COLS + 1]
+        WEIGHTS.append(CELL['weight'])
+        DESCRIPTION_IDS.append(STRING_IDS.setdefault(CELL['description'], len(STRING_IDS)))
+        if CELL['type'] == 'NAN':
+            NAN_BITMAP[SLOT >> 3] |= 1 << (SLOT & 7)
+
+    ENCODED = [STRING.encode() for STRING in STRING_IDS]
+    STRING_OFFSETS = [0]
+    for STRING in ENCODED:
+        STRING_OFFSETS.append(STRING_OFFSETS[-1] + len(STRING))
+
+    HEADER = SIDECAR_HEADER.pack(SIDECAR_MAGIC, ROWS, COLS, CONTAINER_COUNT, SOURCE_STAT.st_mtime_ns, SOURCE_STAT.st_size,
+                                 DIGEST, len(ENCODED), STRING_OFFSETS[-1], NATIVE_BYTE_ORDER)
+
+    DATA = b''.join([HEADER, struct.pack(f'={len(WEIGHTS)}I', *WEIGHTS), struct.pack(f'={len(DESCRIPTION_IDS)}I', *DESCRIPTION_IDS),
+                     struct.pack(f'={len(STRING_OFFSETS)}I', *STRING_OFFSETS), NAN_BITMAP, *ENCODED])
+
+    # A sidecar can always be rebuilt from its manifest, so it is not worth an fsync
+    WRITE_ATOMICALLY(PATH, DATA, FSYNC=False)
+
+# Opens the sidecar at PATH if it exists and belongs to a ROWS x COLS bay (to a bay of any size when ROWS is None),
+# else None
+def OPEN_SIDECAR(PATH, ROWS=None, COLS=None):
+    try:
+        MAPPED = MappedManifest(PATH)
+    except (OSError, ValueError):
+        return None
+
+    if ROWS is not None and (MAPPED.ROWS, MAPPED.COLS) != (ROWS, COLS):
+        MAPPED.CLOSE()
+        return None
+
+    return MAPPED
+
+# Loads a manifest of the bay of GEOMETRY like PARSE_MANIFEST_FILE, see LOAD_SIZED_MANIFEST
+def LOAD_MANIFEST(FILENAME, GEOMETRY=DEFAULT_GEOMETRY, SIDECAR_PATH=None):
+    GRID, CONTAINER_COUNT, _ = LOAD_SIZED_MANIFEST(FILENAME, GEOMETRY, SIDECAR_PATH)
+    return GRID, CONTAINER_COUNT
+
+# Loads a manifest like PARSE_MANIFEST_FILE, but through its binary sidecar when that is still current: an unchanged
+# modification time and size are trusted as they are, otherwise the contents are hashed and compared, and only a
+# manifest that really changed is parsed again (and its sidecar rewritten; a directory that cannot be written to just
+# means parsing every time). The sidecar is SIDECAR_PATH, SIDECAR_FILE(FILENAME) by default. Without a GEOMETRY the
+# bay's size comes from the header of a current sidecar, and only a manifest that has to be parsed is scanned for it
+# (see SOURCE_GEOMETRY). Returns the grid, its container count and the bay's geometry.
+def LOAD_SIZED_MANIFEST(FILENAME, GEOMETRY=None, SIDECAR_PATH=None):
+    if SIDECAR_PATH is None:
+        SIDECAR_PATH = SIDECAR_FILE(FILENAME)
+
+    SOURCE_STAT = os.stat(FILENAME)
+    if GEOMETRY is None:
+        MAPPED = OPEN_SIDECAR(SIDECAR_PATH)
+    else:
+        MAPPED = OPEN_SIDECAR(SIDECAR_PATH, GEOMETRY.ROWS, GEOMETRY.COLS)
+
+    try:
+        if MAPPED is not None and (MAPPED.SOURCE_MTIME_NS, MAPPED.SOURCE_SIZE) == (SOURCE_STAT.st_mtime_ns, SOURCE_STAT.st_size):
+            return MAPPED.GRID(), MAPPED.CONTAINER_COUNT, GEOMETRY or BAY_GEOMETRY(MAPPED.ROWS, MAPPED.COLS)
+
+        with open(FILENAME, 'rb') as FILE:
+            DATA = FILE.read()
+        DIGEST = SOURCE_DIGEST(DATA)
+
+        # Touched or copied but not changed: the sidecar still holds, it only needs the new timestamp
+        if MAPPED is not None and MAPPED.SOURCE_DIGEST == DIGEST:
+            GRID, CONTAINER_COUNT = MAPPED.GRID(), MAPPED.CONTAINER_COUNT
+            GEOMETRY = GEOMETRY or BAY_GEOMETRY(MAPPED.ROWS, MAPPED.COLS)
+        else:
+            NAME = os.path.basename(FILENAME)
+            GEOMETRY = GEOMETRY or SOURCE_GEOMETRY(DATA, NAME)
+            GRID, CONTAINER_COUNT = PARSE_MANIFEST(DATA, NAME, GEOMETRY)
+    finally:
+        if MAPPED is not None:
+            MAPPED.CLOSE()
+
+    try:
+        os.makedirs(os.path.dirname(SIDECAR_PATH) or '.', exist_ok=True)
+        WRITE_SIDECAR(SIDECAR_PATH, GRID, CONTAINER_COUNT, GEOMETRY.ROWS, GEOMETRY.COLS, SOURCE_STAT, DIGEST)
+    except OSError:
+        pass
+
+    return GRID, CONTAINER_COUNT, GEOMETRY
@@ -0,0 +1,123 @@
+import argparse
+import random
+from HELPER_FUNCTIONS import MANIFEST_TEXT
+from SHIP_STATE import DEFAULT_GEOMETRY, ShipGeometry
+
+# Distributions container weights (kg) can be drawn from: uniform up to twice the mean, normal around the mean, heavy
+# tailed (a few containers far heavier than the rest) or bimodal (light and heavy containers, nothing in between)
+WEIGHT_DISTRIBUTIONS = ('uniform', 'normal', 'heavy', 'bimodal')
+
+# Layouts of the NAN slots: none at all, the two bottom corners (as on every ship we have seen so far), a hull that
+# narrows towards the keel, or random blocks at the bottom of some columns
+NAN_LAYOUTS = ('none', 'corners', 'hull', 'random')
+
+# Heaviest weight a manifest can hold (five digits)
+MAX_WEIGHT = 99999
+
+# Draws one container weight from DISTRIBUTION, clamped to what a manifest can hold
+def DRAW_WEIGHT(RANDOM, DISTRIBUTION, MEAN_WEIGHT):
+    if DISTRIBUTION == 'uniform':
+        WEIGHT = RANDOM.uniform(1, 2 * MEAN_WEIGHT)
+    elif DISTRIBUTION == 'normal':
+        WEIGHT = RANDOM.gauss(MEAN_WEIGHT, MEAN_WEIGHT / 4)
+    elif DISTRIBUTION == 'heavy':
+        WEIGHT = MEAN_WEIGHT * RANDOM.paretovariate(2.5) * 0.6
+    elif DISTRIBUTION == 'bimodal':
+        WEIGHT = RANDOM.gauss(MEAN_WEIGHT * (0.4 if RANDOM.random() < 0.5 else 1.6), MEAN_WEIGHT / 10)
+    else:
+        raise ValueError(f"unknown weight distribution {DISTRIBUTION!r} (expected one of {', '.join(WEIGHT_DISTRIBUTIONS)})")
+
+    return min(MAX_WEIGHT, max(1, round(WEIGHT)))
+
+# Chooses how many NAN slots sit at the bottom of every column (indexed from 0) for LAYOUT
+def NAN_HEIGHTS(RANDOM, LAYOUT, ROWS, COLS):
+    HEIGHTS = [0] * COLS
+
+    if LAYOUT == 'corners':
+        HEIGHTS[0] = HEIGHTS[-1] = 1
+    elif LAYOUT == 'hull':
+        # One more NAN row for every column nearer the side, up to a quarter of the bay's height
+        for COL in range(COLS):
+            HEIGHTS[COL] = max(0, min(ROWS // 4, COLS // 6 - min(COL, COLS - 1 - COL)))
+    elif LAYOUT == 'random':
+        for COL in range(COLS):
+            if RANDOM.random() < 0.25:
+                HEIGHTS[COL] = RANDOM.randint(1, max(1, ROWS // 4))
+    elif LAYOUT != 'none':
+        raise ValueError(f"unknown NAN layout {LAYOUT!r} (expected one of {', '.join(NAN_LAYOUTS)})")
+
+    return HEIGHTS
+
+# Generates a random but physically valid manifest grid, the same for the same arguments: CONTAINERS containers with
+# weights from WEIGHTS, stacked at most MAX_DEPTH high (the full bay height by default) on top of the NAN slots of
+# NAN_LAYOUT, in the bay of GEOMETRY. PORT_SHARE, when given, is the fraction of containers put on the port side
+# (columns up to the divider), so the generated ships can be made as lopsided as needed; otherwise every column with
+# room is equally likely.
+def GENERATE_MANIFEST(CONTAINERS, SEED=0, GEOMETRY=DEFAULT_GEOMETRY, WEIGHTS='uniform', MEAN_WEIGHT=5000, MAX_DEPTH=None, NAN_LAYOUT='corners', PORT_SHARE=None):
+    ROWS = GEOMETRY.ROWS
+    COLS = GEOMETRY.COLS
+    RANDOM = random.Random(SEED)
+    FLOORS = NAN_HEIGHTS(RANDOM, NAN_LAYOUT, ROWS, COLS)
+    MAX_DEPTH = ROWS if MAX_DEPTH is None else MAX_DEPTH
+
+    # Room left in every column: above its NAN slots and within the stacking depth
+    ROOM = [min(MAX_DEPTH, ROWS - FLOOR) for FLOOR in FLOORS]
+    PORT_COLUMNS = range(GEOMETRY.DIVIDER)
+    STARBOARD_COLUMNS = range(GEOMETRY.DIVIDER, COLS)
+
+    if PORT_SHARE is None:
+        PORT_CONTAINERS = None
+    else:
+        PORT_CONTAINERS = round(CONTAINERS * PORT_SHARE)
+        if PORT_CONTAINERS > sum(ROOM[COL] for COL in PORT_COLUMNS) or CONTAINERS - PORT_CONTAINERS > sum(ROOM[COL] for COL in STARBOARD_COLUMNS):
+            raise ValueError(f"{CONTAINERS} containers with a port share of {PORT_SHARE} do not fit the bay")
+    if CONTAINERS > sum(ROOM):
+        raise ValueError(f"{CONTAINERS} containers do not fit a {ROWS}x{COLS} bay stacked at most {MAX_DEPTH} high")
+
+    DEPTHS = [0] * COLS
+    for NUMBER in range(CONTAINERS):
+        if PORT_CONTAINERS is None:
+            COLUMNS = range(COLS)
+        else:
+            COLUMNS = PORT_COLUMNS if NUMBER < PORT_CONTAINERS else STARBOARD_COLUMNS
+        COL = RANDOM.choice([COL for COL in COLUMNS if DEPTHS[COL] < ROOM[COL]])
+        DEPTHS[COL] += 1
+
+    GRID = {}
+    NUMBER = 0
+    for ROW in range(1, ROWS + 1):
+        for COL in range(1, COLS + 1):
+            FLOOR = FLOORS[COL - 1]
+            if ROW <= FLOOR:
+                GRID[ROW, COL] = {'weight': 0, 'type': 'NAN', 'description': 'NAN'}
+            elif ROW <= FLOOR + DEPTHS[COL - 1]:
+                NUMBER += 1
+                GRID[ROW, COL] = {'weight': DRAW_WEIGHT(RANDOM, WEIGHTS, MEAN_WEIGHT), 'type': 'CONTAINER', 'description': f"Synthetic {NUMBER:04d}"}
+            else:
+                GRID[ROW, COL] = {'weight': 0, 'type': 'UNUSED', 'description': 'UNUSED'}
+
+    return GRID
+
+# Command line entry point: writes one generated manifest in the format PARSE_MANIFEST_FILE reads
+def main():
+    PARSER = argparse.ArgumentParser(description="Generate a seeded synthetic ship manifest.")
+    PARSER.add_argument('output', help="manifest file to write")
+    PARSER.add_argument('--containers', type=int, default=20, help="number of containers")
+    PARSER.add_argument('--seed', type=int, default=0, help="random seed (the same seed gives the same manifest)")
+    PARSER.add_argument('--rows', type=int, default=8, help="rows of the bay")
+    PARSER.add_argument('--cols', type=int, default=12, help="columns of the bay")
+    PARSER.add_argument('--divider', type=int, default=None, help="last port side column (default: half the columns)")
+    PARSER.add_argument('--weights', choices=WEIGHT_DISTRIBUTIONS, default='uniform', help="weight distribution")
+    PARSER.add_argument('--mean-weight', type=int, default=5000, help="mean container weight in kg")
+    PARSER.add_argument('--depth', type=int, default=None, help="most containers stacked in one column")
+    PARSER.add_argument('--nan', choices=NAN_LAYOUTS, default='corners', help="layout of the NAN slots")
+    PARSER.add_argument('--port-share', type=float, default=None, help="fraction of containers on the port side")
+    ARGS = PARSER.parse_args()
+
+    GEOMETRY = ShipGeometry(ARGS.rows, ARGS.cols, ARGS.divider)
+    GRID = GENERATE_MANIFEST(ARGS.containers, ARGS.seed, GEOMETRY, ARGS.weights, ARGS.mean_weight, ARGS.depth, ARGS.nan, ARGS.port_share)
+    with open(ARGS.output, 'w') as FILE:
+        FILE.write(MANIFEST_TEXT(GRID, GEOMETRY))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+# NumPy is optional: without it the solver scores candidate moves one by one (BalanceProblem.SCORE_MOVES) and finds
+# exactly the same plans
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+# Whether the solver scores the candidate moves of a state all at once with NumPy
+VECTORIZED_MOVES = np is not None
+
+# Fewest (source, destination) pairs worth handing to NumPy: below this its per-call overhead outweighs the Python loop
+# (a standard 8x12 bay never has more than 144 pairs, wider bays soon do)
+VECTOR_MIN_PAIRS = 256
+
+# The ship slots of one layout as arrays, for scoring every (source, destination) pair of a search state in a few array
+# operations instead of a Python loop per pair
+class VectorMoveScorer:
+    # Precomputes the row, column, side and carry times of every ship slot of LAYOUT under COST_MODEL, plus the sparse
+    # table lookups (see COST_MODEL.CLEARANCE_BETWEEN) for the columns strictly between every pair of columns
+    def __init__(self, LAYOUT, COST_MODEL):
+        SHIP_SLOTS = LAYOUT.SHIP_SLOTS
+        COLS       = LAYOUT.COLS
+
+        self.COLS        = COLS
+        self.SLOT_ROWS   = np.array([ROW for ROW, COL in LAYOUT.POSITIONS[:SHIP_SLOTS]])
+        self.SLOT_COLS   = np.array([COL - 1 for ROW, COL in LAYOUT.POSITIONS[:SHIP_SLOTS]])
+        self.IS_PORT     = np.array(LAYOUT.IS_PORT[:SHIP_SLOTS], dtype=bool)
+        self.CARRY_TIMES = np.array([ROW[:SHIP_SLOTS] for ROW in COST_MODEL.TABLE[:SHIP_SLOTS]])
+
+        # For columns A and B (from 0) the columns between them are LOW to HIGH - 1, read from level SPAN_LEVEL of the
+        # clearance table at SPAN_LOW and SPAN_HIGH; SPAN_EMPTY marks neighbouring (or equal) columns
+        COLUMN_A, COLUMN_B = np.meshgrid(np.arange(COLS), np.arange(COLS), indexing='ij')
+        LOW  = np.minimum(COLUMN_A, COLUMN_B) + 1
+        HIGH = np.maximum(COLUMN_A, COLUMN_B)
+
+        self.SPAN_EMPTY = HIGH <= LOW
+        self.SPAN_LEVEL = np.array([[max(SPAN, 1).bit_length() - 1 for SPAN in ROW] for ROW in (HIGH - LOW).tolist()])
+        self.SPAN_LOW   = np.where(self.SPAN_EMPTY, 0, LOW)
+        self.SPAN_HIGH  = np.where(self.SPAN_EMPTY, 0, HIGH - (1 << self.SPAN_LEVEL))
+
+    # Calculates the climb over the tallest stack between every source and destination (rows of SOURCE_SLOTS, columns
+    # of END_SLOTS) from the clearance table of the state
+    def CLIMB_TIMES(self, CLEARANCE, SOURCE_SLOTS, END_SLOTS):
+        LEVELS = np.zeros((len(CLEARANCE), self.COLS), dtype=int)
+        for K, LEVEL in enumerate(CLEARANCE):
+            LEVELS[K, :len(LEVEL)] = LEVEL
+
+        SOURCE_COLS = self.SLOT_COLS[SOURCE_SLOTS][:, None]
+        END_COLS    = self.SLOT_COLS[END_SLOTS][None, :]
+        LEVEL       = self.SPAN_LEVEL[SOURCE_COLS, END_COLS]
+        TALLEST     = np.maximum(LEVELS[LEVEL, self.SPAN_LOW[SOURCE_COLS, END_COLS]], LEVELS[LEVEL, self.SPAN_HIGH[SOURCE_COLS, END_COLS]])
+        TALLEST     = np.where(self.SPAN_EMPTY[SOURCE_COLS, END_COLS], 0, TALLEST)
+
+        HIGHER_ROW = np.maximum(self.SLOT_ROWS[SOURCE_SLOTS][:, None], self.SLOT_ROWS[END_SLOTS][None, :])
+        return 2 * np.maximum(0, TALLEST + 1 - HIGHER_ROW)
+
+    # Scores every ship move of the containers in SOURCES at once; same arguments and result as
+    # BalanceProblem.SCORE_MOVES
+    def SCORE(self, STATE, SOURCES, UNCOVERS, DESTINATIONS, IMBALANCE, CLEARANCE):
+        if not SOURCES or not DESTINATIONS:
+            return [[] for _ in SOURCES]
+
+        SOURCE_SLOTS = np.array(SOURCES)
+        END_SLOTS    = np.array(DESTINATIONS)
+        WEIGHTS      = np.array([STATE.WEIGHTS[INDEX] for INDEX in SOURCES])
+        SOURCE_PORT  = self.IS_PORT[SOURCE_SLOTS]
+        CROSSES      = SOURCE_PORT[:, None] != self.IS_PORT[END_SLOTS][None, :]
+
+        # Carrying a container across the divider shifts PORT - STARBOARD by twice its weight, wherever it lands
+        CROSSED_IMBALANCE = np.abs(STATE.PORT_WEIGHT - STATE.STARBOARD_WEIGHT + np.where(SOURCE_PORT, -2, 2) * WEIGHTS)
+        NEW_IMBALANCE     = np.where(CROSSES, CROSSED_IMBALANCE[:, None], IMBALANCE)
+
+        # Crossing has to bring the sides closer; staying on the side has to uncover something, in another column
+        OTHER_COLUMN = self.SLOT_COLS[SOURCE_SLOTS][:, None] != self.SLOT_COLS[END_SLOTS][None, :]
+        WORTH_MAKING = np.where(CROSSES, NEW_IMBALANCE < IMBALANCE, np.array(UNCOVERS, dtype=bool)[:, None] & OTHER_COLUMN)
+
+        CARRY_TIMES = self.CARRY_TIMES[SOURCE_SLOTS[:, None], END_SLOTS[None, :]]
+        if CLEARANCE is not None:
+            CARRY_TIMES = CARRY_TIMES + self.CLIMB_TIMES(CLEARANCE, SOURCE_SLOTS, END_SLOTS)
+
+        return [[(END_INDEX, MOVE_IMBALANCE, CARRY_TIME)
+                 for END_INDEX, MOVE_IMBALANCE, CARRY_TIME, WORTH in zip(DESTINATIONS, IMBALANCE_ROW, TIME_ROW, WORTH_ROW) if WORTH]
+                for IMBALANCE_ROW, TIME_ROW, WORTH_ROW in zip(NEW_IMBALANCE.tolist(), CARRY_TIMES.tolist(), WORTH_MAKING.tolist())]
@@ -0,0 +1,89 @@
+import itertools
+import os
+import queue
+import threading
+
+# Where OUTBOUND manifests and logs go when no directory is given: $KEOGHS_OUTPUT_DIR, or else the desktop
+def DEFAULT_OUTPUT_DIR():
+    return os.environ.get('KEOGHS_OUTPUT_DIR') or os.path.join(os.path.expanduser('~'), 'Desktop')
+
+# Names an output directory for the operator ("desktop" for the desktop, else its path)
+def DESCRIBE_OUTPUT_DIR(OUTPUT_DIR=None):
+    OUTPUT_DIR = OUTPUT_DIR or DEFAULT_OUTPUT_DIR()
+    return 'desktop' if OUTPUT_DIR == os.path.join(os.path.expanduser('~'), 'Desktop') else OUTPUT_DIR
+
+# Numbers temporary files, so writers in the same process never pick the same name
+TEMPORARY_NUMBERS = itertools.count()
+
+# Writes DATA (text or bytes) to PATH all at once and atomically: it goes to a temporary file in the same directory,
+# is flushed and fsynced, and is then renamed over PATH (and the directory fsynced so the rename survives a crash too),
+# so PATH only ever holds the old file or the complete new one. FSYNC=False skips the syncs for files that are only
+# caches.
+def WRITE_ATOMICALLY(PATH, DATA, FSYNC=True):
+    if isinstance(DATA, str):
+        DATA = DATA.encode()
+
+    TEMPORARY_PATH = f"{PATH}.{os.getpid()}.{next(TEMPORARY_NUMBERS)}.tmp"
+    DESCRIPTOR = os.open(TEMPORARY_PATH, os.O_WRONLY | os.O_CREAT | os.O_EXCL | getattr(os, 'O_BINARY', 0), 0o666)
+
+    try:
+        with os.fdopen(DESCRIPTOR, 'wb') as FILE:
+            FILE.write(DATA)
+            if FSYNC:
+                FILE.flush()
+                os.fsync(FILE.fileno())
+        os.replace(TEMPORARY_PATH, PATH)
+    except BaseException:
+        if os.path.exists(TEMPORARY_PATH):
+            os.unlink(TEMPORARY_PATH)
+        raise
+
+    if FSYNC:
+        SYNC_DIRECTORY(os.path.dirname(os.path.abspath(PATH)))
+
+# Flushes a directory's entries to disk (where the platform can open directories; elsewhere a no-op)
+def SYNC_DIRECTORY(DIRECTORY):
+    if not hasattr(os, 'O_DIRECTORY'):
+        return
+
+    DESCRIPTOR = os.open(DIRECTORY, os.O_RDONLY | os.O_DIRECTORY)
+    try:
+        os.fsync(DESCRIPTOR)
+    finally:
+        os.close(DESCRIPTOR)
+
+# Writes files atomically on a background thread, so whoever hands them over never waits for the disk; files are
+# written in the order they are handed over and failures are collected for CLOSE to report
+class AsyncWriter:
+    # Starts the writer thread
+    def __init__(self, FSYNC=True):
+        self.FSYNC    = FSYNC
+        self.QUEUE    = queue.Queue()
+        self.FAILURES = []
+        self.WRITTEN  = 0
+        self.THREAD   = threading.Thread(target=self.RUN, name='AsyncWriter', daemon=True)
+        self.THREAD.start()
+
+    # Queues DATA to be written to PATH and returns straight away
+    def WRITE(self, PATH, DATA):
+        self.QUEUE.put((PATH, DATA))
+
+    # Writes queued files until CLOSE sends the stop marker
+    def RUN(self):
+        while True:
+            ITEM = self.QUEUE.get()
+            if ITEM is None:
+                return
+
+            PATH, DATA = ITEM
+            try:
+                WRITE_ATOMICALLY(PATH, DATA, self.FSYNC)
+                self.WRITTEN += 1
+            except OSError as ERROR:
+                self.FAILURES.append((PATH, ERROR))
+
+    # Waits for every queued file to be written, stops the thread and returns the (path, error) pairs that failed
+    def CLOSE(self):
+        self.QUEUE.put(None)
+        self.THREAD.join()
+        return self.FAILURES
@@ -0,0 +1,118 @@
+import json
+import time
+from contextlib import contextmanager, nullcontext
+from OUTPUT_WRITER import WRITE_ATOMICALLY
+
+# Counters every search engine keeps while it runs (merged as they are when root split workers report back)
+COUNTERS = ('NODES_EXPANDED', 'NODES_GENERATED', 'DUPLICATES_PRUNED', 'STALE_ENTRIES', 'BOUND_PRUNED', 'PLANS_FOUND')
+
+# What a search found out, how hard it worked for it and why it stopped. Hand one to BALANCE_SHIP or
+# BALANCE_SHIP_ANYTIME as STATS; searches without one keep their counts in local variables, so leaving it out costs
+# nothing. TIMERS adds the time spent generating moves versus evaluating them (and in each phase of the engine), and
+# the hooks are called as the search goes: ON_EXPAND(STATS, STATE, COST, IMBALANCE) for every node expanded,
+# ON_PLAN(STATS, MOVES, COST) for every cheaper plan and ON_FINISH(STATS) once the search has stopped.
+class SearchStats:
+    # Starts every counter at zero
+    def __init__(self, TIMERS=False, ON_EXPAND=None, ON_PLAN=None, ON_FINISH=None):
+        self.TIMERS    = TIMERS
+        self.ON_EXPAND = ON_EXPAND
+        self.ON_PLAN   = ON_PLAN
+        self.ON_FINISH = ON_FINISH
+
+        for NAME in COUNTERS:
+            setattr(self, NAME, 0)
+
+        self.PEAK_FRONTIER  = 0
+        self.PEAK_STORED    = 0
+        self.BEST_IMBALANCE = None
+        self.BEST_COST      = None
+        self.ENGINE         = None
+        self.TERMINATION    = None
+        self.PHASE_TIMES    = {}
+        self.STARTED        = time.perf_counter()
+        self.WALL_TIME      = None
+
+    # Records one expanded node: FRONTIER nodes are waiting to be expanded and STORED are held in memory in all
+    # (BEST_IMBALANCE is the smallest imbalance of any node expanded so far)
+    def EXPANDED(self, STATE, COST, IMBALANCE, FRONTIER, STORED):
+        self.NODES_EXPANDED += 1
+        if FRONTIER > self.PEAK_FRONTIER:
+            self.PEAK_FRONTIER = FRONTIER
+        if STORED > self.PEAK_STORED:
+            self.PEAK_STORED = STORED
+        if self.BEST_IMBALANCE is None or IMBALANCE < self.BEST_IMBALANCE:
+            self.BEST_IMBALANCE = IMBALANCE
+
+        if self.ON_EXPAND is not None:
+            self.ON_EXPAND(self, STATE, COST, IMBALANCE)
+
+    # Records a cheaper plan
+    def FOUND_PLAN(self, MOVES, COST):
+        self.PLANS_FOUND += 1
+        self.BEST_COST = COST
+
+        if self.ON_PLAN is not None:
+            self.ON_PLAN(self, MOVES, COST)
+
+    # Adds the counts of a search that ran elsewhere (a root split worker) to these
+    def MERGE(self, COUNTS):
+        for NAME in COUNTERS:
+            setattr(self, NAME, getattr(self, NAME) + COUNTS[NAME])
+        self.PEAK_FRONTIER = max(self.PEAK_FRONTIER, COUNTS['PEAK_FRONTIER'])
+        self.PEAK_STORED = max(self.PEAK_STORED, COUNTS['PEAK_STORED'])
+        for PHASE, SECONDS in COUNTS['PHASE_TIMES'].items():
+            self.ADD_TIME(PHASE, SECONDS)
+
+    # Collects the counts MERGE needs, in a form that can be sent between processes
+    def COUNTS(self):
+        COUNTS = {NAME: getattr(self, NAME) for NAME in COUNTERS}
+        COUNTS.update(PEAK_FRONTIER=self.PEAK_FRONTIER, PEAK_STORED=self.PEAK_STORED, PHASE_TIMES=dict(self.PHASE_TIMES))
+        return COUNTS
+
+    # Adds SECONDS to the time spent in PHASE
+    def ADD_TIME(self, PHASE, SECONDS):
+        self.PHASE_TIMES[PHASE] = self.PHASE_TIMES.get(PHASE, 0.0) + SECONDS
+
+    # Times the code run under it as PHASE when timers are on (otherwise it does nothing)
+    def TIMER(self, PHASE):
+        return self.RUN_TIMER(PHASE) if self.TIMERS else nullcontext()
+
+    # Accumulates the time spent under one TIMER
+    @contextmanager
+    def RUN_TIMER(self, PHASE):
+        START = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.ADD_TIME(PHASE, time.perf_counter() - START)
+
+    # Records why the search stopped and how long it ran, then calls ON_FINISH
+    def FINISH(self, REASON):
+        self.TERMINATION = REASON
+        self.WALL_TIME = time.perf_counter() - self.STARTED
+
+        if self.ON_FINISH is not None:
+            self.ON_FINISH(self)
+
+    # Lays the statistics out as a JSON-ready dict
+    def AS_DICT(self):
+        RESULT = {NAME.lower(): getattr(self, NAME) for NAME in COUNTERS}
+        RESULT.update({
+            'peak_frontier': self.PEAK_FRONTIER,
+            'peak_stored': self.PEAK_STORED,
+            'best_imbalance': self.BEST_IMBALANCE,
+            'best_cost': self.BEST_COST,
+            'engine': self.ENGINE,
+            'termination': self.TERMINATION,
+            'wall_time': self.WALL_TIME,
+            'phase_times': {PHASE: round(SECONDS, 6) for PHASE, SECONDS in sorted(self.PHASE_TIMES.items())},
+        })
+        return RESULT
+
+    # Writes the statistics to PATH as JSON (atomically, like the log they sit next to)
+    def WRITE_JSON(self, PATH):
+        WRITE_ATOMICALLY(PATH, json.dumps(self.AS_DICT(), indent=1) + '\n')
+
+# Times the code run under it as PHASE into STATS, if it is a SearchStats with timers on (a no-op otherwise)
+def PHASE_TIMER(STATS, PHASE):
+    return nullcontext() if STATS is None else STATS.TIMER(PHASE)
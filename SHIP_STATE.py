@@ -0,0 +1,281 @@
+import bisect
+import random
+
+# Fixed seed so Zobrist keys (and therefore search order) are reproducible between runs
+ZOBRIST_SEED = 179
+
+# Returns the ascending tuple SORTED_WEIGHTS with one container of WEIGHT taken out
+def WITHOUT_WEIGHT(SORTED_WEIGHTS, WEIGHT):
+    INDEX = bisect.bisect_left(SORTED_WEIGHTS, WEIGHT)
+    return SORTED_WEIGHTS[:INDEX] + SORTED_WEIGHTS[INDEX + 1:]
+
+# Returns the ascending tuple SORTED_WEIGHTS with a container of WEIGHT put in
+def WITH_WEIGHT(SORTED_WEIGHTS, WEIGHT):
+    INDEX = bisect.bisect_right(SORTED_WEIGHTS, WEIGHT)
+    return SORTED_WEIGHTS[:INDEX] + (WEIGHT,) + SORTED_WEIGHTS[INDEX:]
+
+# Checks whether a position lies in the shore buffer (buffer columns are numbered 0, -1, -2, ... away from the ship)
+def IS_BUFFER_POSITION(POSITION):
+    return POSITION[1] < 1
+
+# Shape of a ship's bay: ROWS x COLS slots, columns up to DIVIDER on the port side (half the bay by default) and the
+# rest on the starboard side, and the PARK_POSITION the crane waits at between jobs. Parsing, the solver, the cost
+# model and the screens all size themselves from one of these, so wider multi-bay ships only need a different one.
+class ShipGeometry:
+    # Sets up the geometry; the defaults are the terminal's standard 8x12 bay
+    def __init__(self, ROWS=8, COLS=12, DIVIDER=None, PARK_POSITION=(1, 8)):
+        DIVIDER = COLS // 2 if DIVIDER is None else DIVIDER
+        if ROWS < 1 or COLS < 2:
+            raise ValueError(f"a {ROWS}x{COLS} bay is too small (it needs a row and a column on either side)")
+        if not 1 <= DIVIDER < COLS:
+            raise ValueError(f"divider after column {DIVIDER} leaves one side of a {COLS} column bay empty")
+
+        self.ROWS          = ROWS
+        self.COLS          = COLS
+        self.DIVIDER       = DIVIDER
+        self.PARK_POSITION = tuple(PARK_POSITION)
+        self.SLOTS         = ROWS * COLS
+
+    # Checks whether a ship column is on the port side of the divider
+    def IS_PORT(self, COL):
+        return COL <= self.DIVIDER
+
+    # Lists the ship's slots row by row, the order manifests and search states keep them in
+    def POSITIONS(self):
+        return [(ROW, COL) for ROW in range(1, self.ROWS + 1) for COL in range(1, self.COLS + 1)]
+
+    # Describes the geometry for cache keys and messages
+    def SETTINGS(self):
+        return f"bay {self.ROWS}x{self.COLS} divider {self.DIVIDER} park {self.PARK_POSITION[0]},{self.PARK_POSITION[1]}"
+
+# Bay every manifest is read as unless told otherwise
+DEFAULT_GEOMETRY = ShipGeometry()
+
+# Returns the geometry of a ROWS x COLS bay: the default one when it is that size, otherwise one split down the middle
+# with the default park position
+def BAY_GEOMETRY(ROWS, COLS):
+    if (ROWS, COLS) == (DEFAULT_GEOMETRY.ROWS, DEFAULT_GEOMETRY.COLS):
+        return DEFAULT_GEOMETRY
+    return ShipGeometry(ROWS, COLS, PARK_POSITION=DEFAULT_GEOMETRY.PARK_POSITION)
+
+# Shore staging area beside the ship: ROWS truck lanes of COLS ground slots each, so every container set down in it can
+# be picked up again straight away. The crane enters and leaves it through one gate slot next to the ship (top of
+# column 0) and pays TRANSFER_PENALTY minutes for every trip between the two areas, which leave the ship at SHIP_GATE.
+class BufferArea:
+    # Sets up the buffer geometry; the default matches the terminal's 4x24 buffer and 4 minute transfer
+    def __init__(self, ROWS=4, COLS=24, TRANSFER_PENALTY=4, SHIP_GATE=(8, 1)):
+        self.ROWS             = ROWS
+        self.COLS             = COLS
+        self.TRANSFER_PENALTY = TRANSFER_PENALTY
+        self.SHIP_GATE        = SHIP_GATE
+        self.GATE             = (ROWS, 0)
+
+        # Slots nearest the gate first, so the first free one is always the cheapest place to stage a container
+        SLOTS = [(ROW, COL) for ROW in range(1, ROWS + 1) for COL in range(1 - COLS, 1)]
+        self.POSITIONS = tuple(sorted(SLOTS, key=lambda POSITION: (self.GATE_DISTANCE(POSITION), POSITION)))
+
+    # Calculates the crane time between a buffer slot and the gate
+    def GATE_DISTANCE(self, POSITION):
+        return abs(POSITION[0] - self.GATE[0]) + abs(POSITION[1] - self.GATE[1])
+
+    # Calculates the crane time between any two positions on the ship or in the buffer (trips between the areas go
+    # through both gates and pay the transfer penalty)
+    def DISTANCE(self, POSITION_1, POSITION_2):
+        IN_BUFFER_1 = IS_BUFFER_POSITION(POSITION_1)
+        IN_BUFFER_2 = IS_BUFFER_POSITION(POSITION_2)
+
+        if IN_BUFFER_1 == IN_BUFFER_2:
+            return abs(POSITION_1[0] - POSITION_2[0]) + abs(POSITION_1[1] - POSITION_2[1])
+
+        BUFFER_POSITION, SHIP_POSITION = (POSITION_1, POSITION_2) if IN_BUFFER_1 else (POSITION_2, POSITION_1)
+        SHIP_LEG = abs(SHIP_POSITION[0] - self.SHIP_GATE[0]) + abs(SHIP_POSITION[1] - self.SHIP_GATE[1])
+        return SHIP_LEG + self.TRANSFER_PENALTY + self.GATE_DISTANCE(BUFFER_POSITION)
+
+    # Describes the buffer for cache keys, since plans depend on it
+    def SETTINGS(self):
+        return f"buffer {self.ROWS}x{self.COLS} penalty {self.TRANSFER_PENALTY} gate {self.SHIP_GATE[0]},{self.SHIP_GATE[1]}"
+
+# Buffer the solver stages containers in unless told otherwise
+DEFAULT_BUFFER = BufferArea()
+
+# Static information about a ship bay that every search state shares (slot order, NAN mask, descriptions), sized from
+# its GEOMETRY; with a BUFFER its slots follow the ship's, nearest the gate first, and belong to neither side (IS_PORT
+# is None)
+class ShipLayout:
+    # Builds the layout from a parsed manifest grid
+    def __init__(self, GRID, GEOMETRY=DEFAULT_GEOMETRY, BUFFER=None):
+        ROWS = GEOMETRY.ROWS
+        COLS = GEOMETRY.COLS
+        self.GEOMETRY     = GEOMETRY
+        self.ROWS         = ROWS
+        self.COLS         = COLS
+        self.BUFFER       = BUFFER
+        self.SHIP_SLOTS   = GEOMETRY.SLOTS
+        self.POSITIONS    = tuple(GEOMETRY.POSITIONS())
+        if BUFFER is not None:
+            self.POSITIONS += BUFFER.POSITIONS
+        self.INDEX        = {POSITION: i for i, POSITION in enumerate(self.POSITIONS)}
+        self.BUFFER_SLOTS = tuple(range(self.SHIP_SLOTS, len(self.POSITIONS)))
+
+        NAN_MASK     = []
+        DESCRIPTIONS = []
+        for POSITION in self.POSITIONS:
+            CELL = GRID.get(POSITION)
+            NAN_MASK.append(bool(CELL) and CELL['type'] == 'NAN')
+            DESCRIPTIONS.append(CELL['description'] if CELL else 'UNUSED')
+
+        self.NAN_MASK     = tuple(NAN_MASK)
+        self.DESCRIPTIONS = tuple(DESCRIPTIONS)
+
+        # Top NAN slot of every ship column; the crane has to clear those just like containers
+        NAN_TOPS = [0] * COLS
+        for (ROW, COL), IS_NAN in zip(self.POSITIONS[:self.SHIP_SLOTS], NAN_MASK):
+            if IS_NAN:
+                NAN_TOPS[COL - 1] = max(NAN_TOPS[COL - 1], ROW)
+        self.NAN_TOPS = tuple(NAN_TOPS)
+        self.IS_PORT      = tuple(None if IS_BUFFER_POSITION(POSITION) else GEOMETRY.IS_PORT(POSITION[1]) for POSITION in self.POSITIONS)
+        self.TOTAL_WEIGHT = sum(CELL['weight'] for POSITION, CELL in GRID.items()
+                                if CELL['type'] != 'NAN' and not IS_BUFFER_POSITION(POSITION))
+
+        # Zobrist keys are drawn per (weight, slot) rather than per container, so equal-weight containers are interchangeable
+        RANDOM = random.Random(ZOBRIST_SEED)
+        WEIGHT_VALUES = sorted({CELL['weight'] for CELL in GRID.values() if CELL['type'] != 'NAN' and CELL['weight'] > 0})
+        self.ZOBRIST_KEYS = {WEIGHT: tuple(RANDOM.getrandbits(64) for _ in self.POSITIONS) for WEIGHT in WEIGHT_VALUES}
+        self.CRANE_KEYS   = {POSITION: RANDOM.getrandbits(64) for POSITION in self.POSITIONS}
+
+    # Creates the search state matching the grid the layout was built from
+    def INITIAL_STATE(self, GRID):
+        WEIGHTS = []
+        HEIGHTS = [0] * self.COLS
+        PORT_WEIGHT = 0
+        STARBOARD_WEIGHT = 0
+        PORT_WEIGHTS = []
+        STARBOARD_WEIGHTS = []
+        HASH = 0
+
+        for INDEX, (POSITION, IS_PORT) in enumerate(zip(self.POSITIONS, self.IS_PORT)):
+            CELL = GRID.get(POSITION)
+            WEIGHT = CELL['weight'] if CELL and CELL['type'] != 'NAN' else 0
+            WEIGHTS.append(WEIGHT)
+
+            if WEIGHT > 0:
+                HEIGHTS[POSITION[1] - 1] = POSITION[0]
+                HASH ^= self.ZOBRIST_KEYS[WEIGHT][INDEX]
+
+            if IS_PORT:
+                PORT_WEIGHT += WEIGHT
+                PORT_WEIGHTS += [WEIGHT] if WEIGHT > 0 else []
+            elif IS_PORT is not None:
+                STARBOARD_WEIGHT += WEIGHT
+                STARBOARD_WEIGHTS += [WEIGHT] if WEIGHT > 0 else []
+
+        SIDE_WEIGHTS = (tuple(sorted(PORT_WEIGHTS)), tuple(sorted(STARBOARD_WEIGHTS)))
+        return ShipState(self, tuple(WEIGHTS), tuple(HEIGHTS), PORT_WEIGHT, STARBOARD_WEIGHT, HASH, SIDE_WEIGHTS)
+
+
+# Immutable search node: one weight per slot plus a column height index, running side totals, the container weights
+# of each side in ascending order and a Zobrist hash, everything static lives on the shared layout
+class ShipState:
+    __slots__ = ('LAYOUT', 'WEIGHTS', 'HEIGHTS', 'PORT_WEIGHT', 'STARBOARD_WEIGHT', 'HASH', 'SIDE_WEIGHTS')
+
+    # Wraps a weight tuple ordered like LAYOUT.POSITIONS, the top occupied row of every column, the side totals, the
+    # hash and the (port, starboard) pair of ascending weight tuples
+    def __init__(self, LAYOUT, WEIGHTS, HEIGHTS, PORT_WEIGHT, STARBOARD_WEIGHT, HASH, SIDE_WEIGHTS):
+        self.LAYOUT           = LAYOUT
+        self.WEIGHTS          = WEIGHTS
+        self.HEIGHTS          = HEIGHTS
+        self.PORT_WEIGHT      = PORT_WEIGHT
+        self.STARBOARD_WEIGHT = STARBOARD_WEIGHT
+        self.HASH             = HASH
+        self.SIDE_WEIGHTS     = SIDE_WEIGHTS
+
+    # Calculates the transposition table key for this state with the crane at CRANE_POSITION
+    def SEARCH_KEY(self, CRANE_POSITION):
+        return self.HASH ^ self.LAYOUT.CRANE_KEYS.get(CRANE_POSITION, 0)
+
+    # Calculates the overall balance of the ship in this state
+    def IMBALANCE(self):
+        return abs(self.PORT_WEIGHT - self.STARBOARD_WEIGHT)
+
+    # Calculates the weight staged in the buffer (everything not on either side)
+    def BUFFERED_WEIGHT(self):
+        return self.LAYOUT.TOTAL_WEIGHT - self.PORT_WEIGHT - self.STARBOARD_WEIGHT
+
+    # Identifies slot indices of containers with nothing stacked on top of them (the top of every non-empty column,
+    # then every container staged in the buffer)
+    def ACCESSIBLE_CONTAINERS(self):
+        COLS = self.LAYOUT.COLS
+        ACCESSIBLE_CONTAINERS = [(HEIGHT - 1) * COLS + COL for COL, HEIGHT in enumerate(self.HEIGHTS) if HEIGHT > 0]
+
+        if self.BUFFERED_WEIGHT() > 0:
+            ACCESSIBLE_CONTAINERS += [INDEX for INDEX in self.LAYOUT.BUFFER_SLOTS if self.WEIGHTS[INDEX] > 0]
+
+        return ACCESSIBLE_CONTAINERS
+
+    # Identifies ship slot indices a container can legally be set down on (the first free slot of every column with room)
+    def VALID_DESTINATIONS(self):
+        ROWS     = self.LAYOUT.ROWS
+        COLS     = self.LAYOUT.COLS
+        NAN_MASK = self.LAYOUT.NAN_MASK
+        VALID_DESTINATIONS = []
+
+        for COL, HEIGHT in enumerate(self.HEIGHTS):
+            INDEX = HEIGHT * COLS + COL
+            if HEIGHT < ROWS and not NAN_MASK[INDEX]:
+                VALID_DESTINATIONS.append(INDEX)
+
+        return VALID_DESTINATIONS
+
+    # Creates the child state after moving the container in START_INDEX to END_INDEX (two slots, two column heights, the
+    # side totals, the sorted side weights and the hash change)
+    def MOVE(self, START_INDEX, END_INDEX):
+        WEIGHTS = list(self.WEIGHTS)
+        WEIGHT = WEIGHTS[START_INDEX]
+        WEIGHTS[END_INDEX] = WEIGHT
+        WEIGHTS[START_INDEX] = 0
+
+        PORT_WEIGHT = self.PORT_WEIGHT
+        STARBOARD_WEIGHT = self.STARBOARD_WEIGHT
+        SIDE_WEIGHTS = self.SIDE_WEIGHTS
+        IS_PORT = self.LAYOUT.IS_PORT
+
+        # Only a move across the divider or to or from the buffer changes the side totals and weights (a move within a
+        # side shares its parent's weight tuples)
+        if IS_PORT[START_INDEX] is not IS_PORT[END_INDEX]:
+            PORT_WEIGHTS, STARBOARD_WEIGHTS = SIDE_WEIGHTS
+            if IS_PORT[START_INDEX]:
+                PORT_WEIGHT -= WEIGHT
+                PORT_WEIGHTS = WITHOUT_WEIGHT(PORT_WEIGHTS, WEIGHT)
+            elif IS_PORT[START_INDEX] is not None:
+                STARBOARD_WEIGHT -= WEIGHT
+                STARBOARD_WEIGHTS = WITHOUT_WEIGHT(STARBOARD_WEIGHTS, WEIGHT)
+
+            if IS_PORT[END_INDEX]:
+                PORT_WEIGHT += WEIGHT
+                PORT_WEIGHTS = WITH_WEIGHT(PORT_WEIGHTS, WEIGHT)
+            elif IS_PORT[END_INDEX] is not None:
+                STARBOARD_WEIGHT += WEIGHT
+                STARBOARD_WEIGHTS = WITH_WEIGHT(STARBOARD_WEIGHTS, WEIGHT)
+            SIDE_WEIGHTS = (PORT_WEIGHTS, STARBOARD_WEIGHTS)
+
+        # Keep the column height index in step: the source column drops to its next container, the destination grows by
+        # one (buffer slots are not stacked, so they have no heights)
+        COLS = self.LAYOUT.COLS
+        SHIP_SLOTS = self.LAYOUT.SHIP_SLOTS
+        HEIGHTS = self.HEIGHTS
+        if START_INDEX < SHIP_SLOTS or END_INDEX < SHIP_SLOTS:
+            HEIGHTS = list(HEIGHTS)
+            if START_INDEX < SHIP_SLOTS:
+                START_COL = START_INDEX % COLS
+                START_HEIGHT = START_INDEX // COLS
+                while START_HEIGHT > 0 and WEIGHTS[(START_HEIGHT - 1) * COLS + START_COL] == 0:
+                    START_HEIGHT -= 1
+                HEIGHTS[START_COL] = START_HEIGHT
+            if END_INDEX < SHIP_SLOTS:
+                HEIGHTS[END_INDEX % COLS] = END_INDEX // COLS + 1
+            HEIGHTS = tuple(HEIGHTS)
+
+        ZOBRIST_KEYS = self.LAYOUT.ZOBRIST_KEYS[WEIGHT]
+        HASH = self.HASH ^ ZOBRIST_KEYS[START_INDEX] ^ ZOBRIST_KEYS[END_INDEX]
+
+        return ShipState(self.LAYOUT, tuple(WEIGHTS), HEIGHTS, PORT_WEIGHT, STARBOARD_WEIGHT, HASH, SIDE_WEIGHTS)
@@ -0,0 +1,85 @@
+import hashlib
+import json
+import os
+import sqlite3
+import time
+
+# Default location of the on-disk solution cache
+DEFAULT_CACHE_FILE = os.path.join(os.path.expanduser('~'), '.keoghs_port_solutions.sqlite')
+
+# Builds the canonical cache key of a manifest: its weights and NAN mask in slot order plus anything else
+# (SETTINGS) that changes which plan is optimal
+def MANIFEST_KEY(GRID, PARK_POSITION=(1, 8), SETTINGS=''):
+    DIGEST = hashlib.sha256()
+    DIGEST.update(f"{SETTINGS}|{PARK_POSITION[0]},{PARK_POSITION[1]}|".encode())
+
+    for POSITION in sorted(GRID):
+        CELL = GRID[POSITION]
+        IS_NAN = CELL['type'] == 'NAN'
+        DIGEST.update(f"{POSITION[0]},{POSITION[1]}:{'N' if IS_NAN else CELL['weight']};".encode())
+
+    return DIGEST.hexdigest()
+
+# Persistent least-recently-used cache of proven optimal balance plans keyed by MANIFEST_KEY
+class SolutionCache:
+    # Opens (or creates) the cache file; MAX_ENTRIES caps how many plans are kept
+    def __init__(self, PATH=DEFAULT_CACHE_FILE, MAX_ENTRIES=1000):
+        self.PATH        = PATH
+        self.MAX_ENTRIES = MAX_ENTRIES
+        self.HITS        = 0
+        self.MISSES      = 0
+
+        # The GUI solves on a worker thread with a cache opened on the main one (never both at once)
+        self.CONNECTION = sqlite3.connect(PATH, timeout=30, check_same_thread=False)
+        self.CONNECTION.execute("CREATE TABLE IF NOT EXISTS solutions (key TEXT PRIMARY KEY, moves TEXT NOT NULL, "
+                                "cost INTEGER NOT NULL, last_used REAL NOT NULL)")
+        self.CONNECTION.execute("CREATE TABLE IF NOT EXISTS counters (name TEXT PRIMARY KEY, value INTEGER NOT NULL)")
+        self.CONNECTION.commit()
+
+    # Looks up a plan, returning (moves, cost) or None, and counts the hit or miss
+    def GET(self, KEY):
+        ROW = self.CONNECTION.execute("SELECT moves, cost FROM solutions WHERE key = ?", (KEY,)).fetchone()
+
+        if ROW is None:
+            self.MISSES += 1
+            self.BUMP_COUNTER('misses')
+            self.CONNECTION.commit()
+            return None
+
+        self.HITS += 1
+        self.BUMP_COUNTER('hits')
+        self.CONNECTION.execute("UPDATE solutions SET last_used = ? WHERE key = ?", (time.time(), KEY))
+        self.CONNECTION.commit()
+
+        MOVES = [(tuple(START), tuple(END)) for START, END in json.loads(ROW[0])]
+        return MOVES, ROW[1]
+
+    # Stores a plan (replacing any older one for the same key) and evicts the least recently used plans past the cap
+    def PUT(self, KEY, MOVES, COST):
+        self.CONNECTION.execute("INSERT OR REPLACE INTO solutions (key, moves, cost, last_used) VALUES (?, ?, ?, ?)",
+                                (KEY, json.dumps(MOVES), COST, time.time()))
+        self.CONNECTION.execute("DELETE FROM solutions WHERE key NOT IN "
+                                "(SELECT key FROM solutions ORDER BY last_used DESC LIMIT ?)", (self.MAX_ENTRIES,))
+        self.CONNECTION.commit()
+
+    # Adds one to a persisted counter
+    def BUMP_COUNTER(self, NAME):
+        self.CONNECTION.execute("INSERT INTO counters (name, value) VALUES (?, 1) "
+                                "ON CONFLICT(name) DO UPDATE SET value = value + 1", (NAME,))
+
+    # Reports this session's and the all-time hit/miss counters and the number of stored plans
+    def STATS(self):
+        TOTALS = dict(self.CONNECTION.execute("SELECT name, value FROM counters").fetchall())
+        ENTRIES = self.CONNECTION.execute("SELECT COUNT(*) FROM solutions").fetchone()[0]
+
+        return {
+            'hits': self.HITS,
+            'misses': self.MISSES,
+            'total_hits': TOTALS.get('hits', 0),
+            'total_misses': TOTALS.get('misses', 0),
+            'entries': ENTRIES,
+        }
+
+    # Closes the cache file
+    def CLOSE(self):
+        self.CONNECTION.close()
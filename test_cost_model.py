@@ -0,0 +1,30 @@
+from CONTAINER_SOLVER import BalanceProblem, CALCULATE_BALANCE_COST
+from COST_MODEL import BUILD_CLEARANCE_TABLE, CostModel
+from SHIP_STATE import DEFAULT_GEOMETRY, ShipLayout
+
+# Builds a standard bay like ShipCase5 after its first move: a container in column 7 and one in slot (1,8), where the
+# crane parks
+def PARK_SLOT_GRID():
+    GRID = {POSITION: {'weight': 0, 'type': 'UNUSED', 'description': 'UNUSED'} for POSITION in DEFAULT_GEOMETRY.POSITIONS()}
+    GRID[1, 7] = {'weight': 504, 'type': 'CONTAINER', 'description': 'B'}
+    GRID[1, 8] = {'weight': 100, 'type': 'CONTAINER', 'description': 'P'}
+    return GRID
+
+# A carry out of the park slot over a full column climbs like any other leg, and so does the trip back to park
+def test_leg_from_park_slot_climbs():
+    GRID = PARK_SLOT_GRID()
+    COST_MODEL = CostModel(DEFAULT_GEOMETRY, None)
+
+    assert COST_MODEL.LEG_TIME((1, 8), (1, 6), COST_MODEL.COLUMN_HEIGHTS(GRID)) == 4
+    assert CALCULATE_BALANCE_COST([((1, 8), (1, 6))], DEFAULT_GEOMETRY, None, GRID) == 8
+
+# The search charges the same climb as the cost model
+def test_search_climb_from_park_slot():
+    GRID = PARK_SLOT_GRID()
+    LAYOUT = ShipLayout(GRID, DEFAULT_GEOMETRY)
+    STATE = LAYOUT.INITIAL_STATE(GRID)
+    PROBLEM = BalanceProblem(LAYOUT, STATE)
+    CLEARANCE = BUILD_CLEARANCE_TABLE(list(STATE.HEIGHTS))
+
+    assert PROBLEM.COST_MODEL.TRAVEL_TIME((1, 8), (1, 6)) + PROBLEM.CLIMB_TIME(CLEARANCE, (1, 8), (1, 6)) == 4
+    assert PROBLEM.PARK_TIME(STATE, (1, 6)) == 4
@@ -0,0 +1,45 @@
+from CONTAINER_SOLVER import BALANCE_SHIP_ANYTIME
+from HELPER_FUNCTIONS import PARSE_MANIFEST_FILE
+from SEARCH_STATS import SearchStats
+from SHIP_STATE import DEFAULT_GEOMETRY
+
+# Builds an empty standard bay holding a container of WEIGHT at every POSITION in CONTAINERS
+def TWO_CONTAINER_GRID(CONTAINERS):
+    GRID = {POSITION: {'weight': 0, 'type': 'UNUSED', 'description': 'UNUSED'} for POSITION in DEFAULT_GEOMETRY.POSITIONS()}
+    for POSITION, WEIGHT in CONTAINERS.items():
+        GRID[POSITION] = {'weight': WEIGHT, 'type': 'CONTAINER', 'description': 'C'}
+    return GRID
+
+# Runs the anytime search to the end and returns everything it yielded along with its SearchStats
+def SOLVE(GRID):
+    STATS = SearchStats()
+    return list(BALANCE_SHIP_ANYTIME(GRID, STATS=STATS)), STATS
+
+# Two containers on opposite sides skip the shortcut: an unbalanced pair has no legal split, a balanced one needs no move
+def test_opposite_sides():
+    RESULTS, STATS = SOLVE(TWO_CONTAINER_GRID({(1, 2): 100, (1, 11): 300}))
+    assert RESULTS == []
+    assert STATS.TERMINATION == 'infeasible'
+
+    RESULTS, STATS = SOLVE(TWO_CONTAINER_GRID({(1, 2): 100, (1, 11): 100}))
+    assert [(SOLUTION, COST, IS_OPTIMAL) for SOLUTION, _, COST, IS_OPTIMAL in RESULTS] == [([], 0, True)]
+
+# ShipCase3's two containers stay 61 apart whichever side they are on (threshold 14.1), so no plan is offered as optimal
+def test_ship_case_3_has_no_plan():
+    GRID, _ = PARSE_MANIFEST_FILE('ShipCase3.txt')
+    RESULTS, STATS = SOLVE(GRID)
+    assert RESULTS == []
+    assert STATS.TERMINATION == 'infeasible'
+
+# A shortcut move that balances the ship is still taken directly
+def test_same_side_shortcut():
+    RESULTS, STATS = SOLVE(TWO_CONTAINER_GRID({(1, 2): 100, (1, 3): 100}))
+    assert [(SOLUTION, IS_OPTIMAL) for SOLUTION, _, _, IS_OPTIMAL in RESULTS] == [([((1, 3), (1, 7))], True)]
+    assert STATS.ENGINE == 'DIRECT'
+
+# A shortcut move that is not legal (here the buried container of a stack) goes to the search instead
+def test_illegal_shortcut_is_searched():
+    RESULTS, STATS = SOLVE(TWO_CONTAINER_GRID({(1, 2): 100, (2, 2): 100}))
+    SOLUTION = RESULTS[-1][0]
+    assert STATS.ENGINE == 'ANYTIME'
+    assert SOLUTION[0][0] == (2, 2)